@@ -1,11 +1,16 @@
 # api/main.py - FastAPI backend integrating model and utilities
 from fastapi import FastAPI, File, UploadFile, BackgroundTasks # type: ignore
+from typing import List, Optional
 from fastapi.responses import JSONResponse # type: ignore
-from model.predict import predict_image
-from model.predict_video import predict_video_file
+from model.predict import predict_image_bytes, predict_images, get_batcher
+from model.predict_video import predict_video, spooled_upload, get_frame_scheduler
+from model.cascade import get_cascade_predictor
+from model.cache import get_cache, get_near_duplicate_index
 from model.train import train_model
-from utils.realtime_batch import process_webcam_stream, process_folder
-import shutil
+from model.registry import warm_up
+from model.workers import MAX_SEGMENT_WORKERS, get_worker_pool
+from utils.realtime_batch import scan_webcam, scan_folder
+from utils.tiling import MAX_PATCHES
 import os
 
 app = FastAPI()
@@ -22,42 +27,104 @@ def fetch_data():
     print("[INFO] Dataset downloaded and prepared.")
     print("[INFO] All tasks completed successfully.")
 
+@app.on_event("startup")
+def warm_model():
+    # Models load lazily on first request unless eager loading is requested
+    if os.environ.get("DEEPFAKE_EAGER_LOAD") == "1":
+        warm_up()
+        pool = get_worker_pool()
+        if pool is not None:
+            print(f"[INFO] Inference workers ready: {pool.wait_ready()}")
+
 @app.post("/predict/image")
-def predict_image_route(file: UploadFile = File(...)):
+def predict_image_route(file: UploadFile = File(...), tta: bool = False, tta_agg: str = "mean",
+                        faces: bool = False, face_agg: str = "max", tiles: bool = False, tile_agg: str = "mean",
+                        max_patches: int = MAX_PATCHES, cascade: bool = False):
+    if max_patches < 1:
+        return JSONResponse({"error": "max_patches must be at least 1"}, status_code=400)
     try:
-        temp_path = "temp.jpg"
-        with open(temp_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
+        data = file.file.read()
+        cache = get_cache()
+        key = cache.make_key(cache.digest(data), "image", threshold=0.5, tta=tta, tta_agg=tta_agg,
+                             faces=faces, face_agg=face_agg, tiles=tiles, tile_agg=tile_agg, max_patches=max_patches,
+                             cascade=cascade)
+        result = cache.get_or_compute(key, lambda: predict_image_bytes(
+            data, near_duplicates=None if faces or tiles or cascade else get_near_duplicate_index(), tta=tta,
+            tta_agg=tta_agg, faces=faces, face_agg=face_agg, tiles=tiles, tile_agg=tile_agg, max_patches=max_patches,
+            cascade=cascade))
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
 
-        label, confidence = predict_image(temp_path)
-        return JSONResponse({"label": label, "confidence": float(confidence)})
+@app.post("/predict/images")
+def predict_images_route(files: List[UploadFile] = File(...)):
+    try:
+        results = predict_images([f.file.read() for f in files])
+        return JSONResponse({"results": [{"filename": f.filename, **r} for f, r in zip(files, results)]})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 @app.post("/predict/video")
-def predict_video_route(file: UploadFile = File(...)):
+def predict_video_route(file: UploadFile = File(...), tta: bool = False, tta_agg: str = "mean",
+                        strategy: str = "grab", sample_fps: Optional[float] = None, pipeline: bool = False,
+                        adaptive: bool = False, max_frames: Optional[int] = None, segments: Optional[int] = None,
+                        timeline: bool = False, change_threshold: Optional[float] = None, decoder: str = "opencv",
+                        faces: bool = False, face_agg: str = "max", track_faces: bool = False,
+                        detect_every: int = 10, shared_batching: bool = True, checkpoint: bool = True):
+    if segments is not None and not 1 <= segments <= MAX_SEGMENT_WORKERS:
+        return JSONResponse({"error": f"segments must be between 1 and {MAX_SEGMENT_WORKERS}"}, status_code=400)
     try:
-        temp_path = "temp_video.mp4"
-        with open(temp_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-
-        result = predict_video_file(temp_path)
+        suffix = os.path.splitext(file.filename or "")[1] or ".mp4"
+        cache = get_cache()
+        options = {"tta": tta, "tta_agg": tta_agg, "strategy": strategy, "sample_fps": sample_fps,
+                   "adaptive": adaptive, "max_frames": max_frames, "timeline": timeline,
+                   "change_threshold": change_threshold, "decoder": decoder,
+                   "faces": faces, "face_agg": face_agg, "track_faces": track_faces,
+                   "detect_every": detect_every}
+        with spooled_upload(file.file, suffix) as (path, digest):
+            key = cache.make_key(digest, "video", threshold=0.5, frame_skip=10, **options)
+            # Pipelining, sharding, shared batching and checkpointing change how the verdict
+            # is computed, not the verdict, so they stay out of the key
+            result = cache.get_or_compute(key, lambda: predict_video(
+                path, pipeline=pipeline, segments=segments, shared_batching=shared_batching,
+                checkpoint=checkpoint, digest=digest, **options))
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
+@app.get("/stats/batcher")
+def batcher_stats():
+    return JSONResponse(get_batcher().stats())
+
+@app.get("/stats/video-scheduler")
+def video_scheduler_stats():
+    return JSONResponse(get_frame_scheduler().stats())
+
+@app.get("/stats/cascade")
+def cascade_stats():
+    try:
+        # Reporting must not load the screening model; it is built by the first cascade request
+        cascade = get_cascade_predictor(create=False)
+        return JSONResponse({"loaded": cascade is not None, **(cascade.stats() if cascade is not None else {})})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+@app.get("/stats/cache")
+def cache_stats():
+    return JSONResponse(get_cache().stats())
+
 @app.get("/scan/webcam")
-def scan_webcam():
+def scan_webcam_route():
     try:
-        result = process_webcam_stream()
+        result = scan_webcam()
         return JSONResponse({"message": "Webcam scan complete", "result": result})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 @app.get("/scan/folder")
-def scan_folder():
+def scan_folder_route():
     try:
-        result = process_folder("data")
+        result = scan_folder("data")
         return JSONResponse({"message": "Folder scan complete", "result": result})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
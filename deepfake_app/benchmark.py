@@ -0,0 +1,700 @@
+# benchmark.py - Performance benchmarks for the inference paths
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+IMAGE_SHAPE = (128, 128, 3)
+
+
+def latency_summary(latencies):
+    arr = np.asarray(latencies) * 1000.0
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "mean_ms": float(arr.mean()),
+    }
+
+
+def print_row(name, values):
+    cells = "  ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in values.items())
+    print(f"{name:<24} {cells}")
+
+
+def random_images(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.random((n,) + IMAGE_SHAPE, dtype=np.float32)
+
+
+def make_synthetic_video(path, seconds=600, fps=25, size=(640, 360), seed=0):
+    """Write a smooth random-walk video so codecs behave like on real footage."""
+    import cv2
+
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    base = cv2.resize(rng.integers(0, 256, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8), size)
+    for i in range(int(seconds * fps)):
+        frame = np.roll(base, shift=i % size[0], axis=1)
+        cv2.putText(frame, str(i), (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def make_static_video(path, seconds=600, fps=25, size=(640, 360), scene_seconds=20, seed=0):
+    """Write a talking-head-like video: long static scenes with light sensor noise and a moving counter."""
+    import cv2
+
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    scene = None
+    for i in range(int(seconds * fps)):
+        if i % int(scene_seconds * fps) == 0:
+            scene = cv2.resize(rng.integers(0, 256, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8), size)
+        noise = rng.integers(-3, 4, scene.shape, dtype=np.int16)
+        frame = np.clip(scene.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+        cv2.putText(frame, str(i), (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def run_concurrent(fn, inputs, concurrency):
+    """Call fn on every input from `concurrency` threads; return (elapsed, latencies)."""
+    latencies = []
+
+    def timed(x):
+        start = time.perf_counter()
+        fn(x)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, inputs))
+    return time.perf_counter() - start, latencies
+
+
+def bench_batching(args):
+    from model.batcher import MicroBatcher
+    from model.predict import predict_batch
+
+    inputs = random_images(args.requests)
+    predict_batch(inputs[:1])  # warm-up
+
+    for concurrency in args.concurrency:
+        elapsed, lat = run_concurrent(lambda x: predict_batch(x[None]), inputs, concurrency)
+        print_row(f"unbatched c={concurrency}", {"img_per_s": len(inputs) / elapsed, **latency_summary(lat)})
+
+        batcher = MicroBatcher(predict_batch, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+        elapsed, lat = run_concurrent(batcher.submit, inputs, concurrency)
+        stats = batcher.stats()
+        batcher.close()
+        print_row(f"batched c={concurrency}", {
+            "img_per_s": len(inputs) / elapsed,
+            **latency_summary(lat),
+            "avg_batch": stats["avg_batch_size"],
+        })
+
+
+def bench_compiled(args):
+    from model.registry import get_model, get_predictor
+
+    model = get_model()
+    predictor = get_predictor()
+    predictor.warm_up()
+    inputs = random_images(args.images)
+
+    paths = {
+        "model.predict": lambda x: model.predict(x, verbose=0),
+        "predict_on_batch": model.predict_on_batch,
+        "compiled": predictor.predict,
+    }
+    for name, fn in paths.items():
+        fn(inputs[:1])
+        lat = []
+        for i in range(len(inputs)):
+            start = time.perf_counter()
+            fn(inputs[i:i + 1])
+            lat.append(time.perf_counter() - start)
+        print_row(name, latency_summary(lat))
+
+
+def bench_backends(args):
+    from model.export import list_labeled_images, split_calibration_holdout, load_images
+    from model.registry import BACKENDS, get_predictor
+
+    _, holdout = split_calibration_holdout(list_labeled_images(args.data_dir), args.calibration_samples, args.holdout)
+    if not holdout:
+        print(f"[ERROR] No held-out images found under {args.data_dir}/real and {args.data_dir}/fake")
+        return
+    images = load_images([p for p, _ in holdout])
+    labels = np.array([label for _, label in holdout])
+    print(f"[INFO] Held-out set: {len(labels)} images ({int(labels.sum())} fake)")
+
+    reference = None
+    for backend in args.backends or BACKENDS:
+        try:
+            predictor = get_predictor(backend=backend)
+        except (FileNotFoundError, ImportError) as e:
+            print(f"{backend:<24} skipped: {e}")
+            continue
+        predictor.warm_up()
+
+        lat = []
+        for i in range(len(images)):
+            start = time.perf_counter()
+            predictor.predict(images[i:i + 1])
+            lat.append(time.perf_counter() - start)
+        scores = predictor.predict(images)
+        if reference is None:
+            reference = scores
+
+        print_row(backend, {
+            "accuracy": float(np.mean((scores >= 0.5) == labels)),
+            "agreement": float(np.mean((scores >= 0.5) == (reference >= 0.5))),
+            "max_abs_diff": float(np.abs(scores - reference).max()),
+            **latency_summary(lat),
+        })
+
+
+def bench_phash(args):
+    from utils.phash import HammingIndex
+
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 2**63, size=args.entries, dtype=np.int64).astype(np.uint64) << np.uint64(1)
+    index = HammingIndex(max_distance=args.max_distance, num_bands=args.bands)
+
+    start = time.perf_counter()
+    for i in range(0, len(hashes), args.insert_batch):
+        chunk = hashes[i:i + args.insert_batch]
+        index.add_many(chunk, list(range(i, i + len(chunk))))
+    build = time.perf_counter() - start
+    print_row("build", {"entries": len(index), "seconds": build, "inserts_per_s": len(index) / build})
+
+    targets = rng.choice(len(hashes), size=args.queries)
+    flips = [sum(1 << int(b) for b in rng.choice(64, size=args.max_distance, replace=False)) for _ in targets]
+    queries = {
+        "near-duplicate hits": [int(hashes[t]) ^ f for t, f in zip(targets, flips)],
+        "random misses": [int(h) for h in rng.integers(0, 2**63, size=args.queries, dtype=np.int64)],
+    }
+    for name, qs in queries.items():
+        lat, found = [], 0
+        for q in qs:
+            t0 = time.perf_counter()
+            found += index.lookup(q) is not None
+            lat.append(time.perf_counter() - t0)
+        print_row(name, {"found": found, **latency_summary(lat)})
+
+
+def bench_batch_api(args):
+    import cv2
+    from model.predict import predict_images
+
+    rng = np.random.default_rng(0)
+    encoded = [cv2.imencode(".jpg", rng.integers(0, 256, (256, 256, 3), dtype=np.uint8))[1].tobytes()
+               for _ in range(args.images)]
+    predict_images(encoded[:8], batch_size=8)  # warm-up
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        predict_images(encoded, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        print_row(f"batch_size={batch_size}", {"img_per_s": len(encoded) / elapsed, "seconds": elapsed})
+
+
+def bench_tta(args):
+    from model.registry import get_predictor, IMAGE_SIZE
+    from utils.tta import build_views, aggregate, DEFAULT_VIEWS
+
+    predictor = get_predictor()
+    predictor.warm_up()
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (512, 512, 3), dtype=np.uint8) for _ in range(args.images)]
+
+    def single(img):
+        import cv2
+        predictor.predict((cv2.resize(img, IMAGE_SIZE) / 255.0)[None])
+
+    def tta_batched(img, n):
+        aggregate(predictor.predict(build_views(img, IMAGE_SIZE, DEFAULT_VIEWS[:n])), "mean")
+
+    def tta_sequential(img, n):
+        views = build_views(img, IMAGE_SIZE, DEFAULT_VIEWS[:n])
+        aggregate([predictor.predict(v[None])[0] for v in views], "mean")
+
+    runs = {"single view": single}
+    for n in args.views:
+        runs[f"tta {n} views batched"] = lambda img, n=n: tta_batched(img, n)
+        runs[f"tta {n} views sequential"] = lambda img, n=n: tta_sequential(img, n)
+
+    baseline = None
+    for name, fn in runs.items():
+        fn(images[0])
+        lat = []
+        for img in images:
+            start = time.perf_counter()
+            fn(img)
+            lat.append(time.perf_counter() - start)
+        summary = latency_summary(lat)
+        baseline = baseline or summary["mean_ms"]
+        print_row(name, {**summary, "overhead_x": summary["mean_ms"] / baseline})
+
+
+def bench_video_batching(args):
+    from model.predict_video import predict_video
+
+    path = make_synthetic_video(args.video, seconds=args.minutes * 60, fps=args.fps)
+    predict_video(path, frame_skip=args.frame_skip * 1000, batch_size=1)  # warm-up on first frame
+
+    for batch_size in [1] + args.batch_sizes:
+        start = time.perf_counter()
+        result = predict_video(path, frame_skip=args.frame_skip, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        name = "per-frame" if batch_size == 1 else f"batched {batch_size}"
+        print_row(name, {
+            "seconds": elapsed,
+            "frames_per_s": result["frames_evaluated"] / elapsed,
+            "confidence": result["confidence"],
+        })
+
+
+def bench_sampling(args):
+    from utils.video_io import iter_frames, video_info, SAMPLING_STRATEGIES
+
+    path = make_synthetic_video(args.video, seconds=args.minutes * 60, fps=args.fps)
+    duration = video_info(path)["frame_count"] / video_info(path)["fps"]
+
+    for strategy in args.strategies or SAMPLING_STRATEGIES:
+        start = time.perf_counter()
+        sampled = sum(1 for _ in iter_frames(path, strategy, frame_skip=args.frame_skip, sample_fps=args.sample_fps))
+        elapsed = time.perf_counter() - start
+        print_row(strategy, {
+            "sampled": sampled,
+            "seconds": elapsed,
+            "samples_per_s": sampled / elapsed,
+            "video_s_per_s": duration / elapsed,
+        })
+
+
+def bench_pipeline(args):
+    from model.predict_video import predict_video
+
+    path = make_synthetic_video(args.video, seconds=args.minutes * 60, fps=args.fps)
+    predict_video(path, frame_skip=args.frame_skip * 1000)  # warm-up on first frame
+
+    runs = {"sequential": {}}
+    for workers in args.preprocess_workers:
+        runs[f"pipelined {workers} workers"] = {"pipeline": True, "preprocess_workers": workers, "queue_size": args.queue_size}
+
+    for name, options in runs.items():
+        start = time.perf_counter()
+        result = predict_video(path, frame_skip=args.frame_skip, strategy=args.strategy, tta=args.tta, **options)
+        elapsed = time.perf_counter() - start
+        row = {"seconds": elapsed, "frames_per_s": result["frames_evaluated"] / elapsed}
+        if "pipeline" in result:
+            row.update({f"{stage}_util": u for stage, u in result["pipeline"]["utilization"].items()})
+            row["bottleneck"] = result["pipeline"]["bottleneck"]
+        print_row(name, row)
+
+
+def bench_early_stop(args):
+    from model.export import list_labeled_images
+    from model.predict_video import predict_video
+
+    videos = list_labeled_images(args.data_dir, extensions=(".mp4", ".avi", ".mov", ".mkv"))[:args.videos]
+    if not videos:
+        print(f"[ERROR] No videos under {args.data_dir}/real or {args.data_dir}/fake")
+        return
+
+    full_frames = adaptive_frames = full_correct = adaptive_correct = agree = 0
+    full_seconds = adaptive_seconds = 0.0
+    reasons = {}
+    for path, label in videos:
+        start = time.perf_counter()
+        full = predict_video(path, frame_skip=args.frame_skip, max_frames=args.max_frames)
+        full_seconds += time.perf_counter() - start
+        start = time.perf_counter()
+        adaptive = predict_video(path, frame_skip=args.frame_skip, max_frames=args.max_frames, adaptive=True,
+                                 confidence=args.confidence, min_frames=args.min_frames)
+        adaptive_seconds += time.perf_counter() - start
+
+        expected = "Fake" if label else "Real"
+        full_frames += full["frames_evaluated"]
+        adaptive_frames += adaptive["frames_evaluated"]
+        full_correct += full["label"] == expected
+        adaptive_correct += adaptive["label"] == expected
+        agree += full["label"] == adaptive["label"]
+        reasons[adaptive["stopping_reason"]] = reasons.get(adaptive["stopping_reason"], 0) + 1
+
+    n = len(videos)
+    print_row("full", {"avg_frames": full_frames / n, "accuracy": full_correct / n, "seconds": full_seconds})
+    print_row("adaptive", {"avg_frames": adaptive_frames / n, "accuracy": adaptive_correct / n,
+                           "seconds": adaptive_seconds, "agreement": agree / n})
+    print_row("saved", {"avg_frames_saved": (full_frames - adaptive_frames) / n,
+                        "frames_saved_pct": 100.0 * (1 - adaptive_frames / full_frames),
+                        **{f"stopped_{k}": v for k, v in reasons.items()}})
+
+
+def bench_segments(args):
+    from model.predict_video import predict_video
+    from model.workers import MAX_SEGMENT_WORKERS, segment_pool
+
+    path = make_synthetic_video(args.video, seconds=args.minutes * 60, fps=args.fps)
+    baseline = None
+    # Ascending, since the shared segment pool only ever grows
+    for n in sorted(args.workers):
+        if n > MAX_SEGMENT_WORKERS:
+            print(f"[WARN] Skipping {n} segments: above DEEPFAKE_MAX_SEGMENT_WORKERS={MAX_SEGMENT_WORKERS}")
+            continue
+        if n > 1:
+            with segment_pool(n) as pool:
+                pool.wait_ready()  # keep model loading out of the timing
+        else:
+            predict_video(path, frame_skip=args.frame_skip * 1000)
+        start = time.perf_counter()
+        result = predict_video(path, frame_skip=args.frame_skip, strategy=args.strategy, segments=n)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or (elapsed, n)
+        speedup = baseline[0] / elapsed
+        print_row(f"{n} segments", {
+            "seconds": elapsed,
+            "frames_per_s": result["frames_evaluated"] / elapsed,
+            "speedup_x": speedup,
+            "efficiency": speedup * baseline[1] / n,
+            "confidence": result["confidence"],
+        })
+
+
+def bench_frame_diff(args):
+    from model.predict_video import predict_video
+
+    path = make_static_video(args.video, seconds=args.minutes * 60, fps=args.fps)
+    predict_video(path, frame_skip=args.frame_skip * 1000)  # warm-up on first frame
+
+    baseline = None
+    for change_threshold in [None] + args.thresholds:
+        start = time.perf_counter()
+        result = predict_video(path, frame_skip=args.frame_skip, change_threshold=change_threshold)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or (elapsed, result["confidence"])
+        skipping = result.get("frame_skipping", {})
+        print_row("no skipping" if change_threshold is None else f"threshold {change_threshold}", {
+            "seconds": elapsed,
+            "speedup_x": baseline[0] / elapsed,
+            "frames_skipped": skipping.get("frames_skipped", 0),
+            "skip_fraction": skipping.get("skip_fraction", 0.0),
+            "confidence_delta": abs(result["confidence"] - baseline[1]),
+        })
+
+
+def bench_video_concurrency(args):
+    from model.predict_video import predict_video, get_frame_scheduler
+
+    short = make_synthetic_video(args.video, seconds=args.seconds, fps=args.fps)
+    long = make_synthetic_video(args.long_video, seconds=args.seconds * args.long_factor, fps=args.fps)
+    predict_video(short, frame_skip=args.frame_skip * 1000)  # warm-up on first frame
+
+    for n in args.videos:
+        # One long video competes with n - 1 short ones
+        paths = [long] + [short] * (n - 1) if n > 1 else [short]
+        for shared in (False, True):
+            scheduler = get_frame_scheduler()
+            before = scheduler.stats()
+
+            def run(path):
+                start = time.perf_counter()
+                result = predict_video(path, frame_skip=args.frame_skip, batch_size=args.batch_size,
+                                       shared_batching=shared)
+                return result["frames_evaluated"], time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=n) as pool:
+                results = list(pool.map(run, paths))
+            elapsed = time.perf_counter() - start
+
+            row = {"frames_per_s": sum(f for f, _ in results) / elapsed, "seconds": elapsed}
+            if n > 1:
+                row["short_job_mean_s"] = float(np.mean([t for _, t in results[1:]]))
+                row["long_job_s"] = results[0][1]
+            if shared:
+                after = scheduler.stats()
+                batches = after["batches"] - before["batches"]
+                row["avg_batch"] = (after["items"] - before["items"]) / max(batches, 1)
+            print_row(f"{n} videos {'shared' if shared else 'per-video'}", row)
+
+
+def bench_decoders(args):
+    import tracemalloc
+    import cv2
+    from model.registry import IMAGE_SIZE
+    from utils.video_io import iter_frames
+
+    path = make_synthetic_video(args.video, seconds=args.seconds, fps=args.fps, size=tuple(args.size))
+    runs = {
+        "opencv + cv2.resize": lambda: ((i, cv2.resize(f, IMAGE_SIZE)) for i, _, f in
+                                        iter_frames(path, args.strategy, args.frame_skip, args.sample_fps)),
+        "ffmpeg full-res": lambda: ((i, f) for i, _, f in
+                                    iter_frames(path, frame_skip=args.frame_skip, sample_fps=args.sample_fps,
+                                                decoder="ffmpeg")),
+        "ffmpeg scaled": lambda: ((i, f) for i, _, f in
+                                  iter_frames(path, frame_skip=args.frame_skip, sample_fps=args.sample_fps,
+                                              decoder="ffmpeg", output_size=IMAGE_SIZE)),
+    }
+    for name, frames in runs.items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        count = 0
+        for _, frame in frames():
+            count += 1
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print_row(name, {"samples": count, "samples_per_s": count / elapsed, "seconds": elapsed,
+                         "peak_mb": peak / 2**20})
+
+
+def bench_face_tracking(args):
+    from model.predict_video import predict_video
+
+    predict_video(args.video, frame_skip=args.frame_skip, max_frames=1, faces=True)  # warm-up
+
+    baseline = None
+    for detect_every in [None] + args.detect_every:
+        start = time.perf_counter()
+        result = predict_video(args.video, frame_skip=args.frame_skip, max_frames=args.max_frames, faces=True,
+                               track_faces=detect_every is not None, detect_every=detect_every or 1)
+        elapsed = time.perf_counter() - start
+        face_stats = result["face_stats"]
+        frames = result["frames_evaluated"]
+        # Without a tracker the detector runs once per frame
+        calls = face_stats.get("tracking", {}).get("detection_calls", frames)
+        baseline = baseline or (elapsed, result["confidence"])
+        print_row("detect every frame" if detect_every is None else f"track, detect every {detect_every}", {
+            "frames_per_s": frames / elapsed,
+            "speedup_x": baseline[0] / elapsed,
+            "detection_calls": calls,
+            "detection_rate": calls / frames,
+            "detect_track_s": face_stats["detection_seconds"],
+            "tracks": len(result.get("face_tracks", [])),
+            "confidence_delta": abs(result["confidence"] - baseline[1]),
+        })
+
+
+def bench_tiles(args):
+    from model.predict import classify_array, classify_tiles
+    from model.registry import IMAGE_SIZE
+    from utils.preprocess import normalize_image
+
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (args.size[1], args.size[0], 3), dtype=np.uint8)
+    classify_array(normalize_image(img, IMAGE_SIZE))  # warm-up
+
+    latencies = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        classify_array(normalize_image(img, IMAGE_SIZE))
+        latencies.append(time.perf_counter() - start)
+    print_row("downscaled whole image", {"patches": 1, **latency_summary(latencies)})
+
+    for max_patches in args.max_patches:
+        latencies = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            result = classify_tiles(img, max_patches=max_patches, batch_size=args.batch_size)
+            latencies.append(time.perf_counter() - start)
+        print_row(f"tiled, cap {max_patches}", {"patches": result["tiles"]["patches"], **latency_summary(latencies)})
+
+
+def bench_cascade(args):
+    from model.cascade import CascadePredictor, split_screening_samples
+    from model.export import list_labeled_images, load_images
+    from model.registry import get_predictor
+
+    # The tail the screening model was trained without; --holdout must match its training run
+    _, _, holdout = split_screening_samples(list_labeled_images(args.data_dir), num_holdout=args.holdout)
+    if not holdout:
+        print(f"[ERROR] No held-out images found under {args.data_dir}/real and {args.data_dir}/fake")
+        return
+    images = load_images([p for p, _ in holdout])
+    labels = np.array([label for _, label in holdout])
+    print(f"[INFO] Held-out set: {len(labels)} images ({int(labels.sum())} fake)")
+
+    full = get_predictor()
+    full.warm_up()
+    lat = []
+    for i in range(len(images)):
+        start = time.perf_counter()
+        full.predict(images[i:i + 1])
+        lat.append(time.perf_counter() - start)
+    reference = full.predict(images)
+    full_accuracy = float(np.mean((reference >= 0.5) == labels))
+    print_row("full model", {"accuracy": full_accuracy, "escalation_rate": 1.0, **latency_summary(lat)})
+
+    for low, high in zip(args.low, args.high):
+        cascade = CascadePredictor(full.predict, low=low, high=high)
+        cascade.warm_up()
+        lat = []
+        for i in range(len(images)):
+            start = time.perf_counter()
+            cascade.predict(images[i:i + 1])
+            lat.append(time.perf_counter() - start)
+        scores, escalated = cascade.predict_detailed(images)
+        accuracy = float(np.mean((scores >= 0.5) == labels))
+        print_row(f"cascade [{low}, {high})", {
+            "accuracy": accuracy,
+            "accuracy_delta": accuracy - full_accuracy,
+            "agreement": float(np.mean((scores >= 0.5) == (reference >= 0.5))),
+            "escalation_rate": float(escalated.mean()),
+            **latency_summary(lat),
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deepfake detector performance benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("batching", help="Micro-batched vs per-request image inference")
+    p.add_argument("--requests", type=int, default=512, help="Total requests per run")
+    p.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    p.add_argument("--max-batch-size", type=int, default=32)
+    p.add_argument("--max-wait-ms", type=float, default=5.0)
+    p.set_defaults(func=bench_batching)
+
+    p = sub.add_parser("compiled", help="Per-image latency: model.predict vs compiled buckets")
+    p.add_argument("--images", type=int, default=200)
+    p.set_defaults(func=bench_compiled)
+
+    p = sub.add_parser("backends", help="Accuracy vs latency across Keras/TFLite/ONNX backends")
+    p.add_argument("--data-dir", type=str, default="data")
+    p.add_argument("--calibration-samples", type=int, default=200, help="Must match the export so the sets stay disjoint")
+    p.add_argument("--holdout", type=int, default=500)
+    p.add_argument("--backends", nargs="+", default=None)
+    p.set_defaults(func=bench_backends)
+
+    p = sub.add_parser("phash", help="Near-duplicate Hamming index build time and query latency")
+    p.add_argument("--entries", type=int, default=1_000_000)
+    p.add_argument("--queries", type=int, default=2000)
+    p.add_argument("--max-distance", type=int, default=6)
+    p.add_argument("--bands", type=int, default=4)
+    p.add_argument("--insert-batch", type=int, default=1, help="Hashes per add_many call (1 = streaming inserts)")
+    p.set_defaults(func=bench_phash)
+
+    p = sub.add_parser("batch-api", help="predict_images throughput by batch size")
+    p.add_argument("--images", type=int, default=512)
+    p.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64, 128])
+    p.set_defaults(func=bench_batch_api)
+
+    p = sub.add_parser("tta", help="Test-time augmentation latency overhead vs single-view inference")
+    p.add_argument("--images", type=int, default=50)
+    p.add_argument("--views", type=int, nargs="+", default=[2, 4, 7])
+    p.set_defaults(func=bench_tta)
+
+    p = sub.add_parser("video-batching", help="predict_video per-frame vs batched inference on a synthetic video")
+    p.add_argument("--video", type=str, default="bench_video.mp4", help="Generated on first use")
+    p.add_argument("--minutes", type=float, default=10)
+    p.add_argument("--fps", type=int, default=25)
+    p.add_argument("--frame-skip", type=int, default=10)
+    p.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64])
+    p.set_defaults(func=bench_video_batching)
+
+    p = sub.add_parser("sampling", help="Decode throughput of each video frame sampling strategy")
+    p.add_argument("--video", type=str, default="bench_video.mp4", help="Generated on first use")
+    p.add_argument("--minutes", type=float, default=10)
+    p.add_argument("--fps", type=int, default=25)
+    p.add_argument("--frame-skip", type=int, default=10)
+    p.add_argument("--sample-fps", type=float, default=None)
+    p.add_argument("--strategies", nargs="+", default=None)
+    p.set_defaults(func=bench_sampling)
+
+    p = sub.add_parser("pipeline", help="Sequential vs pipelined decode/preprocess/inference with stage utilization")
+    p.add_argument("--video", type=str, default="bench_video.mp4", help="Generated on first use")
+    p.add_argument("--minutes", type=float, default=10)
+    p.add_argument("--fps", type=int, default=25)
+    p.add_argument("--frame-skip", type=int, default=10)
+    p.add_argument("--strategy", type=str, default="grab")
+    p.add_argument("--tta", action="store_true", help="Heavier preprocessing (7 views per frame)")
+    p.add_argument("--preprocess-workers", type=int, nargs="+", default=[1, 2, 4])
+    p.add_argument("--queue-size", type=int, default=64)
+    p.set_defaults(func=bench_pipeline)
+
+    p = sub.add_parser("early-stop", help="Frames saved by adaptive early termination on a labeled video set")
+    p.add_argument("--data-dir", type=str, default="data/videos", help="Expects real/ and fake/ subfolders")
+    p.add_argument("--videos", type=int, default=100)
+    p.add_argument("--frame-skip", type=int, default=10)
+    p.add_argument("--max-frames", type=int, default=None)
+    p.add_argument("--confidence", type=float, default=0.99)
+    p.add_argument("--min-frames", type=int, default=16)
+    p.set_defaults(func=bench_early_stop)
+
+    p = sub.add_parser("segments", help="Scaling of segment-sharded video analysis from 1 to N processes")
+    p.add_argument("--video", type=str, default="bench_video.mp4", help="Generated on first use")
+    p.add_argument("--minutes", type=float, default=10)
+    p.add_argument("--fps", type=int, default=25)
+    p.add_argument("--frame-skip", type=int, default=10)
+    p.add_argument("--strategy", type=str, default="seek")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.set_defaults(func=bench_segments)
+
+    p = sub.add_parser("frame-diff", help="Speedup from reusing scores of unchanged frames on a static video")
+    p.add_argument("--video", type=str, default="bench_static_video.mp4", help="Generated on first use")
+    p.add_argument("--minutes", type=float, default=10)
+    p.add_argument("--fps", type=int, default=25)
+    p.add_argument("--frame-skip", type=int, default=10)
+    p.add_argument("--thresholds", type=float, nargs="+", default=[0.01, 0.02, 0.05])
+    p.set_defaults(func=bench_frame_diff)
+
+    p = sub.add_parser("video-concurrency", help="Throughput of concurrent videos with per-video vs shared frame batching")
+    p.add_argument("--video", type=str, default="bench_video_short.mp4", help="Generated on first use")
+    p.add_argument("--long-video", type=str, default="bench_video_long.mp4", help="Generated on first use")
+    p.add_argument("--seconds", type=float, default=60)
+    p.add_argument("--long-factor", type=int, default=10, help="Length of the long video relative to the short ones")
+    p.add_argument("--fps", type=int, default=25)
+    p.add_argument("--frame-skip", type=int, default=10)
+    p.add_argument("--batch-size", type=int, default=8, help="Frames per submission from each video")
+    p.add_argument("--videos", type=int, nargs="+", default=[1, 4, 16])
+    p.set_defaults(func=bench_video_concurrency)
+
+    p = sub.add_parser("decoders", help="OpenCV vs ffmpeg-pipe decode throughput and memory on high-res video")
+    p.add_argument("--video", type=str, default="bench_video_1080p.mp4", help="Generated on first use")
+    p.add_argument("--seconds", type=float, default=120)
+    p.add_argument("--fps", type=int, default=25)
+    p.add_argument("--size", type=int, nargs=2, default=[1920, 1080], metavar=("WIDTH", "HEIGHT"))
+    p.add_argument("--frame-skip", type=int, default=10)
+    p.add_argument("--sample-fps", type=float, default=None)
+    p.add_argument("--strategy", type=str, default="grab", help="OpenCV sampling strategy")
+    p.set_defaults(func=bench_decoders)
+
+    p = sub.add_parser("face-tracking", help="Detector call rate and fps of detect-then-track vs per-frame detection")
+    p.add_argument("--video", type=str, required=True, help="Video with faces, e.g. a talking-head clip")
+    p.add_argument("--frame-skip", type=int, default=1)
+    p.add_argument("--max-frames", type=int, default=None)
+    p.add_argument("--detect-every", type=int, nargs="+", default=[5, 10, 30])
+    p.set_defaults(func=bench_face_tracking)
+
+    p = sub.add_parser("tiles", help="Latency of tiled high-resolution inference by patch cap")
+    p.add_argument("--size", type=int, nargs=2, default=[6000, 4000], metavar=("WIDTH", "HEIGHT"))
+    p.add_argument("--max-patches", type=int, nargs="+", default=[16, 64, 256])
+    p.add_argument("--batch-size", type=int, default=64)
+    p.add_argument("--runs", type=int, default=5)
+    p.set_defaults(func=bench_tiles)
+
+    p = sub.add_parser("cascade", help="Escalation rate, latency and accuracy of the screening cascade vs the full model")
+    p.add_argument("--data-dir", type=str, default="data")
+    p.add_argument("--holdout", type=int, default=500, help="Must match the screening model's training run")
+    p.add_argument("--low", type=float, nargs="+", default=[0.1, 0.2, 0.3], help="Lower band edges")
+    p.add_argument("--high", type=float, nargs="+", default=[0.9, 0.8, 0.7], help="Upper band edges, paired with --low")
+    p.set_defaults(func=bench_cascade)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+# conftest.py - Lets tests import the app's top-level packages (model, utils, api) like the app does
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,133 @@
+# model/batcher.py - Dynamic micro-batching for concurrent inference requests
+import threading
+import queue
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Gathers concurrent single-item requests into batches and runs one forward
+    pass per batch on a background thread.
+
+    A batch is dispatched as soon as it holds `max_batch_size` items or the
+    oldest queued item has waited `max_wait_ms`, whichever comes first.
+
+    Args:
+        predict_fn (callable): Takes an (N, ...) array and returns N scores.
+        max_batch_size (int): Upper bound on items per forward pass.
+        max_wait_ms (float): How long the first item of a batch may wait for company.
+        num_workers (int): Dispatch threads, i.e. batches allowed in flight at once.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0, num_workers=1):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.num_workers = num_workers
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._closed = False
+
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes = Counter()
+        self._busy_seconds = 0.0
+
+    def submit_async(self, item) -> Future:
+        """Queue one input and return a Future resolving to its score."""
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((np.asarray(item, dtype=np.float32), future))
+        return future
+
+    def submit(self, item, timeout=None) -> float:
+        """Queue one input and block until its score is ready."""
+        return self.submit_async(item).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            avg = self._items / self._batches if self._batches else 0.0
+            return {
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": avg,
+                "max_batch_size_seen": max(self._batch_sizes) if self._batch_sizes else 0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "busy_seconds": self._busy_seconds,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+            }
+
+    def close(self):
+        """Stop the dispatch threads after draining requests already queued."""
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _ensure_worker(self):
+        if self._threads:
+            return
+        with self._lock:
+            if not self._threads:
+                for i in range(self.num_workers):
+                    thread = threading.Thread(target=self._run, name=f"micro-batcher-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                # Re-post the sentinel so the run loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+            items, futures = zip(*batch)
+
+            start = time.perf_counter()
+            try:
+                scores = np.asarray(self.predict_fn(np.stack(items))).reshape(len(items), -1)[:, 0]
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self._batches += 1
+                    self._items += len(items)
+                    self._batch_sizes[len(items)] += 1
+                    self._busy_seconds += elapsed
+
+            for future, score in zip(futures, scores):
+                future.set_result(float(score))
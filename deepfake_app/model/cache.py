@@ -0,0 +1,168 @@
+# model/cache.py - Content-addressed prediction cache (in-memory LRU + optional SQLite tier)
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from model.registry import BACKENDS, DEFAULT_VERSION, model_fingerprint, on_model_swap
+from utils.phash import HammingIndex
+
+CACHE_MAX_ENTRIES = int(os.environ.get("DEEPFAKE_CACHE_MAX_ENTRIES", 10000))
+CACHE_MAX_BYTES = int(os.environ.get("DEEPFAKE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_DB_PATH = os.environ.get("DEEPFAKE_CACHE_DB")  # unset = memory tier only
+NEAR_DUP_MAX_DISTANCE = int(os.environ.get("DEEPFAKE_NEAR_DUP_MAX_DISTANCE", 6))  # -1 disables
+
+
+class PredictionCache:
+    """
+    Caches prediction results keyed by the SHA-256 of the raw upload bytes,
+    the fingerprint of the serving model and the prediction parameters.
+
+    The memory tier is an LRU bounded by entry count and by the approximate
+    serialized size of the stored results. The optional SQLite tier survives
+    restarts; memory misses fall through to it and hits are promoted back.
+    Swapping a model through the registry clears both tiers of stale entries.
+
+    Args:
+        max_entries (int): Maximum number of results kept in memory.
+        max_bytes (int): Maximum total serialized size kept in memory.
+        db_path (str): SQLite file for the persistent tier, or None.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, db_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions "
+                "(key TEXT PRIMARY KEY, model TEXT NOT NULL, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+        on_model_swap(self.invalidate)
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def make_key(digest: str, kind: str, version=None, backend=None, **params) -> str:
+        """Build a cache key from a content digest, the serving model and the call parameters."""
+        fingerprint = model_fingerprint(version, backend)
+        param_str = ",".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{kind}|{fingerprint}|{param_str}|{digest}"
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                self._counters["memory_hits"] += 1
+                return json.loads(self._entries[key])
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM predictions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._counters["hits"] += 1
+                    self._counters["disk_hits"] += 1
+                    self._put_memory(key, row[0])
+                    return json.loads(row[0])
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        blob = json.dumps(value)
+        with self._lock:
+            self._put_memory(key, blob)
+            if self._db is not None:
+                model = key.split("|", 2)[1]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO predictions (key, model, value, created) VALUES (?, ?, ?, ?)",
+                    (key, model, blob, time.time()),
+                )
+                self._db.commit()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for `key`, or compute, store and return it."""
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def invalidate(self, version=None):
+        """Drop every in-memory entry and the persistent entries of weights `version` no longer serves."""
+        version = version or DEFAULT_VERSION
+        current = [model_fingerprint(version, backend) for backend in BACKENDS]
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._counters["invalidations"] += 1
+            if self._db is not None:
+                placeholders = ",".join("?" * len(current))
+                self._db.execute(
+                    f"DELETE FROM predictions WHERE model LIKE ? AND model NOT IN ({placeholders})",
+                    [f"{version}/%"] + current,
+                )
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "persistent": self._db is not None,
+            })
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _put_memory(self, key, blob):
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key))
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._counters["evictions"] += 1
+
+
+_cache = None
+
+
+def get_cache() -> PredictionCache:
+    global _cache
+    if _cache is None:
+        _cache = PredictionCache(db_path=CACHE_DB_PATH)
+    return _cache
+
+
+_near_duplicates = None
+
+
+def get_near_duplicate_index():
+    """Shared perceptual-hash index of earlier image scores, cleared on model swap; None if disabled."""
+    global _near_duplicates
+    if NEAR_DUP_MAX_DISTANCE < 0:
+        return None
+    if _near_duplicates is None:
+        _near_duplicates = HammingIndex(max_distance=NEAR_DUP_MAX_DISTANCE)
+        on_model_swap(lambda version: _near_duplicates.clear())
+    return _near_duplicates
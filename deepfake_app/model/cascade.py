@@ -0,0 +1,195 @@
+# model/cascade.py - Two-stage cascade: a small screening CNN scores everything, the full CNN only uncertain inputs
+import argparse
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from model.registry import MODEL_PATHS, IMAGE_SIZE, SCREENING_SIZE, get_predictor
+
+# Screening scores inside [low, high) are escalated to the full model
+CASCADE_LOW = float(os.environ.get("DEEPFAKE_CASCADE_LOW", 0.2))
+CASCADE_HIGH = float(os.environ.get("DEEPFAKE_CASCADE_HIGH", 0.8))
+SCREENING_VERSION = "screening"
+
+
+def downscale(batch: np.ndarray, size=SCREENING_SIZE) -> np.ndarray:
+    """Resize an (N, H, W, 3) model-input batch to `size`, by block averaging when the sizes divide evenly."""
+    n, h, w, c = batch.shape
+    out_w, out_h = size
+    if (h, w) == (out_h, out_w):
+        return batch
+    if h % out_h == 0 and w % out_w == 0:
+        return batch.reshape(n, out_h, h // out_h, out_w, w // out_w, c).mean(axis=(2, 4), dtype=np.float32)
+    return np.stack([cv2.resize(img, size, interpolation=cv2.INTER_AREA) for img in batch])
+
+
+class CascadePredictor:
+    """
+    Scores a batch with the screening model and sends only the rows whose
+    screening score falls inside the uncertainty band [low, high) to the
+    full model; the other rows keep their screening score.
+
+    Exposes the predictor interface (predict(batch) -> scores, warm_up()),
+    so it can back a MicroBatcher like any other predictor.
+
+    Args:
+        full_fn (callable): Full-model forward pass on (N, 128, 128, 3) batches.
+        screening: Predictor for the screening model (SCREENING_SIZE inputs).
+        low (float): Lower edge of the uncertainty band.
+        high (float): Upper edge of the uncertainty band.
+    """
+
+    def __init__(self, full_fn, screening=None, low=CASCADE_LOW, high=CASCADE_HIGH):
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"Invalid cascade band: [{low}, {high})")
+        self.full_fn = full_fn
+        self.screening = screening or get_predictor(SCREENING_VERSION, "keras")
+        self.low = low
+        self.high = high
+        self._lock = threading.Lock()
+        self._counters = {"inputs": 0, "escalated": 0, "batches": 0}
+        self._seconds = {"screening": 0.0, "full": 0.0}
+
+    def warm_up(self):
+        self.screening.warm_up()
+
+    def predict_detailed(self, batch):
+        """Return (scores, escalated mask) for an (N, H, W, 3) batch at IMAGE_SIZE."""
+        batch = np.asarray(batch, dtype=np.float32)
+        start = time.perf_counter()
+        scores = np.asarray(self.screening.predict(downscale(batch)), dtype=np.float32).reshape(-1)
+        screening_seconds = time.perf_counter() - start
+
+        escalated = (scores >= self.low) & (scores < self.high)
+        full_seconds = 0.0
+        if escalated.any():
+            start = time.perf_counter()
+            scores[escalated] = np.asarray(self.full_fn(batch[escalated])).reshape(-1)
+            full_seconds = time.perf_counter() - start
+
+        with self._lock:
+            self._counters["inputs"] += len(batch)
+            self._counters["escalated"] += int(escalated.sum())
+            self._counters["batches"] += 1
+            self._seconds["screening"] += screening_seconds
+            self._seconds["full"] += full_seconds
+        return scores, escalated
+
+    def predict(self, batch) -> np.ndarray:
+        return self.predict_detailed(batch)[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            inputs = self._counters["inputs"]
+            return {
+                **self._counters,
+                "band": [self.low, self.high],
+                "escalation_rate": self._counters["escalated"] / inputs if inputs else 0.0,
+                "screening_seconds": self._seconds["screening"],
+                "full_seconds": self._seconds["full"],
+            }
+
+
+_cascades = {}
+_cascade_lock = threading.Lock()
+
+
+def get_cascade_predictor(backend: str = None, create: bool = True) -> CascadePredictor:
+    """
+    Shared cascade whose second stage is the regular full-model path on
+    `backend`. Building it loads the screening model; with `create=False`
+    None is returned instead when it has not been built yet.
+    """
+    cascade = _cascades.get(backend)
+    if cascade is None and create:
+        from model.predict import predict_batch
+        with _cascade_lock:
+            cascade = _cascades.get(backend)
+            if cascade is None:
+                cascade = _cascades[backend] = CascadePredictor(lambda batch: predict_batch(batch, backend))
+    return cascade
+
+
+def _load_dataset(samples, size, batch_size, shuffle=False):
+    import tensorflow as tf  # type: ignore
+
+    def load(path, label):
+        img = tf.image.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+        # Same pipeline as serving: full model input size first, then the screening size
+        img = tf.image.resize(tf.cast(img, tf.float32) / 255.0, IMAGE_SIZE)
+        img = tf.image.resize(img, size, method="area")
+        return img, tf.cast(label, tf.float32)
+
+    paths = [p for p, _ in samples]
+    labels = [label for _, label in samples]
+    ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+    if shuffle:
+        ds = ds.shuffle(min(len(samples), 10000), seed=42)
+    return ds.map(load, num_parallel_calls=tf.data.AUTOTUNE).batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def split_screening_samples(samples, validation_fraction=0.1, num_holdout=500):
+    """
+    Disjoint training, validation (head) and held-out evaluation (tail)
+    subsets of the shuffled samples. The held-out tail is never seen while
+    training or selecting the screening model, so benchmark.py cascade can
+    measure it without bias.
+    """
+    num_holdout = max(0, min(num_holdout, len(samples) - 2))
+    rest, holdout = samples[:len(samples) - num_holdout], samples[len(samples) - num_holdout:]
+    num_val = max(1, int(len(rest) * validation_fraction))
+    return rest[num_val:], rest[:num_val], holdout
+
+
+def train_screening_model(data_dir="data", output_path=None, epochs=10, batch_size=128, validation_fraction=0.1,
+                          learning_rate=0.001, num_holdout=500):
+    """
+    Train the screening model on data_dir/real and data_dir/fake at
+    SCREENING_SIZE and save it where the registry expects it. The last
+    `num_holdout` samples are kept out for evaluation (see
+    split_screening_samples).
+    """
+    from model.cnn_model import build_screening_model, get_advanced_callbacks
+    from model.export import list_labeled_images
+
+    output_path = output_path or MODEL_PATHS[SCREENING_VERSION]
+    samples = list_labeled_images(data_dir)
+    if not samples:
+        raise ValueError(f"No images found under {data_dir}/real or {data_dir}/fake")
+    train_set, val_set, holdout = split_screening_samples(samples, validation_fraction, num_holdout)
+    if not train_set:
+        raise ValueError(f"Too few images under {data_dir} to train with {len(val_set)} validation images")
+    print(f"[INFO] Training screening model on {len(train_set)} images, validating on {len(val_set)}, "
+          f"holding out {len(holdout)}")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    model = build_screening_model(SCREENING_SIZE[::-1] + (3,), learning_rate)
+    model.fit(
+        _load_dataset(train_set, SCREENING_SIZE[::-1], batch_size, shuffle=True),
+        validation_data=_load_dataset(val_set, SCREENING_SIZE[::-1], batch_size),
+        epochs=epochs,
+        callbacks=get_advanced_callbacks(save_path=output_path),
+    )
+    print(f"[INFO] Screening model saved to {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Two-stage screening/full-model cascade")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("train", help="Train the screening model")
+    p.add_argument("--data-dir", type=str, default="data", help="Folder with real/ and fake/ images")
+    p.add_argument("--output", type=str, default=None, help="Defaults to the registry's screening model path")
+    p.add_argument("--epochs", type=int, default=10)
+    p.add_argument("--batch-size", type=int, default=128)
+    p.add_argument("--validation-fraction", type=float, default=0.1)
+    p.add_argument("--learning-rate", type=float, default=0.001)
+    p.add_argument("--holdout", type=int, default=500, help="Images kept out for benchmark.py cascade")
+    args = parser.parse_args()
+
+    train_screening_model(args.data_dir, args.output, epochs=args.epochs, batch_size=args.batch_size,
+                          validation_fraction=args.validation_fraction, learning_rate=args.learning_rate,
+                          num_holdout=args.holdout)
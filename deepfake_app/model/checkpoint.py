@@ -0,0 +1,146 @@
+# model/checkpoint.py - On-disk checkpoints for resumable video analysis
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+from model.registry import model_fingerprint
+
+CHECKPOINT_DIR = os.environ.get("DEEPFAKE_CHECKPOINT_DIR", "checkpoints")
+CHECKPOINT_EVERY = int(os.environ.get("DEEPFAKE_CHECKPOINT_EVERY", 256))  # frames between saves
+CHECKPOINT_MAX_AGE_SECONDS = float(os.environ.get("DEEPFAKE_CHECKPOINT_MAX_AGE_SECONDS", 24 * 3600))
+CHECKPOINT_MAX_BYTES = int(os.environ.get("DEEPFAKE_CHECKPOINT_MAX_BYTES", 1024 * 1024 * 1024))
+CHECKPOINT_PRUNE_INTERVAL = 60.0  # seconds between directory scans triggered by save()
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class CheckpointStore:
+    """
+    Persists the progress of video jobs, one pickle file per job.
+
+    A job is identified by the SHA-256 of the video file, the fingerprint of
+    the serving model and every parameter that affects the verdict, so a
+    resubmitted file picks up exactly where a matching run stopped. A state
+    is a dict: in-process runs store their last scored frame ("position")
+    with the running aggregates, sharded runs store the scores of each
+    finished frame range ("segments"), and a finished run stores only its
+    "result". Files are replaced atomically, so a crash mid-write leaves
+    the previous checkpoint intact.
+
+    Checkpoints are pruned so the directory stays bounded: files older than
+    `max_age_seconds` are removed, then the oldest ones until the directory
+    holds at most `max_bytes`. Pruning runs on creation and at most once a
+    minute from save().
+
+    Args:
+        directory (str): Where checkpoint files are kept.
+        max_age_seconds (float): Age after which a checkpoint is abandoned.
+        max_bytes (int): Maximum total size of the checkpoint files.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR, max_age_seconds=CHECKPOINT_MAX_AGE_SECONDS,
+                 max_bytes=CHECKPOINT_MAX_BYTES):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        os.makedirs(directory, exist_ok=True)
+        self.prune()
+
+    @staticmethod
+    def make_key(digest: str, version=None, backend=None, **params) -> str:
+        fingerprint = model_fingerprint(version, backend)
+        param_str = ",".join(f"{k}={params[k]}" for k in sorted(params))
+        return hashlib.sha256(f"video|{fingerprint}|{param_str}|{digest}".encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.ckpt")
+
+    def load(self, key):
+        """
+        The saved state for `key`, or None if there is none. A file that
+        cannot be unpickled (truncated, or written by an incompatible
+        version of the code) is deleted and treated as missing.
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[WARN] Discarding unreadable checkpoint {key}: {e!r}")
+            self.delete(key)
+            return None
+
+    def save(self, key, state: dict):
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(key))
+            except Exception:
+                os.remove(tmp_path)
+                raise
+            due = time.monotonic() - self._last_prune >= CHECKPOINT_PRUNE_INTERVAL
+        if due:
+            self.prune(keep=key)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, keep=None) -> int:
+        """Remove expired checkpoints, then the oldest ones over max_bytes; returns how many were removed."""
+        with self._lock:
+            self._last_prune = time.monotonic()
+            now = time.time()
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith((".ckpt", ".tmp")):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+            entries.sort()
+            keep_path = self._path(keep) if keep is not None else None
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for mtime, size, path in entries:
+                expired = now - mtime > self.max_age_seconds
+                if path == keep_path or not (expired or total > self.max_bytes):
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+        return removed
+
+
+_store = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _store
+    if _store is None:
+        _store = CheckpointStore()
+    return _store
@@ -47,13 +47,40 @@ def build_cnn_model(input_shape=(128, 128, 3), learning_rate=0.00005):
 
     return model
 
+
+def build_screening_model(input_shape=(64, 64, 3), learning_rate=0.001):
+    """Small, fast screening CNN for the first stage of the cascade (model/cascade.py)."""
+    model = Sequential()
+
+    model.add(Conv2D(16, (3, 3), activation='relu', padding='same', input_shape=input_shape))
+    model.add(BatchNormalization())
+    model.add(MaxPooling2D(pool_size=(2, 2)))
+
+    model.add(Conv2D(32, (3, 3), activation='relu', padding='same'))
+    model.add(BatchNormalization())
+    model.add(MaxPooling2D(pool_size=(2, 2)))
+
+    model.add(Conv2D(64, (3, 3), activation='relu', padding='same'))
+    model.add(BatchNormalization())
+    model.add(MaxPooling2D(pool_size=(2, 2)))
+    model.add(Dropout(0.3))
+
+    model.add(GlobalAveragePooling2D())
+    model.add(Dense(1, activation='sigmoid'))
+
+    model.compile(optimizer=Adam(learning_rate=learning_rate),
+                  loss='binary_crossentropy',
+                  metrics=['accuracy'])
+
+    return model
+
 import tensorflow as tf  # type: ignore
 from tensorflow.keras.callbacks import TensorBoard  # type: ignore
 
-def get_advanced_callbacks(save_path='saved_model/deepfake_cnn.h5', patience=5):
+def get_advanced_callbacks(save_path='saved_model/deepfake_cnn.h5', patience=5, log_dir='logs/tensorboard'):
     return [
         ReduceLROnPlateau(monitor='val_loss', factor=0.3, patience=3, verbose=1, min_lr=1e-7),
         tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True),
         tf.keras.callbacks.ModelCheckpoint(save_path, monitor='val_accuracy', save_best_only=True, verbose=1),
-        tf.keras.callbacks.TensorBoard(log_dir='logs/tensorboard', histogram_freq=1)
+        tf.keras.callbacks.TensorBoard(log_dir=log_dir, histogram_freq=1)
     ]
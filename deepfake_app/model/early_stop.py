@@ -0,0 +1,44 @@
+# model/early_stop.py - Sequential stopping rule for adaptive video verdicts
+import math
+
+# Two-sided z values for the supported confidence levels
+Z_SCORES = {0.9: 1.645, 0.95: 1.960, 0.99: 2.576, 0.999: 3.291}
+
+
+class SequentialVerdict:
+    """
+    Confidence-interval stopping rule over the running mean of frame scores.
+
+    The interval mean +/- z * std / sqrt(n) of a utils.streaming_stats.StreamingStats
+    is compared to the decision threshold: once it lies entirely above (Fake)
+    or below (Real) the threshold the verdict cannot flip at this confidence
+    level and scoring can stop. Neighbouring frames are correlated, so the
+    interval is optimistic on short prefixes; `min_frames` guards against
+    stopping on the first few samples.
+
+    Args:
+        threshold (float): Decision threshold on the mean score.
+        confidence (float): Confidence level of the interval (a key of Z_SCORES).
+        min_frames (int): Frames to see before the bound may stop the run.
+    """
+
+    def __init__(self, threshold=0.5, confidence=0.99, min_frames=16):
+        if confidence not in Z_SCORES:
+            raise ValueError(f"Unsupported confidence: {confidence} (expected one of {sorted(Z_SCORES)})")
+        self.threshold = threshold
+        self.confidence = confidence
+        self.z = Z_SCORES[confidence]
+        self.min_frames = min_frames
+
+    def interval(self, stats):
+        if stats.count < 2:
+            return 0.0, 1.0
+        half_width = self.z * math.sqrt(stats.variance / stats.count)
+        return stats.mean - half_width, stats.mean + half_width
+
+    def decided(self, stats) -> bool:
+        """True once the interval lies entirely on one side of the threshold."""
+        if stats.count < self.min_frames:
+            return False
+        low, high = self.interval(stats)
+        return low >= self.threshold or high < self.threshold
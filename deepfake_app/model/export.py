@@ -0,0 +1,116 @@
+# model/export.py - Export the trained CNN to TFLite / ONNX with post-training quantization
+import argparse
+import os
+import random
+
+import numpy as np
+import tensorflow as tf  # type: ignore
+
+from model.registry import get_model, backend_path, IMAGE_SIZE
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+QUANTIZATION_MODES = ("float", "dynamic", "int8")
+
+
+def list_labeled_images(data_dir="data", seed=42, extensions=IMAGE_EXTENSIONS):
+    """Return a shuffled list of (path, label) with label 1 for fake and 0 for real."""
+    samples = []
+    for label_name, label in (("real", 0), ("fake", 1)):
+        folder = os.path.join(data_dir, label_name)
+        if not os.path.isdir(folder):
+            continue
+        for file in sorted(os.listdir(folder)):
+            if file.lower().endswith(extensions):
+                samples.append((os.path.join(folder, file), label))
+    random.Random(seed).shuffle(samples)
+    return samples
+
+
+def split_calibration_holdout(samples, num_calibration=200, num_holdout=500):
+    """Disjoint calibration (head) and held-out evaluation (tail) subsets."""
+    calibration = samples[:num_calibration]
+    holdout = samples[num_calibration:num_calibration + num_holdout]
+    return calibration, holdout
+
+
+def load_images(paths) -> np.ndarray:
+    from model.predict import load_image_array
+    return np.stack([load_image_array(p) for p in paths]).astype(np.float32)
+
+
+def export_tflite(model, output_path, quantization="float", calibration=None):
+    """
+    Convert a Keras model to a TFLite flatbuffer.
+
+    Args:
+        model: Trained Keras model.
+        output_path (str): Where the .tflite file is written.
+        quantization (str): "float" (no quantization), "dynamic" (int8 weights,
+            float activations) or "int8" (full integer, needs calibration).
+        calibration (np.ndarray): (N, H, W, 3) representative inputs for "int8".
+    """
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode: {quantization}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization in ("dynamic", "int8"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "int8":
+        if calibration is None or not len(calibration):
+            raise ValueError("Full INT8 quantization requires calibration images")
+
+        def representative_dataset():
+            for sample in calibration:
+                yield [sample[None].astype(np.float32)]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    flatbuffer = converter.convert()
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(flatbuffer)
+    print(f"[INFO] Wrote {quantization} TFLite model to {output_path} ({len(flatbuffer) / 1e6:.1f} MB)")
+    return output_path
+
+
+def export_onnx(model, output_path):
+    """Convert a Keras model to ONNX (requires the optional tf2onnx package)."""
+    try:
+        import tf2onnx  # type: ignore
+    except ImportError:
+        raise ImportError("ONNX export requires tf2onnx: pip install tf2onnx onnxruntime")
+
+    spec = (tf.TensorSpec((None,) + IMAGE_SIZE + (3,), tf.float32, name="input"),)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tf2onnx.convert.from_keras(model, input_signature=spec, output_path=output_path)
+    print(f"[INFO] Wrote ONNX model to {output_path}")
+    return output_path
+
+
+def export_all(data_dir="data", version=None, onnx=False, num_calibration=200):
+    model = get_model(version)
+    calibration_set, _ = split_calibration_holdout(list_labeled_images(data_dir), num_calibration)
+    calibration = load_images([p for p, _ in calibration_set]) if calibration_set else None
+    if calibration is None:
+        print(f"[WARN] No images under {data_dir}/real or {data_dir}/fake; skipping INT8 export.")
+
+    for mode in QUANTIZATION_MODES:
+        if mode == "int8" and calibration is None:
+            continue
+        export_tflite(model, backend_path(f"tflite-{mode}", version), quantization=mode, calibration=calibration)
+    if onnx:
+        export_onnx(model, backend_path("onnx", version))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the deepfake CNN to TFLite/ONNX")
+    parser.add_argument("--data-dir", type=str, default="data", help="Folder with real/ and fake/ calibration images")
+    parser.add_argument("--version", type=str, default=None, help="Model version from the registry")
+    parser.add_argument("--calibration-samples", type=int, default=200)
+    parser.add_argument("--onnx", action="store_true", help="Also export an ONNX model")
+    args = parser.parse_args()
+
+    export_all(args.data_dir, version=args.version, onnx=args.onnx, num_calibration=args.calibration_samples)
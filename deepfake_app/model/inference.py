@@ -0,0 +1,148 @@
+# model/inference.py - Inference backends: compiled Keras (bucketed tf.function), TFLite and ONNX Runtime
+import threading
+
+import numpy as np
+import tensorflow as tf  # type: ignore
+
+BUCKET_SIZES = (1, 4, 16, 64)
+MAX_PAD_FRACTION = 0.25
+
+
+class CompiledPredictor:
+    """
+    Wraps a Keras model in one concrete tf.function per bucket size.
+
+    Incoming batches are split into bucket-sized chunks, zero-padding the
+    last one up to the next bucket when that wastes at most `max_pad_fraction`
+    of it, so the graph is traced once per bucket at warm-up and never again,
+    and none of model.predict()'s per-call machinery (data adapter, callbacks,
+    progress bar) runs on the request path.
+
+    Args:
+        model: A built Keras model returning (N, 1) sigmoid scores.
+        buckets (tuple): Batch sizes to compile.
+        max_pad_fraction (float): Largest share of padded rows tolerated in a chunk.
+    """
+
+    def __init__(self, model, buckets=BUCKET_SIZES, max_pad_fraction=MAX_PAD_FRACTION):
+        self.buckets = tuple(sorted(buckets))
+        self.max_pad_fraction = max_pad_fraction
+        self.input_shape = tuple(model.input_shape[1:])
+
+        forward = tf.function(lambda x: model(x, training=False))
+        self._functions = {
+            size: forward.get_concrete_function(tf.TensorSpec((size,) + self.input_shape, tf.float32))
+            for size in self.buckets
+        }
+
+    def bucket_for(self, n: int) -> int:
+        for size in self.buckets:
+            if n <= size:
+                return size
+        return self.buckets[-1]
+
+    def plan(self, n: int):
+        """Split n rows into (rows, bucket) chunks, padding only when it is cheap."""
+        chunks = []
+        while n > 0:
+            size = self.bucket_for(n)
+            if n >= size or (size - n) <= self.max_pad_fraction * size:
+                rows = min(n, size)
+            else:
+                rows = max(b for b in self.buckets if b <= n)
+                size = rows
+            chunks.append((rows, size))
+            n -= rows
+        return chunks
+
+    def warm_up(self):
+        for size, fn in self._functions.items():
+            fn(tf.zeros((size,) + self.input_shape, tf.float32))
+
+    def predict(self, batch) -> np.ndarray:
+        """Return one score per row of an (N, H, W, 3) batch."""
+        batch = np.asarray(batch, dtype=np.float32)
+        scores = np.empty(len(batch), dtype=np.float32)
+
+        start = 0
+        for count, size in self.plan(len(batch)):
+            chunk = batch[start:start + count]
+            if count < size:
+                padded = np.zeros((size,) + self.input_shape, dtype=np.float32)
+                padded[:count] = chunk
+                chunk = padded
+            out = self._functions[size](tf.constant(chunk)).numpy()
+            scores[start:start + count] = out[:count, 0]
+            start += count
+        return scores
+
+
+class TFLitePredictor:
+    """
+    Runs a TFLite model (float, dynamic-range or full INT8) with the same
+    predict() interface as CompiledPredictor.
+
+    The interpreter is not thread-safe, so calls are serialized; the input
+    tensor is only resized when the incoming batch size changes.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(self._input["shape"][1:])
+        self._batch_size = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+
+    def warm_up(self):
+        self.predict(np.zeros((1,) + self.input_shape, dtype=np.float32))
+
+    def _quantize(self, batch):
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return batch
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, out):
+        if self._output["dtype"] == np.float32:
+            return out
+        scale, zero_point = self._output["quantization"]
+        return (out.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch) -> np.ndarray:
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input["index"], (len(batch),) + self.input_shape)
+                self.interpreter.allocate_tensors()
+                self._input = self.interpreter.get_input_details()[0]
+                self._output = self.interpreter.get_output_details()[0]
+                self._batch_size = len(batch)
+            self.interpreter.set_tensor(self._input["index"], self._quantize(batch))
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self._output["index"])
+        return self._dequantize(out)[:, 0]
+
+
+class OnnxPredictor:
+    """Runs an exported ONNX model on ONNX Runtime's CPU provider."""
+
+    def __init__(self, model_path):
+        try:
+            import onnxruntime as ort  # type: ignore
+        except ImportError:
+            raise ImportError("The onnx backend requires onnxruntime: pip install onnxruntime")
+        self.session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self._input_name = inp.name
+        self.input_shape = tuple(inp.shape[1:])
+
+    def warm_up(self):
+        self.predict(np.zeros((1,) + self.input_shape, dtype=np.float32))
+
+    def predict(self, batch) -> np.ndarray:
+        batch = np.asarray(batch, dtype=np.float32)
+        return self.session.run(None, {self._input_name: batch})[0][:, 0]
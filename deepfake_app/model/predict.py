@@ -1,26 +1,249 @@
 # model/predict.py - Image inference logic
+import cv2
 import numpy as np
-from tensorflow.keras.models import load_model # type: ignore
-from tensorflow.keras.preprocessing import image # type: ignore
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from model.batcher import MicroBatcher
+from model.cascade import get_cascade_predictor
+from model.registry import get_predictor, IMAGE_SIZE
+from model.workers import get_worker_pool
+from utils.preprocess import decode_image, decode_image_bytes, normalize_image
+from utils.faces import get_face_detector
+from utils.phash import phash
+from utils.tiling import DEFAULT_SCALES, MAX_PATCHES, iter_tiles, score_heatmap
+from utils.tta import build_views, aggregate
 
-MODEL_PATH = "saved_model/deepfake_cnn.h5"
-IMAGE_SIZE = (128, 128)
+# Micro-batching: concurrent predict_image calls share one forward pass
+BATCH_MAX_SIZE = int(os.environ.get("DEEPFAKE_BATCH_MAX_SIZE", 64))
+BATCH_MAX_WAIT_MS = float(os.environ.get("DEEPFAKE_BATCH_MAX_WAIT_MS", 5.0))
+DECODE_WORKERS = int(os.environ.get("DEEPFAKE_DECODE_WORKERS", min(8, os.cpu_count() or 1)))
 
-model = load_model(MODEL_PATH)
+_batchers = {}
 
-def predict_image(img_path: str, threshold: float = 0.5):
+def predict_batch(batch: np.ndarray, backend: str = None) -> np.ndarray:
+    """
+    Run one forward pass over an (N, 128, 128, 3) batch and return N scores,
+    in a worker process when the worker pool is configured.
+    """
+    pool = get_worker_pool() if backend is None else None
+    if pool is not None:
+        return pool.predict(batch)
+    return get_predictor(backend=backend).predict(batch)
+
+def get_batcher(backend: str = None, cascade: bool = False) -> MicroBatcher:
+    """
+    Shared micro-batcher for `backend`; with `cascade`, batches go through
+    the screening model first (see model.cascade.CascadePredictor).
+    """
+    key = (backend, "cascade") if cascade else backend
+    batcher = _batchers.get(key)
+    if batcher is None:
+        pool = get_worker_pool() if backend is None else None
+        predict_fn = get_cascade_predictor(backend).predict if cascade else lambda batch: predict_batch(batch, backend)
+        batcher = _batchers.setdefault(key, MicroBatcher(
+            predict_fn,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+            # Keep every worker process busy with its own batch
+            num_workers=pool.num_workers if pool is not None else 1,
+        ))
+    return batcher
+
+def load_image_array(img_path: str) -> np.ndarray:
+    with open(img_path, "rb") as f:
+        return decode_image_bytes(f.read(), IMAGE_SIZE)
+
+def predict_image(img_path: str, threshold: float = 0.5, backend: str = None, tta: bool = False, tta_agg: str = "mean",
+                  faces: bool = False, face_agg: str = "max", tiles: bool = False, tile_agg: str = "mean",
+                  max_patches: int = MAX_PATCHES, cascade: bool = False):
+    """Classify an image file; same preprocessing and options as predict_image_bytes."""
     if not os.path.exists(img_path):
         raise FileNotFoundError(f"Image path does not exist: {img_path}")
 
-    img = image.load_img(img_path, target_size=IMAGE_SIZE)
-    img_array = image.img_to_array(img) / 255.0
-    img_array = np.expand_dims(img_array, axis=0)
+    with open(img_path, "rb") as f:
+        data = f.read()
+    return predict_image_bytes(data, threshold, backend, tta=tta, tta_agg=tta_agg, faces=faces, face_agg=face_agg,
+                               tiles=tiles, tile_agg=tile_agg, max_patches=max_patches, cascade=cascade)
+
+def predict_image_bytes(data: bytes, threshold: float = 0.5, backend: str = None, near_duplicates=None,
+                        tta: bool = False, tta_agg: str = "mean", faces: bool = False, face_agg: str = "max",
+                        tiles: bool = False, tile_agg: str = "mean", max_patches: int = MAX_PATCHES,
+                        cascade: bool = False):
+    """
+    Classify an encoded image held in memory (e.g. an upload buffer).
 
-    prediction = model.predict(img_array)[0][0]
+    If a HammingIndex is passed as `near_duplicates`, the image's perceptual
+    hash is looked up first and a close enough match returns the earlier
+    score without running the model. With `tta`, all augmented views are
+    scored in one forward pass and combined with `tta_agg`. With `faces`,
+    the detected faces are scored instead of the whole image (see
+    classify_faces). With `tiles`, overlapping full-resolution patches are
+    scored instead (see classify_tiles). With `cascade`, the screening model
+    scores the image first and only uncertain ones reach the full model.
+    """
+    img = decode_image(data)
+    if faces:
+        return classify_faces(img, threshold, backend, face_agg)
+    if tiles:
+        return classify_tiles(img, threshold, backend, tile_agg, max_patches=max_patches)
+    if tta:
+        return classify_views(img, threshold, backend, tta_agg)
+    if near_duplicates is None:
+        return classify_array(normalize_image(img, IMAGE_SIZE), threshold, backend, cascade)
+
+    img_hash = phash(img)
+    match = near_duplicates.lookup(img_hash)
+    if match is not None:
+        confidence, distance = match
+        return {
+            "label": "Fake" if confidence >= threshold else "Real",
+            "confidence": confidence,
+            "near_duplicate": True,
+            "hamming_distance": distance,
+        }
+
+    result = classify_array(normalize_image(img, IMAGE_SIZE), threshold, backend, cascade)
+    near_duplicates.add(img_hash, result["confidence"])
+    return result
+
+def classify_array(img_array: np.ndarray, threshold: float = 0.5, backend: str = None, cascade: bool = False):
+    prediction = get_batcher(backend, cascade).submit(img_array)
     label = "Fake" if prediction >= threshold else "Real"
 
     return {
         "label": label,
         "confidence": float(prediction)
-    }
\ No newline at end of file
+    }
+
+def classify_views(img: np.ndarray, threshold: float = 0.5, backend: str = None, tta_agg: str = "mean"):
+    """Score every TTA view of a decoded BGR image as one batch and aggregate."""
+    views = build_views(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), IMAGE_SIZE)
+    scores = predict_batch(views, backend)
+    prediction = float(aggregate(scores, tta_agg))
+    label = "Fake" if prediction >= threshold else "Real"
+
+    return {
+        "label": label,
+        "confidence": prediction,
+        "tta": {"views": len(scores), "aggregation": tta_agg, "view_scores": scores.tolist()}
+    }
+
+def classify_faces(img: np.ndarray, threshold: float = 0.5, backend: str = None, face_agg: str = "max"):
+    """
+    Detect the faces of a decoded BGR image, score all aligned face crops in
+    one batch and combine them with `face_agg` ("max" by default: one fake
+    face makes the image fake). Images without a detectable face are scored
+    whole. Detection and classification times are reported separately.
+    """
+    detector = get_face_detector()
+    start = time.perf_counter()
+    found = detector.detect(img)
+    detection_ms = (time.perf_counter() - start) * 1000.0
+
+    start = time.perf_counter()
+    if found:
+        batch = detector.crops(img, found, IMAGE_SIZE)
+        inputs = np.stack([normalize_image(crop, IMAGE_SIZE) for crop in batch])
+    else:
+        inputs = normalize_image(img, IMAGE_SIZE)[None]
+    scores = np.asarray(predict_batch(inputs, backend)).reshape(-1)
+    classification_ms = (time.perf_counter() - start) * 1000.0
+
+    prediction = float(aggregate(scores, face_agg))
+    return {
+        "label": "Fake" if prediction >= threshold else "Real",
+        "confidence": prediction,
+        "faces": [
+            {"box": list(box), "label": "Fake" if score >= threshold else "Real", "confidence": float(score)}
+            for (box, _), score in zip(found, scores)
+        ],
+        "face_aggregation": face_agg if found else "whole_image",
+        "timing": {"detection_ms": detection_ms, "classification_ms": classification_ms},
+    }
+
+def classify_tiles(img: np.ndarray, threshold: float = 0.5, backend: str = None, tile_agg: str = "mean",
+                   scales=DEFAULT_SCALES, max_patches: int = MAX_PATCHES, batch_size: int = 64):
+    """
+    Score a decoded BGR image by overlapping model-sized patches cut at each
+    of `scales` instead of one downscaled copy, which keeps the
+    high-frequency detail of large photos. At most `max_patches` patches are
+    scored (the stride grows to fit), in forward passes of `batch_size`.
+
+    Returns the patch scores combined with `tile_agg` and a coarse heatmap
+    of the mean score of the patches covering each cell.
+    """
+    rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    tiles = list(iter_tiles(rgb, IMAGE_SIZE[0], scales, max_patches=max_patches))
+    patches = np.concatenate([p for _, p, _ in tiles])
+    boxes = np.concatenate([b for _, _, b in tiles])
+
+    scores = np.empty(len(patches), dtype=np.float32)
+    buffer = np.empty((min(batch_size, len(patches)),) + patches.shape[1:], dtype=np.float32)
+    for start in range(0, len(patches), batch_size):
+        n = min(batch_size, len(patches) - start)
+        np.multiply(patches[start:start + n], 1 / 255.0, out=buffer[:n])
+        scores[start:start + n] = np.asarray(predict_batch(buffer[:n], backend)).reshape(-1)
+
+    prediction = float(aggregate(scores, tile_agg))
+    heatmap = score_heatmap(boxes, scores, img.shape)
+    return {
+        "label": "Fake" if prediction >= threshold else "Real",
+        "confidence": prediction,
+        "tiles": {
+            "patches": len(scores),
+            "scales": [round(float(scale), 4) for scale, _, _ in tiles],
+            "aggregation": tile_agg,
+            "peak_score": float(scores.max()),
+            "heatmap": np.round(heatmap, 4).tolist(),
+        },
+    }
+
+def predict_image_array(img_array: np.ndarray, threshold: float = 0.5, backend: str = None):
+    """Classify an already preprocessed (H, W, 3) or (1, H, W, 3) array; returns (label, confidence)."""
+    if img_array.ndim == 4:
+        img_array = img_array[0]
+    prediction = get_batcher(backend).submit(img_array)
+    label = "Fake" if prediction >= threshold else "Real"
+    return label, prediction
+
+def predict_images(items, threshold: float = 0.5, batch_size: int = 64, backend: str = None):
+    """
+    Classify many images, given as file paths or encoded bytes, in order.
+
+    Images are decoded in parallel straight into one contiguous float32
+    array and scored with one forward pass per `batch_size` slice. Items that
+    cannot be read get an {"error": ...} entry instead of failing the call.
+    """
+    items = list(items)
+    batch = np.empty((len(items),) + IMAGE_SIZE + (3,), dtype=np.float32)
+    errors = {}
+
+    def decode_into(i):
+        try:
+            data = items[i]
+            if isinstance(data, str):
+                with open(data, "rb") as f:
+                    data = f.read()
+            batch[i] = decode_image_bytes(data, IMAGE_SIZE)
+        except Exception as e:
+            errors[i] = str(e)
+
+    with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as pool:
+        list(pool.map(decode_into, range(len(items))))
+
+    valid = np.array([i for i in range(len(items)) if i not in errors], dtype=np.int64)
+    scores = np.empty(len(items), dtype=np.float32)
+    for start in range(0, len(valid), batch_size):
+        idx = valid[start:start + batch_size]
+        # Contiguous slice (no copy) unless some items failed to decode
+        scores[idx] = predict_batch(batch[idx] if len(errors) else batch[idx[0]:idx[-1] + 1], backend)
+
+    results = []
+    for i in range(len(items)):
+        if i in errors:
+            results.append({"error": errors[i]})
+        else:
+            label = "Fake" if scores[i] >= threshold else "Real"
+            results.append({"label": label, "confidence": float(scores[i])})
+    return results
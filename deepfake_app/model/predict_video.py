@@ -2,48 +2,504 @@
 import cv2
 import numpy as np
 import os
-from tensorflow.keras.models import load_model # type: ignore
-from tensorflow.keras.preprocessing.image import img_to_array # type: ignore
+import hashlib
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
 
-MODEL_PATH = "saved_model/deepfake_cnn.h5"
-IMAGE_SIZE = (128, 128)
+from model.checkpoint import CHECKPOINT_EVERY, get_checkpoint_store, file_digest
+from model.early_stop import SequentialVerdict
+from model.predict import predict_batch
+from model.registry import IMAGE_SIZE
+from model.scheduler import FrameScheduler
+from model.workers import MAX_SEGMENT_WORKERS, segment_pool
+from utils.faces import get_face_detector
+from utils.face_tracking import FaceTracker
+from utils.frame_diff import FrameChangeDetector
+from utils.streaming_stats import StreamingStats
+from utils.timeline import TimelineRecorder, TIMELINE_DTYPE, encode_timeline, suspect_segments
+from utils.tta import build_views, aggregate, DEFAULT_VIEWS
+from utils.video_io import iter_frames, video_info, segment_ranges
 
-model = load_model(MODEL_PATH)
+FRAME_BATCH_SIZE = 32
+# Rows per forward pass of the scheduler shared by concurrent videos
+SCHEDULER_MAX_BATCH_SIZE = int(os.environ.get("DEEPFAKE_VIDEO_BATCH_MAX_SIZE", 64))
+SCHEDULER_MAX_WAIT_MS = float(os.environ.get("DEEPFAKE_VIDEO_BATCH_MAX_WAIT_MS", 5.0))
 
-def predict_video(video_path: str, threshold: float = 0.5, frame_skip: int = 10):
+_schedulers = {}
+
+def get_frame_scheduler(backend: str = None) -> FrameScheduler:
+    scheduler = _schedulers.get(backend)
+    if scheduler is None:
+        scheduler = _schedulers.setdefault(backend, FrameScheduler(
+            # Resolved per batch so a model swap takes effect for running jobs
+            lambda batch: predict_batch(batch, backend),
+            max_batch_size=SCHEDULER_MAX_BATCH_SIZE,
+            max_wait_ms=SCHEDULER_MAX_WAIT_MS,
+        ))
+    return scheduler
+
+def prepare_frame(frame, tta: bool = False) -> np.ndarray:
+    """Turn one BGR frame into its (views, H, W, 3) float32 model input."""
+    if tta:
+        return build_views(frame, IMAGE_SIZE)
+    resized = cv2.resize(frame, IMAGE_SIZE).astype(np.float32)
+    resized /= 255.0
+    return resized[None]
+
+def iter_prepared_scores(prepared, predict_fn, batch_size: int = FRAME_BATCH_SIZE, views: int = 1, tta_agg: str = "mean"):
+    """
+    Score (key, (views, H, W, 3) array) pairs in batches of `batch_size`
+    frames and yield (key, score) in input order.
+
+    Inputs are copied into one preallocated buffer and a final partial batch
+    is flushed at the end of the stream. With several views per frame, the
+    view scores are aggregated per frame with `tta_agg`.
+    """
+    buffer = np.empty((batch_size * views,) + IMAGE_SIZE[::-1] + (3,), dtype=np.float32)
+    keys = []
+
+    def flush():
+        n = len(keys)
+        scores = predict_fn(buffer[:n * views])
+        if views > 1:
+            scores = aggregate(np.asarray(scores).reshape(n, views), tta_agg, axis=1)
+        yield from zip(keys, (float(s) for s in scores))
+        keys.clear()
+
+    for key, array in prepared:
+        n = len(keys)
+        buffer[n * views:(n + 1) * views] = array
+        keys.append(key)
+        if len(keys) == batch_size:
+            yield from flush()
+    if keys:
+        yield from flush()
+
+def iter_frame_scores(frames, predict_fn, batch_size: int = FRAME_BATCH_SIZE, tta: bool = False, tta_agg: str = "mean"):
+    """Score (key, BGR frame) pairs in batches on the calling thread; yields (key, score)."""
+    prepared = ((key, prepare_frame(frame, tta)) for key, frame in frames)
+    views = len(DEFAULT_VIEWS) if tta else 1
+    return iter_prepared_scores(prepared, predict_fn, batch_size, views, tta_agg)
+
+def iter_face_scores(frames, predict_fn, detector, batch_size: int = FRAME_BATCH_SIZE, face_agg: str = "max",
+                     timing: dict = None, tracker=None, tracks: dict = None):
+    """
+    Score (key, BGR frame) pairs by their detected faces; yields (key, score).
+
+    The aligned face crops of consecutive frames share forward passes of up
+    to `batch_size` rows and each frame's face scores are combined with
+    `face_agg`. Frames without a detectable face are scored whole. Detection
+    and classification time and face counts accumulate in `timing`.
+
+    With a `tracker` (utils.face_tracking.FaceTracker) faces are detected
+    only every few frames and followed in between; each face score is then
+    also appended to `tracks[track_id]`, a TimelineRecorder per track, which
+    requires (frame_index, timestamp) keys or the keys of iter_reusing_scores.
+    """
+    timing = timing if timing is not None else {}
+    for name in ("detection_seconds", "classification_seconds", "frames_with_faces", "faces"):
+        timing.setdefault(name, 0)
+    tracks = tracks if tracks is not None else {}
+    capacity = max(batch_size, detector.max_faces)
+    buffer = np.empty((capacity,) + IMAGE_SIZE[::-1] + (3,), dtype=np.float32)
+    pending = []  # (key, rows, track ids) in buffer order
+    used = 0
+
+    def flush():
+        start = time.perf_counter()
+        scores = np.asarray(predict_fn(buffer[:used])).reshape(-1)
+        timing["classification_seconds"] += time.perf_counter() - start
+        offset = 0
+        for key, rows, track_ids in pending:
+            for track_id, score in zip(track_ids, scores[offset:offset + rows]):
+                if track_id not in tracks:
+                    tracks[track_id] = TimelineRecorder()
+                for frame_index, timestamp in _frame_keys(key):
+                    tracks[track_id].append(frame_index, timestamp, score)
+            yield key, float(aggregate(scores[offset:offset + rows], face_agg))
+            offset += rows
+        pending.clear()
+
+    for key, frame in frames:
+        start = time.perf_counter()
+        if tracker is not None:
+            tracked = tracker.update(frame)
+            track_ids, found = [t for t, _ in tracked], [face for _, face in tracked]
+        else:
+            track_ids, found = [], detector.detect(frame)
+        rows = detector.crops(frame, found, IMAGE_SIZE) if found else cv2.resize(frame, IMAGE_SIZE)[None]
+        timing["detection_seconds"] += time.perf_counter() - start
+        if found:
+            timing["frames_with_faces"] += 1
+            timing["faces"] += len(found)
+
+        if used + len(rows) > capacity:
+            yield from flush()
+            used = 0
+        buffer[used:used + len(rows)] = rows
+        buffer[used:used + len(rows)] /= 255.0
+        pending.append((key, len(rows), track_ids))
+        used += len(rows)
+    if pending:
+        yield from flush()
+
+def iter_reusing_scores(frames, score_frames, detector):
+    """
+    Score only frames that `detector` sees as changed and give every skipped
+    frame the score of the last scored frame before it.
+
+    `score_frames` maps an iterable of (key, frame) to (key, score) pairs,
+    e.g. a partial of iter_frame_scores or VideoPipeline.run; yields
+    (key, score) for every input frame in order.
+    """
+    def changed():
+        followers = None
+        for key, frame in frames:
+            # The first frame always counts as changed, so followers is set before any skip
+            if not detector.changed(frame):
+                followers.append(key)
+                continue
+            followers = []
+            yield (key, followers), frame
+
+    # A scored frame is emitted only once the next one arrives, when its
+    # list of skipped followers is complete
+    scores = score_frames(changed())
+    pending = None
+    try:
+        for entry in scores:
+            if pending is not None:
+                yield from _expand(pending)
+            pending = entry
+        if pending is not None:
+            yield from _expand(pending)
+    finally:
+        scores.close()
+
+def _frame_keys(key):
+    """
+    The (frame_index, timestamp) keys a score covers: `key` itself, or for a
+    key of iter_reusing_scores, its frame followed by the skipped frames
+    that reuse its score. Followers are complete by the time the frame's
+    score is flushed, since a flush only follows the arrival of a later frame.
+    """
+    if isinstance(key[1], list):
+        frame_key, followers = key
+        return [frame_key, *followers]
+    return [key]
+
+def _expand(entry):
+    (key, followers), score = entry
+    yield key, score
+    for follower in followers:
+        yield follower, score
+
+def predict_video(video_path: str, threshold: float = 0.5, frame_skip: int = 10, backend: str = None,
+                  tta: bool = False, tta_agg: str = "mean", batch_size: int = FRAME_BATCH_SIZE,
+                  strategy: str = "grab", sample_fps: float = None, pipeline: bool = False,
+                  preprocess_workers: int = 2, queue_size: int = 64, adaptive: bool = False,
+                  confidence: float = 0.99, min_frames: int = 16, max_frames: int = None,
+                  segments: int = None, timeline: bool = False, smoothing_window: int = 5,
+                  min_gap_seconds: float = 1.0, change_threshold: float = None, shared_batching: bool = False,
+                  decoder: str = "opencv", checkpoint: bool = False, checkpoint_every: int = CHECKPOINT_EVERY,
+                  digest: str = None, faces: bool = False, face_agg: str = "max", track_faces: bool = False,
+                  detect_every: int = 10):
+    """
+    Classify a video from its sampled frames.
+
+    Scores are folded into a constant-memory StreamingStats; besides the
+    mean ("confidence") the result carries robust statistics under "stats"
+    (median, quantiles, IQR, histogram) and the most suspicious frames under
+    "top_frames".
+
+    `strategy` picks how frames are sampled (see utils.video_io.iter_frames):
+    "grab" (default) or "read" keep every `frame_skip`-th frame, "seek" jumps
+    straight to each sample, "keyframe" decodes keyframes only. `sample_fps`
+    samples by time instead of by frame count. `decoder="ffmpeg"` has an
+    ffmpeg subprocess sample and downscale the frames to the model input size
+    instead of decoding them at full resolution with OpenCV.
+
+    Frame batches go through model.predict.predict_batch, so they run in the
+    inference worker processes when the worker pool is configured, like
+    image requests.
+
+    With `pipeline=True` decoding, preprocessing and inference run as
+    overlapped stages (see model.video_pipeline) and the result carries
+    per-stage utilization under "pipeline".
+
+    With `adaptive=True` the running mean is tested after every batch (see
+    model.early_stop.SequentialVerdict) and scoring stops as soon as the
+    verdict is settled at `confidence`. `max_frames` caps the frames scored
+    in either mode. The result's "stopping_reason" is "confident",
+    "max_frames" or "end_of_video".
+
+    With `segments=N` (at most model.workers.MAX_SEGMENT_WORKERS) the video
+    is split into N frame ranges that are decoded and scored in parallel by
+    the shared segment worker pool (see model.workers.segment_pool); the
+    per-frame scores are merged back in frame order. Sharding needs the
+    OpenCV decoder with a frame-range strategy ("read", "grab" or "seek").
+
+    With `timeline=True` the result also carries the run-length encoded
+    per-frame scores under "timeline" and the smoothed, merged stretches
+    scoring above `threshold` under "suspect_segments" (see utils.timeline).
+
+    With `change_threshold` set, sampled frames that barely differ from the
+    last scored frame (see utils.frame_diff.FrameChangeDetector) reuse its
+    score instead of going through the model; "frame_skipping" reports how
+    many were skipped.
+
+    With `shared_batching=True` frame batches go through the scheduler shared
+    by all concurrent videos (see get_frame_scheduler), which packs frames of
+    different videos into full forward passes.
+
+    With `checkpoint=True` progress is saved every `checkpoint_every` frames
+    (see model.checkpoint.CheckpointStore), keyed by the file's SHA-256
+    (`digest`, computed if not given) and the verdict-affecting parameters.
+    Re-running the same file resumes after the last saved frame or reuses
+    finished segments, and a finished run is returned straight from the store.
+
+    With `faces=True` each frame is scored by its detected, aligned faces
+    (see iter_face_scores and utils.faces) and "face_stats" reports detection
+    and classification time separately.
+
+    With `track_faces=True` as well, full detection runs only every
+    `detect_every` frames, on a scene change or when a face is lost, and the
+    faces are followed in between (see utils.face_tracking.FaceTracker).
+    "face_tracks" then carries a run-length encoded score timeline per
+    tracked face and "face_stats" the detector call rate.
+    """
     if not os.path.exists(video_path):
         raise FileNotFoundError(f"Video file not found: {video_path}")
+    if segments is not None and not 1 <= segments <= MAX_SEGMENT_WORKERS:
+        raise ValueError(f"segments must be between 1 and {MAX_SEGMENT_WORKERS}, got {segments}")
+    sharded = bool(segments and segments > 1)
+    if sharded and (adaptive or max_frames is not None or pipeline or faces):
+        raise ValueError("segments cannot be combined with adaptive, max_frames, pipeline or faces")
+    if sharded and (decoder != "opencv" or strategy == "keyframe"):
+        raise ValueError("segments requires the opencv decoder and the read, grab or seek strategy")
+    if faces and (tta or pipeline):
+        raise ValueError("faces cannot be combined with tta or pipeline")
+    if track_faces and not faces:
+        raise ValueError("track_faces requires faces")
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"Could not open video file: {video_path}")
+    store = checkpoint_key = None
+    state = {}
+    if checkpoint:
+        store = get_checkpoint_store()
+        checkpoint_key = store.make_key(
+            digest or file_digest(video_path), backend=backend, threshold=threshold, frame_skip=frame_skip,
+            strategy=strategy, sample_fps=sample_fps, decoder=decoder, tta=tta, tta_agg=tta_agg,
+            change_threshold=change_threshold, max_frames=max_frames, adaptive=adaptive, confidence=confidence,
+            min_frames=min_frames, timeline=timeline, smoothing_window=smoothing_window,
+            min_gap_seconds=min_gap_seconds, faces=faces, face_agg=face_agg, track_faces=track_faces,
+            detect_every=detect_every,
+        )
+        state = store.load(checkpoint_key) or {}
+        if "result" in state:
+            return {**state["result"], "checkpoint": {"resumed": "complete"}}
 
-    frame_count = 0
-    predictions = []
+    if sharded:
+        result = _predict_video_segments(video_path, threshold, frame_skip, backend, tta, tta_agg, batch_size,
+                                         strategy, sample_fps, segments, timeline, smoothing_window,
+                                         min_gap_seconds, change_threshold, store, checkpoint_key, state)
+        if store is not None:
+            store.save(checkpoint_key, {"result": result})
+        return result
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if frame_count % frame_skip == 0:
-            frame_resized = cv2.resize(frame, IMAGE_SIZE)
-            frame_array = img_to_array(frame_resized) / 255.0
-            frame_array = np.expand_dims(frame_array, axis=0)
+    # Resume after the last checkpointed frame; OpenCV seeks there, ffmpeg and
+    # keyframe decoding skip the frames already scored
+    position = state.get("position", -1)
+    seekable = decoder == "opencv" and strategy != "keyframe"
 
-            pred = model.predict(frame_array)[0][0]
-            predictions.append(pred)
-        frame_count += 1
+    job = get_frame_scheduler(backend).open_job() if shared_batching else None
+    predict_fn = job.predict if job is not None else partial(predict_batch, backend=backend)
+    # TTA and face crops need the full-resolution frame
+    output_size = IMAGE_SIZE if decoder == "ffmpeg" and not (tta or faces) else None
+    frames = (((frame_index, timestamp), frame)
+              for frame_index, timestamp, frame in iter_frames(video_path, strategy, frame_skip, sample_fps,
+                                                               start_frame=position + 1 if seekable else 0,
+                                                               decoder=decoder, output_size=output_size)
+              if frame_index > position)
+    stats = state.get("stats") or StreamingStats(threshold)
+    recorder = state.get("timeline") or (TimelineRecorder() if timeline else None)
+    frames = islice(frames, None if max_frames is None else max(max_frames - stats.count, 0))
+    stages = None
+    face_timing = {}
+    tracks = state.get("tracks") or {}
+    tracker = None
+    if track_faces:
+        # A resumed run continues the track ids, but its faces start new tracks
+        tracker = FaceTracker(get_face_detector(), detect_every, first_id=max(tracks, default=-1) + 1)
+    if faces:
+        score_frames = partial(iter_face_scores, predict_fn=predict_fn, detector=get_face_detector(),
+                               batch_size=batch_size, face_agg=face_agg, timing=face_timing,
+                               tracker=tracker, tracks=tracks)
+    elif pipeline:
+        from model.video_pipeline import VideoPipeline
+        stages = VideoPipeline(predict_fn, batch_size, preprocess_workers, queue_size, tta, tta_agg)
+        score_frames = stages.run
+    else:
+        score_frames = partial(iter_frame_scores, predict_fn=predict_fn, batch_size=batch_size,
+                               tta=tta, tta_agg=tta_agg)
+    detector = FrameChangeDetector(change_threshold) if change_threshold else None
+    scores = iter_reusing_scores(frames, score_frames, detector) if detector else score_frames(frames)
 
-    cap.release()
+    stopping_reason = "end_of_video"
+    verdict = SequentialVerdict(threshold, confidence, min_frames) if adaptive else None
+    since_checkpoint = 0
+    try:
+        for (frame_index, timestamp), score in scores:
+            stats.add(score, (frame_index, timestamp))
+            if recorder is not None:
+                recorder.append(frame_index, timestamp, score)
+            since_checkpoint += 1
+            if store is not None and since_checkpoint >= checkpoint_every:
+                store.save(checkpoint_key, {"position": frame_index, "stats": stats, "timeline": recorder,
+                                            "tracks": tracks})
+                since_checkpoint = 0
+            if verdict is not None and stats.count % batch_size == 0 and verdict.decided(stats):
+                stopping_reason = "confident"
+                break
+    finally:
+        # Stops the decoder (and pipeline threads) when the verdict settles early
+        scores.close()
+        if job is not None:
+            job.close()
+    if stopping_reason == "end_of_video" and max_frames is not None and stats.count >= max_frames:
+        stopping_reason = "max_frames"
 
-    if not predictions:
+    if not stats.count:
         raise ValueError("No frames were processed. Check frame_skip or video content.")
 
-    avg_confidence = float(np.mean(predictions))
+    avg_confidence = stats.mean
     label = "Fake" if avg_confidence >= threshold else "Real"
 
-    return {
+    result = {
         "label": label,
         "confidence": avg_confidence,
-        "frames_evaluated": len(predictions)
+        "frames_evaluated": stats.count,
+        "stopping_reason": stopping_reason,
+        **_summary_fields(stats),
+    }
+    if recorder is not None:
+        result.update(_timeline_fields(recorder.array(), threshold, smoothing_window, min_gap_seconds))
+    if detector is not None:
+        result["frame_skipping"] = _skipping_fields(detector.stats())
+    if stages is not None:
+        result["pipeline"] = stages.stats()
+    if faces:
+        result["face_stats"] = face_timing
+    if tracker is not None:
+        result["face_stats"] = {**face_timing, "tracking": tracker.stats()}
+        result["face_tracks"] = _track_fields(tracks, threshold)
+    if store is not None:
+        store.save(checkpoint_key, {"result": result})
+        if position >= 0:
+            result = {**result, "checkpoint": {"resumed": "partial", "resumed_after_frame": position}}
+    return result
+
+def _skipping_fields(skipping):
+    # Inference work saved; decoding still covers every sampled frame
+    skipping["inference_reduction_x"] = skipping["frames_checked"] / max(skipping["frames_scored"], 1)
+    return skipping
+
+def _summary_fields(stats):
+    return {
+        "stats": stats.summary(),
+        "top_frames": [{"frame_index": int(i), "timestamp": round(float(t), 3), "score": score}
+                       for (i, t), score in stats.top()],
     }
+
+def _timeline_fields(frames, threshold, smoothing_window, min_gap_seconds):
+    return {
+        "timeline": encode_timeline(frames),
+        "suspect_segments": suspect_segments(frames, threshold, smoothing_window, min_gap_seconds),
+    }
+
+def _track_fields(tracks, threshold):
+    fields = []
+    for track_id, recorder in sorted(tracks.items()):
+        frames = recorder.array()
+        mean_score = float(frames["score"].mean())
+        fields.append({
+            "track_id": track_id,
+            "label": "Fake" if mean_score >= threshold else "Real",
+            "mean_score": mean_score,
+            "peak_score": float(frames["score"].max()),
+            "frames": int(len(frames)),
+            "start_time": round(float(frames["timestamp"][0]), 3),
+            "end_time": round(float(frames["timestamp"][-1]), 3),
+            "timeline": encode_timeline(frames),
+        })
+    return fields
+
+def _predict_video_segments(video_path, threshold, frame_skip, backend, tta, tta_agg, batch_size,
+                            strategy, sample_fps, segments, timeline, smoothing_window, min_gap_seconds,
+                            change_threshold, store, checkpoint_key, state):
+    ranges = segment_ranges(video_info(video_path)["frame_count"], segments)
+    done = dict(state.get("segments", {}))
+    reused = sum(r in done for r in ranges)
+
+    def on_result(frame_range, entry):
+        done[frame_range] = entry
+        if store is not None:
+            store.save(checkpoint_key, {"segments": done})
+
+    missing = [r for r in ranges if r not in done]
+    if missing:
+        with segment_pool(segments, backend) as pool:
+            pool.score_segments(video_path, missing, strategy, frame_skip, sample_fps, batch_size, tta, tta_agg,
+                                change_threshold, on_result)
+    scored = [pair for r in ranges for pair in done[r][0]]
+    skipping = None
+    if change_threshold:
+        skipping = {}
+        for r in ranges:
+            for name, value in done[r][1].items():
+                skipping[name] = skipping.get(name, 0) + value
+        skipping["skip_fraction"] = skipping["frames_skipped"] / skipping["frames_checked"] if skipping["frames_checked"] else 0.0
+    if not scored:
+        raise ValueError("No frames were processed. Check frame_skip or video content.")
+
+    stats = StreamingStats(threshold)
+    for key, score in scored:
+        stats.add(score, key)
+    result = {
+        "label": "Fake" if stats.mean >= threshold else "Real",
+        "confidence": stats.mean,
+        "frames_evaluated": stats.count,
+        "stopping_reason": "end_of_video",
+        "segments": len(ranges),
+        **_summary_fields(stats),
+    }
+    if reused:
+        result["checkpoint"] = {"resumed": "partial", "segments_reused": reused}
+    if skipping is not None:
+        result["frame_skipping"] = _skipping_fields(skipping)
+    if timeline:
+        frames = np.array([(i, t, score) for (i, t), score in scored], dtype=TIMELINE_DTYPE)
+        result.update(_timeline_fields(frames, threshold, smoothing_window, min_gap_seconds))
+    return result
+
+@contextmanager
+def spooled_upload(stream, suffix: str = ".mp4", chunk_size: int = 1 << 20):
+    """
+    Spool a file-like object to a private temporary file, hashing it on the way.
+
+    OpenCV can only demux from a path, so each call gets its own file that is
+    removed on exit; concurrent calls never share an input file.
+    Yields (path, sha256 hex digest).
+    """
+    sha = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            sha.update(chunk)
+            tmp.write(chunk)
+        tmp_path = tmp.name
+    try:
+        yield tmp_path, sha.hexdigest()
+    finally:
+        os.remove(tmp_path)
@@ -0,0 +1,148 @@
+# model/registry.py - Shared model registry with lazy, load-once semantics
+import os
+import threading
+from collections import Counter
+
+MODEL_PATHS = {
+    "default": "saved_model/deepfake_cnn.h5",
+    # First stage of the cascade (model/cascade.py), trained at SCREENING_SIZE
+    "screening": os.environ.get("DEEPFAKE_SCREENING_MODEL", "saved_model/screening_cnn.h5"),
+}
+DEFAULT_VERSION = os.environ.get("DEEPFAKE_MODEL_VERSION", "default")
+IMAGE_SIZE = (128, 128)
+SCREENING_SIZE = (64, 64)
+
+# Inference backends; TFLite/ONNX artifacts are produced by model/export.py
+BACKENDS = ("keras", "tflite-float", "tflite-dynamic", "tflite-int8", "onnx")
+DEFAULT_BACKEND = os.environ.get("DEEPFAKE_BACKEND", "keras")
+
+_models = {}
+_predictors = {}
+_lock = threading.RLock()
+_swap_listeners = []
+load_counts = Counter()
+
+
+def _load(path):
+    # Deferred so importing the API does not pull in TensorFlow or read weights
+    from tensorflow.keras.models import load_model  # type: ignore
+    return load_model(path)
+
+
+def register_model(version: str, path: str):
+    """
+    Make a model file available under a version name.
+
+    Re-registering a version that is already in use swaps it: cached instances
+    are dropped and every listener added with on_model_swap() is notified.
+    """
+    with _lock:
+        swapped = version in _models or MODEL_PATHS.get(version, path) != path
+        MODEL_PATHS[version] = path
+        _models.pop(version, None)
+        for key in [k for k in _predictors if k[0] == version]:
+            del _predictors[key]
+    if swapped:
+        print(f"[INFO] Model '{version}' swapped to {path}")
+        for callback in list(_swap_listeners):
+            callback(version)
+
+
+def on_model_swap(callback):
+    """Call `callback(version)` whenever a registered model is replaced."""
+    _swap_listeners.append(callback)
+
+
+def model_fingerprint(version: str = None, backend: str = None) -> str:
+    """Identify the exact weights serving `version` on `backend` (path, size, mtime)."""
+    version = version or DEFAULT_VERSION
+    backend = backend or DEFAULT_BACKEND
+    path = MODEL_PATHS.get(version, "") if backend == "keras" else backend_path(backend, version)
+    try:
+        st = os.stat(path)
+        return f"{version}/{backend}/{st.st_size}/{st.st_mtime_ns}"
+    except OSError:
+        return f"{version}/{backend}/missing"
+
+
+def get_model(version: str = None):
+    """
+    Return the shared model instance for `version`, loading it on first use.
+
+    Every caller (image, video, webcam, folder scans) receives the same object,
+    so the weights are held in memory once per version.
+    """
+    version = version or DEFAULT_VERSION
+    model = _models.get(version)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(version)
+        if model is None:
+            if version not in MODEL_PATHS:
+                raise ValueError(f"Unknown model version: {version}")
+            path = MODEL_PATHS[version]
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Model file not found: {path}")
+            print(f"[INFO] Loading model '{version}' from {path}")
+            model = _load(path)
+            _models[version] = model
+            load_counts[version] += 1
+    return model
+
+
+def backend_path(backend: str, version: str = None) -> str:
+    """Artifact path for an exported backend, next to the Keras model file."""
+    version = version or DEFAULT_VERSION
+    base, _ = os.path.splitext(MODEL_PATHS[version])
+    if backend == "onnx":
+        return base + ".onnx"
+    if backend.startswith("tflite-"):
+        return f"{base}_{backend.split('-', 1)[1]}.tflite"
+    raise ValueError(f"Backend '{backend}' has no exported artifact")
+
+
+def get_predictor(version: str = None, backend: str = None):
+    """
+    Return the shared predictor for `version` on `backend`.
+
+    All predictors expose predict(batch) -> scores and warm_up().
+    """
+    version = version or DEFAULT_VERSION
+    backend = backend or DEFAULT_BACKEND
+    key = (version, backend)
+    predictor = _predictors.get(key)
+    if predictor is not None:
+        return predictor
+
+    with _lock:
+        predictor = _predictors.get(key)
+        if predictor is None:
+            from model import inference
+            if backend == "keras":
+                predictor = inference.CompiledPredictor(get_model(version))
+            elif backend not in BACKENDS:
+                raise ValueError(f"Unknown backend: {backend}")
+            else:
+                path = backend_path(backend, version)
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"{backend} model not found at {path}; run model/export.py first")
+                print(f"[INFO] Loading {backend} model from {path}")
+                if backend == "onnx":
+                    predictor = inference.OnnxPredictor(path)
+                else:
+                    predictor = inference.TFLitePredictor(path)
+            _predictors[key] = predictor
+    return predictor
+
+
+def is_loaded(version: str = None) -> bool:
+    return (version or DEFAULT_VERSION) in _models
+
+
+def warm_up(versions=None, backend=None):
+    """Eagerly load the given versions and run a dummy batch through the backend."""
+    for version in versions or [DEFAULT_VERSION]:
+        get_predictor(version, backend).warm_up()
+        print(f"[INFO] Model '{version}' warmed up.")
@@ -0,0 +1,194 @@
+# model/scheduler.py - Shared cross-video frame batching with round-robin fairness
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+
+import numpy as np
+
+
+class _Submission:
+    def __init__(self, batch):
+        self.batch = batch
+        self.scores = np.empty(len(batch), dtype=np.float32)
+        self.taken = 0
+        self.remaining = len(batch)
+        self.error = None
+        self.done = threading.Event()
+
+
+class FrameJob:
+    """One video's handle on a FrameScheduler; `predict` is a drop-in predict_fn."""
+
+    def __init__(self, scheduler, job_id):
+        self._scheduler = scheduler
+        self.job_id = job_id
+
+    def predict(self, batch) -> np.ndarray:
+        return self._scheduler._submit(self.job_id, np.asarray(batch, dtype=np.float32))
+
+    def close(self):
+        self._scheduler._close_job(self.job_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FrameScheduler:
+    """
+    One inference queue shared by every video being analysed.
+
+    Each video opens a job and submits its frame batches through it. A
+    dispatch thread fills model batches of `max_batch_size` rows by taking
+    rows from the active jobs in round-robin order, so frames of different
+    videos share forward passes and a long video with a deep backlog only
+    gets its fair share of every batch. Rows from one submission may be
+    spread over several forward passes; the caller blocks until all of them
+    are scored.
+
+    Args:
+        predict_fn (callable): Takes an (N, H, W, 3) array and returns N scores.
+        max_batch_size (int): Rows per forward pass.
+        max_wait_ms (float): How long a partial batch may wait for more rows.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._jobs = OrderedDict()
+        self._cond = threading.Condition()
+        self._next_id = 0
+        self._thread = None
+        self._buffer = None
+
+        self._batches = 0
+        self._items = 0
+        self._batch_sizes = Counter()
+        self._jobs_per_batch = 0
+        self._busy_seconds = 0.0
+
+    def open_job(self) -> FrameJob:
+        with self._cond:
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = deque()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="frame-scheduler", daemon=True)
+                self._thread.start()
+        return FrameJob(self, job_id)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active_jobs": len(self._jobs),
+                "queued_rows": self._queued(),
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+                "avg_jobs_per_batch": self._jobs_per_batch / self._batches if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "busy_seconds": self._busy_seconds,
+            }
+
+    def _submit(self, job_id, batch):
+        submission = _Submission(batch)
+        if not len(batch):
+            return submission.scores
+        with self._cond:
+            if job_id not in self._jobs:
+                raise RuntimeError(f"Job {job_id} is closed")
+            self._jobs[job_id].append(submission)
+            self._cond.notify_all()
+        submission.done.wait()
+        if submission.error is not None:
+            raise submission.error
+        return submission.scores
+
+    def _close_job(self, job_id):
+        with self._cond:
+            self._jobs.pop(job_id, None)
+
+    def _queued(self):
+        return sum(len(s.batch) - s.taken for q in self._jobs.values() for s in q)
+
+    def _take(self):
+        """
+        Pick up to max_batch_size rows round-robin across jobs; caller holds
+        the lock. Jobs served in this batch move to the back of the order, so
+        the next batch starts with the jobs that were left out.
+        """
+        picks = []
+        size = 0
+        active = [(job_id, q) for job_id, q in self._jobs.items() if q]
+        while size < self.max_batch_size and active:
+            # Split the free space evenly; jobs with less pending leave room for the rest
+            quantum = max(1, (self.max_batch_size - size) // len(active))
+            still_active = []
+            for job_id, q in active:
+                submission = q[0]
+                n = min(quantum, len(submission.batch) - submission.taken, self.max_batch_size - size)
+                if n <= 0:
+                    break
+                picks.append((job_id, submission, submission.taken, n))
+                submission.taken += n
+                size += n
+                if submission.taken == len(submission.batch):
+                    q.popleft()
+                if q:
+                    still_active.append((job_id, q))
+            active = still_active
+        for job_id in dict.fromkeys(job_id for job_id, _, _, _ in picks):
+            self._jobs.move_to_end(job_id)
+        return picks, size
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queued():
+                    self._cond.wait()
+                # Give other jobs a moment to top up a partial batch
+                deadline = time.perf_counter() + self.max_wait
+                while self._queued() < self.max_batch_size:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                picks, size = self._take()
+
+            first = picks[0][1].batch
+            if self._buffer is None or self._buffer.shape[1:] != first.shape[1:]:
+                self._buffer = np.empty((self.max_batch_size,) + first.shape[1:], dtype=np.float32)
+            offset = 0
+            for _, submission, start, n in picks:
+                self._buffer[offset:offset + n] = submission.batch[start:start + n]
+                offset += n
+
+            started = time.perf_counter()
+            try:
+                scores = np.asarray(self.predict_fn(self._buffer[:size])).reshape(size, -1)[:, 0]
+                error = None
+            except Exception as e:
+                scores, error = None, e
+            elapsed = time.perf_counter() - started
+
+            offset = 0
+            for _, submission, start, n in picks:
+                if error is not None:
+                    submission.error = error
+                else:
+                    submission.scores[start:start + n] = scores[offset:offset + n]
+                offset += n
+                submission.remaining -= n
+                if submission.remaining == 0 or error is not None:
+                    submission.done.set()
+
+            with self._cond:
+                self._batches += 1
+                self._items += size
+                self._batch_sizes[size] += 1
+                self._jobs_per_batch += len({job_id for job_id, _, _, _ in picks})
+                self._busy_seconds += elapsed
@@ -1,19 +1,9 @@
 # utils/dataset_loader.py
 
-import kagglehub # type: ignore
 import zipfile
 import shutil
 import os
-from keras.models import load_model # type: ignore
-
-MODEL_PATH = "saved_model/deepfake_cnn.h5"
-
-# Load model safely
-if os.path.exists(MODEL_PATH):
-    model = load_model(MODEL_PATH)
-else:
-    model = None
-    print(f"[WARN] Model file not found at {MODEL_PATH}. Prediction endpoints will be inactive.")
+from model.registry import DEFAULT_VERSION, IMAGE_SIZE, MODEL_PATHS, get_model, register_model
 
 def find_subfolder_containing(target_folder_name, base_folder="unzipped_data"):
     for root, dirs, _ in os.walk(base_folder):
@@ -22,6 +12,8 @@ def find_subfolder_containing(target_folder_name, base_folder="unzipped_data"):
     raise FileNotFoundError(f"Folder '{target_folder_name}' not found in {base_folder}")
 
 def download_and_prepare():
+    import kagglehub  # type: ignore
+
     print("[INFO] Downloading dataset from Kaggle...")
 
     # Step 1: Download the dataset
@@ -55,11 +47,75 @@ def download_and_prepare():
 
     print("[INFO] Dataset setup complete.")
 
+def split_training_samples(samples, validation_fraction=0.1, num_calibration=200, num_holdout=500,
+                           num_screening_holdout=500):
+    """
+    Training and validation subsets of the shuffled samples for the full
+    model, leaving out the held-out sets the benchmarks evaluate on: the
+    backend holdout of model.export.split_calibration_holdout and the
+    screening holdout of model.cascade.split_screening_samples. The sizes
+    must match the ones passed to the benchmarks.
+    """
+    from model.cascade import split_screening_samples
+    from model.export import split_calibration_holdout
+
+    _, backend_holdout = split_calibration_holdout(samples, num_calibration, num_holdout)
+    _, _, screening_holdout = split_screening_samples(samples, num_holdout=num_screening_holdout)
+    excluded = {path for path, _ in backend_holdout + screening_holdout}
+    remaining = [sample for sample in samples if sample[0] not in excluded]
+    num_val = max(1, int(len(remaining) * validation_fraction))
+    return remaining[num_val:], remaining[:num_val]
+
+def train_model(data_dir="data", log_dir="logs/tensorboard", epochs=20, batch_size=32, validation_fraction=0.1,
+                learning_rate=0.00005, num_calibration=200, num_holdout=500, num_screening_holdout=500):
+    """
+    Train the full CNN on data_dir/real and data_dir/fake at IMAGE_SIZE,
+    keeping the benchmark holdouts out (see split_training_samples).
+
+    Checkpoints are written next to the served model and only moved over it
+    once training ends, so the served weights never change mid-training.
+    The new file is then swapped in through the registry, which also
+    invalidates cached predictions.
+    """
+    from model.cascade import _load_dataset
+    from model.cnn_model import build_cnn_model, get_advanced_callbacks
+    from model.export import list_labeled_images
+
+    output_path = MODEL_PATHS[DEFAULT_VERSION]
+    samples = list_labeled_images(data_dir)
+    if not samples:
+        raise ValueError(f"No images found under {data_dir}/real or {data_dir}/fake")
+    train_set, val_set = split_training_samples(samples, validation_fraction, num_calibration, num_holdout,
+                                                num_screening_holdout)
+    if not train_set:
+        raise ValueError(f"Too few images under {data_dir} to train once the benchmark holdouts are set aside")
+    print(f"[INFO] Training model on {len(train_set)} images, validating on {len(val_set)}")
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    base, ext = os.path.splitext(output_path)
+    training_path = f"{base}.training{ext}"
+    model = build_cnn_model(IMAGE_SIZE[::-1] + (3,), learning_rate)
+    try:
+        model.fit(
+            _load_dataset(train_set, IMAGE_SIZE[::-1], batch_size, shuffle=True),
+            validation_data=_load_dataset(val_set, IMAGE_SIZE[::-1], batch_size),
+            epochs=epochs,
+            callbacks=get_advanced_callbacks(save_path=training_path, log_dir=log_dir),
+        )
+        os.replace(training_path, output_path)
+    finally:
+        if os.path.exists(training_path):
+            os.remove(training_path)
+    register_model(DEFAULT_VERSION, output_path)
+    print(f"[INFO] Model saved to {output_path}")
+    return output_path
+
 # Optional: run from CLI or FastAPI backend
 if __name__ == "__main__":
     download_and_prepare()
     # Ensure the model is loaded for CLI usage
-    if model is None:
-        print("[ERROR] Model not loaded. Please check the model path.")
-    else:
-        print("[INFO] Model loaded successfully.")  
\ No newline at end of file
+    try:
+        get_model()
+        print("[INFO] Model loaded successfully.")
+    except FileNotFoundError as e:
+        print(f"[ERROR] Model not loaded: {e}")  
\ No newline at end of file
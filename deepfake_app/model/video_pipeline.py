@@ -0,0 +1,153 @@
+# model/video_pipeline.py - Overlapped decode / preprocess / inference stages for video analysis
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from model.predict_video import prepare_frame, iter_prepared_scores, FRAME_BATCH_SIZE
+from utils.tta import DEFAULT_VIEWS
+
+_DONE = object()
+
+
+class _Failed:
+    def __init__(self, error):
+        self.error = error
+
+
+class VideoPipeline:
+    """
+    Producer/consumer pipeline for scoring video frames.
+
+    A decoder thread pulls frames and hands them to a preprocessing thread
+    pool; the inference stage (the caller's thread) takes the prepared frames
+    in order and scores them in batches. The queue between the decoder and
+    the inference stage is bounded, so a slow stage blocks its producer
+    instead of letting decoded frames pile up in memory.
+
+    Args:
+        predict_fn (callable): Batch -> scores, e.g. a predictor's predict.
+        batch_size (int): Frames per forward pass.
+        preprocess_workers (int): Threads resizing/normalizing frames.
+        queue_size (int): Frames allowed in flight between decoder and inference.
+        tta (bool): Score all test-time augmentation views of every frame.
+        tta_agg (str): Aggregation rule for the TTA views.
+    """
+
+    def __init__(self, predict_fn, batch_size=FRAME_BATCH_SIZE, preprocess_workers=2, queue_size=64,
+                 tta=False, tta_agg="mean"):
+        self.predict_fn = predict_fn
+        self.batch_size = batch_size
+        self.preprocess_workers = preprocess_workers
+        self.queue_size = queue_size
+        self.tta = tta
+        self.tta_agg = tta_agg
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._busy = {"decode": 0.0, "preprocess": 0.0, "inference": 0.0}
+        self._waits = {"decode_blocked": 0.0, "inference_starved": 0.0}
+        self._frames = 0
+        self._start = None
+        self._end = None
+
+    def _add(self, table, key, seconds):
+        with self._lock:
+            table[key] += seconds
+
+    def _prepare(self, frame):
+        start = time.perf_counter()
+        array = prepare_frame(frame, self.tta)
+        self._add(self._busy, "preprocess", time.perf_counter() - start)
+        return array
+
+    def _predict(self, batch):
+        start = time.perf_counter()
+        scores = self.predict_fn(batch)
+        self._add(self._busy, "inference", time.perf_counter() - start)
+        return scores
+
+    def _decode(self, frames, pool, out, stop):
+        try:
+            iterator = iter(frames)
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    key, frame = next(iterator)
+                except StopIteration:
+                    break
+                self._add(self._busy, "decode", time.perf_counter() - start)
+
+                item = (key, pool.submit(self._prepare, frame))
+                start = time.perf_counter()
+                while not stop.is_set():
+                    try:
+                        out.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                self._add(self._waits, "decode_blocked", time.perf_counter() - start)
+        except Exception as e:
+            out.put(_Failed(e))
+        finally:
+            out.put(_DONE)
+
+    def _prepared(self, out):
+        while True:
+            start = time.perf_counter()
+            item = out.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failed):
+                raise item.error
+            key, future = item
+            array = future.result()
+            self._add(self._waits, "inference_starved", time.perf_counter() - start)
+            with self._lock:
+                self._frames += 1
+            yield key, array
+
+    def run(self, frames):
+        """Score (key, BGR frame) pairs; yields (key, score) in input order."""
+        self._reset_stats()
+        self._start = time.perf_counter()
+        out = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.preprocess_workers)
+        decoder = threading.Thread(target=self._decode, args=(frames, pool, out, stop), daemon=True)
+        decoder.start()
+
+        views = len(DEFAULT_VIEWS) if self.tta else 1
+        try:
+            yield from iter_prepared_scores(self._prepared(out), self._predict, self.batch_size, views, self.tta_agg)
+        finally:
+            stop.set()
+            # Unblock the decoder if the consumer stopped early
+            while decoder.is_alive():
+                try:
+                    out.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            pool.shutdown(wait=True, cancel_futures=True)
+            self._end = time.perf_counter()
+
+    def stats(self) -> dict:
+        """Per-stage busy time and utilization; the busiest stage is the bottleneck."""
+        with self._lock:
+            if self._start is None:
+                return {}
+            wall = (self._end or time.perf_counter()) - self._start
+            utilization = {
+                "decode": self._busy["decode"] / wall if wall else 0.0,
+                "preprocess": self._busy["preprocess"] / (wall * self.preprocess_workers) if wall else 0.0,
+                "inference": self._busy["inference"] / wall if wall else 0.0,
+            }
+            return {
+                "frames": self._frames,
+                "wall_seconds": wall,
+                "busy_seconds": dict(self._busy),
+                "wait_seconds": dict(self._waits),
+                "utilization": utilization,
+                "bottleneck": max(utilization, key=utilization.get),
+            }
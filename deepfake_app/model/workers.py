@@ -0,0 +1,296 @@
+# model/workers.py - Process-pool inference workers with explicit TF/OpenCV thread topology
+import argparse
+import json
+import multiprocessing as mp
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+import numpy as np
+
+from model.registry import MODEL_PATHS, DEFAULT_VERSION, DEFAULT_BACKEND, IMAGE_SIZE, on_model_swap
+
+WORKER_CONFIG_PATH = os.environ.get("DEEPFAKE_WORKER_CONFIG", "worker_config.json")
+# Upper bound on processes of the segment pool; each one holds its own model
+MAX_SEGMENT_WORKERS = int(os.environ.get("DEEPFAKE_MAX_SEGMENT_WORKERS", os.cpu_count() or 1))
+
+_worker_predictor = None
+
+
+def _init_worker(model_path, version, backend, intra_op_threads, inter_op_threads, cv2_threads):
+    """Runs once in each worker process before any TensorFlow op executes."""
+    global _worker_predictor
+    os.environ["OMP_NUM_THREADS"] = str(intra_op_threads)
+
+    import cv2
+    import tensorflow as tf  # type: ignore
+    from model import registry
+
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    cv2.setNumThreads(cv2_threads)
+
+    registry.register_model(version, model_path)
+    _worker_predictor = registry.get_predictor(version, backend)
+    _worker_predictor.warm_up()
+
+
+def _worker_predict(batch):
+    return _worker_predictor.predict(batch)
+
+
+def _worker_score_segment(video_path, start_frame, end_frame, strategy, frame_skip, sample_fps, batch_size, tta, tta_agg,
+                          change_threshold):
+    from functools import partial
+    from model.predict_video import iter_frame_scores, iter_reusing_scores
+    from utils.frame_diff import FrameChangeDetector
+    from utils.video_io import iter_frames
+
+    frames = (((i, t), f) for i, t, f in iter_frames(video_path, strategy, frame_skip, sample_fps, start_frame, end_frame))
+    score_frames = partial(iter_frame_scores, predict_fn=_worker_predictor.predict, batch_size=batch_size,
+                           tta=tta, tta_agg=tta_agg)
+    if not change_threshold:
+        return list(score_frames(frames)), None
+    detector = FrameChangeDetector(change_threshold)
+    return list(iter_reusing_scores(frames, score_frames, detector)), detector.stats()
+
+
+def _worker_ready(hold_seconds):
+    # Holding the worker briefly makes the executor hand sibling tasks to other workers
+    time.sleep(hold_seconds)
+    return os.getpid()
+
+
+class InferenceWorkerPool:
+    """
+    N worker processes, each with its own model instance and its own
+    intra-op / inter-op / OpenCV thread counts, fed from the API process
+    through the executor's request queue.
+
+    Args:
+        num_workers (int): Number of worker processes.
+        intra_op_threads (int): TensorFlow intra-op threads per worker.
+        inter_op_threads (int): TensorFlow inter-op threads per worker.
+        cv2_threads (int): OpenCV threads per worker.
+        version (str): Model version served by the pool.
+        backend (str): Inference backend used inside the workers.
+    """
+
+    def __init__(self, num_workers=2, intra_op_threads=1, inter_op_threads=1, cv2_threads=1,
+                 version=None, backend=None):
+        self.num_workers = num_workers
+        self.backend = backend or DEFAULT_BACKEND
+        self.config = {
+            "num_workers": num_workers,
+            "intra_op_threads": intra_op_threads,
+            "inter_op_threads": inter_op_threads,
+            "cv2_threads": cv2_threads,
+        }
+        version = self.version = version or DEFAULT_VERSION
+        # TensorFlow is not fork-safe, so workers are always spawned
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(MODEL_PATHS[version], version, self.backend,
+                      intra_op_threads, inter_op_threads, cv2_threads),
+        )
+
+    def wait_ready(self, timeout=600):
+        """Block until every worker has loaded and warmed its model; returns their pids."""
+        pids = set()
+        deadline = time.monotonic() + timeout
+        while len(pids) < self.num_workers and time.monotonic() < deadline:
+            futures = [self._executor.submit(_worker_ready, 0.05) for _ in range(self.num_workers)]
+            pids.update(f.result() for f in futures)
+        return sorted(pids)
+
+    def predict(self, batch) -> np.ndarray:
+        return self._executor.submit(_worker_predict, np.asarray(batch, dtype=np.float32)).result()
+
+    def score_segments(self, video_path, ranges, strategy="grab", frame_skip=10, sample_fps=None,
+                       batch_size=32, tta=False, tta_agg="mean", change_threshold=None, on_result=None):
+        """
+        Decode and score each (start_frame, end_frame) range of a video in its
+        own worker. Returns one (pairs, skipping) entry per range, in order:
+        the ((frame_index, timestamp), score) pairs of the range and its
+        frame-skipping counters (None unless `change_threshold` is set).
+        `on_result(range, entry)` is called as each range finishes.
+        """
+        futures = {
+            self._executor.submit(_worker_score_segment, video_path, start, end, strategy, frame_skip,
+                                  sample_fps, batch_size, tta, tta_agg, change_threshold): i
+            for i, (start, end) in enumerate(ranges)
+        }
+        results = [None] * len(ranges)
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            if on_result is not None:
+                on_result(ranges[i], results[i])
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def load_worker_config():
+    """
+    Worker settings from DEEPFAKE_WORKERS / DEEPFAKE_*_THREADS, else from the
+    autotuned config file; None when the pool is disabled.
+    """
+    if "DEEPFAKE_WORKERS" in os.environ:
+        config = {
+            "num_workers": int(os.environ["DEEPFAKE_WORKERS"]),
+            "intra_op_threads": int(os.environ.get("DEEPFAKE_INTRA_OP_THREADS", 1)),
+            "inter_op_threads": int(os.environ.get("DEEPFAKE_INTER_OP_THREADS", 1)),
+            "cv2_threads": int(os.environ.get("DEEPFAKE_CV2_THREADS", 1)),
+        }
+    elif os.path.exists(WORKER_CONFIG_PATH):
+        with open(WORKER_CONFIG_PATH) as f:
+            config = json.load(f)
+    else:
+        return None
+    return config if config.get("num_workers", 0) > 0 else None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Shared worker pool, started on first use; None if worker mode is not configured."""
+    global _pool
+    if _pool is None:
+        config = load_worker_config()
+        if config is None:
+            return None
+        with _pool_lock:
+            if _pool is None:
+                _pool = InferenceWorkerPool(
+                    num_workers=config["num_workers"],
+                    intra_op_threads=config["intra_op_threads"],
+                    inter_op_threads=config["inter_op_threads"],
+                    cv2_threads=config["cv2_threads"],
+                )
+                print(f"[INFO] Started inference worker pool: {_pool.config}")
+    return _pool
+
+
+_segment_pool = None
+_segment_users = Counter()
+
+
+@contextmanager
+def segment_pool(num_workers, backend=None):
+    """
+    Lease the pool of single-threaded workers used for segment-sharded video
+    analysis; yields an InferenceWorkerPool with at least `num_workers`
+    processes.
+
+    Only one pool is kept alive across videos. It grows to the largest worker
+    count requested (at most MAX_SEGMENT_WORKERS) and is replaced when the
+    backend or the served model changes; a replaced pool shuts down once its
+    last lease ends.
+    """
+    global _segment_pool
+    if not 1 <= num_workers <= MAX_SEGMENT_WORKERS:
+        raise ValueError(f"num_workers must be between 1 and {MAX_SEGMENT_WORKERS}, got {num_workers}")
+    backend = backend or DEFAULT_BACKEND
+    retired = None
+    with _pool_lock:
+        pool = _segment_pool
+        if pool is None or pool.backend != backend or pool.num_workers < num_workers:
+            if pool is not None and not _segment_users[pool]:
+                retired = pool
+            pool = _segment_pool = InferenceWorkerPool(num_workers=num_workers, backend=backend)
+        _segment_users[pool] += 1
+    if retired is not None:
+        retired.close()
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            _segment_users[pool] -= 1
+            idle = not _segment_users[pool]
+            if idle:
+                del _segment_users[pool]
+        if idle and pool is not _segment_pool:
+            pool.close()
+
+
+def _recycle_pools(version):
+    """
+    Model swap listener: retire the pools whose workers loaded `version`, so
+    the next request starts workers on the new file. Requests already queued
+    on a retired pool finish before it shuts down.
+    """
+    global _pool, _segment_pool
+    retired = []
+    with _pool_lock:
+        if _pool is not None and _pool.version == version:
+            retired.append(_pool)
+            _pool = None
+        if _segment_pool is not None and _segment_pool.version == version:
+            if not _segment_users[_segment_pool]:
+                retired.append(_segment_pool)
+            _segment_pool = None
+    for pool in retired:
+        pool.close()
+
+
+on_model_swap(_recycle_pools)
+
+
+def measure_throughput(pool, batches, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        list(clients.map(pool.predict, batches))
+    return sum(len(b) for b in batches) / (time.perf_counter() - start)
+
+
+def autotune(worker_counts, thread_counts, num_batches=64, batch_size=16, output_path=WORKER_CONFIG_PATH):
+    """Sweep worker count x threads per worker on this machine and write the fastest config."""
+    cores = os.cpu_count() or 1
+    rng = np.random.default_rng(0)
+    batches = [rng.random((batch_size,) + IMAGE_SIZE + (3,), dtype=np.float32) for _ in range(num_batches)]
+
+    best = None
+    for workers in worker_counts:
+        for threads in thread_counts:
+            if workers * threads > cores:
+                continue
+            pool = InferenceWorkerPool(num_workers=workers, intra_op_threads=threads, cv2_threads=threads)
+            try:
+                pool.wait_ready()
+                throughput = measure_throughput(pool, batches, concurrency=2 * workers)
+            finally:
+                pool.close()
+            print(f"[TUNE] workers={workers} intra_op_threads={threads}: {throughput:.1f} img/s")
+            if best is None or throughput > best["images_per_second"]:
+                best = {**pool.config, "images_per_second": throughput}
+
+    if best is None:
+        print(f"[ERROR] No combination fits in {cores} cores.")
+        return None
+    with open(output_path, "w") as f:
+        json.dump(best, f, indent=2)
+    print(f"[INFO] Best config written to {output_path}: {best}")
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inference worker pool tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("autotune", help="Sweep worker count x thread count and write the best config")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    p.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--batches", type=int, default=64)
+    p.add_argument("--batch-size", type=int, default=16)
+    p.add_argument("--output", type=str, default=WORKER_CONFIG_PATH)
+    args = parser.parse_args()
+
+    autotune(args.workers, args.threads, num_batches=args.batches, batch_size=args.batch_size, output_path=args.output)
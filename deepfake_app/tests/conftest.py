@@ -0,0 +1,41 @@
+# tests/conftest.py - Shared fixtures: synthetic videos and a model stand-in
+import cv2
+import numpy as np
+import pytest
+
+
+def write_video(path, frames, fps=25):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+@pytest.fixture
+def make_video(tmp_path):
+    """Write frames to tmp_path/name as an MJPG video; returns its path."""
+    return lambda name, frames, fps=25: write_video(tmp_path / name, frames, fps)
+
+
+@pytest.fixture
+def gradient_video(tmp_path):
+    """60 frames of 160x120 whose brightness rises frame by frame."""
+    frames = [np.full((120, 160, 3), 2 * i, dtype=np.uint8) for i in range(60)]
+    return write_video(tmp_path / "gradient.avi", frames)
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Replace the video model with the mean pixel value of each input; returns the list of batch sizes."""
+    from model import predict_video
+
+    calls = []
+
+    def predict_batch(batch, backend=None):
+        calls.append(len(batch))
+        return np.asarray(batch).reshape(len(batch), -1).mean(axis=1)
+
+    monkeypatch.setattr(predict_video, "predict_batch", predict_batch)
+    return calls
@@ -0,0 +1,83 @@
+# tests/test_api.py - API routes import and validate without a trained model
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main
+
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager, so the dataset download on startup is skipped
+    return TestClient(main.app)
+
+
+def test_root(client):
+    assert client.get("/").json() == {"message": "Deepfake Detection API is running."}
+
+
+def test_image_route_uses_in_memory_prediction(client, monkeypatch):
+    calls = []
+
+    def fake_predict(data, **kwargs):
+        calls.append(data)
+        return {"label": "Real", "confidence": 0.1}
+
+    monkeypatch.setattr(main, "predict_image_bytes", fake_predict)
+    response = client.post("/predict/image", files={"file": ("a.png", b"api-test-image-bytes", "image/png")})
+
+    assert response.status_code == 200
+    assert response.json() == {"label": "Real", "confidence": 0.1}
+    assert calls == [b"api-test-image-bytes"]
+
+
+def test_image_route_rejects_empty_patch_budget(client):
+    response = client.post("/predict/image?tiles=true&max_patches=0", files={"file": ("a.png", b"x", "image/png")})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("segments", [0, 10_000])
+def test_video_route_rejects_out_of_range_segments(client, segments):
+    response = client.post(f"/predict/video?segments={segments}", files={"file": ("v.mp4", b"", "video/mp4")})
+    assert response.status_code == 400
+
+
+def test_cascade_stats_do_not_load_the_screening_model(client, monkeypatch):
+    from model import cascade
+
+    monkeypatch.setattr(cascade, "_cascades", {})
+    response = client.get("/stats/cascade")
+    assert response.status_code == 200
+    assert response.json() == {"loaded": False}
+
+
+def test_folder_scan_route_calls_the_scanner(client, monkeypatch):
+    calls = []
+
+    def fake_scan(folder_path):
+        calls.append(folder_path)
+        return {"results": {}, "summary": {"count": 0}}
+
+    monkeypatch.setattr(main, "scan_folder", fake_scan)
+    response = client.get("/scan/folder")
+
+    assert response.status_code == 200
+    assert response.json() == {"message": "Folder scan complete", "result": {"results": {}, "summary": {"count": 0}}}
+    assert calls == ["data"]
+
+
+def test_webcam_scan_route_calls_the_scanner(client, monkeypatch):
+    monkeypatch.setattr(main, "scan_webcam", lambda: {"count": 3, "mean": 0.2})
+    response = client.get("/scan/webcam")
+
+    assert response.status_code == 200
+    assert response.json() == {"message": "Webcam scan complete", "result": {"count": 3, "mean": 0.2}}
+
+
+def test_scan_errors_are_reported(client, monkeypatch):
+    def no_camera():
+        raise RuntimeError("Cannot open webcam")
+
+    monkeypatch.setattr(main, "scan_webcam", no_camera)
+    response = client.get("/scan/webcam")
+    assert response.status_code == 500
+    assert response.json() == {"error": "Cannot open webcam"}
@@ -0,0 +1,133 @@
+# tests/test_batcher.py - Batching, routing, error propagation and stats of MicroBatcher
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from model.batcher import MicroBatcher
+
+
+class StubModel:
+    """Scores each row with its first value and records the size of every batch."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batch_sizes = []
+
+    def __call__(self, batch):
+        self.batch_sizes.append(len(batch))
+        time.sleep(self.delay)
+        return batch[:, 0] * 2
+
+
+@pytest.fixture
+def make_batcher():
+    batchers = []
+
+    def make(predict_fn, **kwargs):
+        batcher = MicroBatcher(predict_fn, **kwargs)
+        batchers.append(batcher)
+        return batcher
+
+    yield make
+    for batcher in batchers:
+        batcher.close()
+
+
+def test_each_request_gets_its_own_score(make_batcher):
+    model = StubModel(delay=0.01)
+    batcher = make_batcher(model, max_batch_size=8, max_wait_ms=20)
+
+    with ThreadPoolExecutor(max_workers=32) as clients:
+        scores = list(clients.map(lambda i: batcher.submit([float(i), -1.0]), range(32)))
+
+    assert scores == [2.0 * i for i in range(32)]
+    assert sum(model.batch_sizes) == 32
+    assert max(model.batch_sizes) > 1 and max(model.batch_sizes) <= 8
+
+
+def test_partial_batch_is_flushed_after_max_wait(make_batcher):
+    model = StubModel()
+    batcher = make_batcher(model, max_batch_size=64, max_wait_ms=30)
+
+    start = time.perf_counter()
+    futures = [batcher.submit_async([float(i)]) for i in range(3)]
+    scores = [f.result(timeout=2) for f in futures]
+    elapsed = time.perf_counter() - start
+
+    assert scores == [0.0, 2.0, 4.0]
+    assert model.batch_sizes == [3]
+    assert 0.025 <= elapsed < 1.0
+
+
+def test_full_batch_does_not_wait(make_batcher):
+    model = StubModel()
+    batcher = make_batcher(model, max_batch_size=4, max_wait_ms=10_000)
+
+    futures = [batcher.submit_async([float(i)]) for i in range(4)]
+    assert [f.result(timeout=2) for f in futures] == [0.0, 2.0, 4.0, 6.0]
+    assert model.batch_sizes == [4]
+
+
+def test_model_errors_reach_every_caller_of_the_batch(make_batcher):
+    calls = []
+
+    def failing(batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("out of memory")
+        return batch[:, 0]
+
+    batcher = make_batcher(failing, max_batch_size=3, max_wait_ms=50)
+    futures = [batcher.submit_async([float(i)]) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="out of memory"):
+            future.result(timeout=2)
+
+    # The dispatch thread survives and serves the next batch
+    assert batcher.submit([5.0], timeout=2) == 5.0
+    assert batcher.stats()["batches"] == 2
+
+
+def test_stats_report_batch_sizes_and_queue_depth(make_batcher):
+    release = threading.Event()
+
+    def blocked(batch):
+        release.wait(timeout=5)
+        return batch[:, 0]
+
+    batcher = make_batcher(blocked, max_batch_size=2, max_wait_ms=50)
+    first = [batcher.submit_async([1.0]), batcher.submit_async([2.0])]
+    deadline = time.monotonic() + 2
+    while batcher.stats()["queue_depth"] and time.monotonic() < deadline:
+        time.sleep(0.005)
+    # The first batch is in the model; these wait in the queue behind it
+    queued = [batcher.submit_async([float(i)]) for i in range(3)]
+    assert batcher.stats()["queue_depth"] == 3
+
+    release.set()
+    for future in first + queued:
+        future.result(timeout=2)
+
+    stats = batcher.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["items"] == 5 and stats["batches"] == 3
+    assert stats["batch_size_histogram"] == {1: 1, 2: 2}
+    assert stats["max_batch_size_seen"] == 2
+    assert stats["avg_batch_size"] == pytest.approx(5 / 3)
+    assert stats["max_batch_size"] == 2 and stats["max_wait_ms"] == 50
+
+
+def test_closed_batcher_rejects_requests(make_batcher):
+    batcher = make_batcher(StubModel())
+    assert batcher.submit(np.ones(2), timeout=2) == 2.0
+    batcher.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit([1.0])
+
+
+def test_max_batch_size_must_be_positive():
+    with pytest.raises(ValueError):
+        MicroBatcher(StubModel(), max_batch_size=0)
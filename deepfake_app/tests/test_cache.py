@@ -0,0 +1,83 @@
+# tests/test_cache.py - Memory LRU and SQLite tiers of the prediction cache
+import pytest
+
+from model import registry
+from model.cache import PredictionCache
+
+
+@pytest.fixture(autouse=True)
+def isolated_listeners(monkeypatch):
+    monkeypatch.setattr(registry, "_swap_listeners", [])
+
+
+def key(cache, name, **params):
+    return cache.make_key(cache.digest(name.encode()), "image", threshold=0.5, **params)
+
+
+def test_parameters_and_content_change_the_key():
+    cache = PredictionCache()
+    assert key(cache, "a") == key(cache, "a")
+    assert key(cache, "a") != key(cache, "b")
+    assert key(cache, "a", tta=True) != key(cache, "a", tta=False)
+
+
+def test_get_or_compute_runs_once_per_key():
+    cache = PredictionCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"label": "Fake", "confidence": 0.9}
+
+    k = key(cache, "a")
+    assert cache.get_or_compute(k, compute) == cache.get_or_compute(k, compute)
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = PredictionCache(max_entries=2)
+    a, b, c = key(cache, "a"), key(cache, "b"), key(cache, "c")
+    cache.put(a, {"v": 1})
+    cache.put(b, {"v": 2})
+    cache.get(a)  # a is now most recent
+    cache.put(c, {"v": 3})
+
+    assert cache.get(b) is None
+    assert cache.get(a) == {"v": 1} and cache.get(c) == {"v": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_memory_tier_is_bounded_by_bytes():
+    cache = PredictionCache(max_bytes=100)
+    for i in range(10):
+        cache.put(key(cache, str(i)), {"payload": "x" * 30})
+    assert cache.stats()["bytes"] <= 100
+
+
+def test_sqlite_tier_survives_restart_and_promotes_hits(tmp_path):
+    db = str(tmp_path / "cache.sqlite")
+    first = PredictionCache(db_path=db)
+    k = key(first, "a")
+    first.put(k, {"label": "Real", "confidence": 0.2})
+
+    second = PredictionCache(db_path=db)
+    assert second.get(k) == {"label": "Real", "confidence": 0.2}
+    assert second.stats()["disk_hits"] == 1
+    second.get(k)
+    assert second.stats()["memory_hits"] == 1
+
+
+def test_model_swap_invalidates_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "MODEL_PATHS", dict(registry.MODEL_PATHS))
+    monkeypatch.setattr(registry, "_models", {})
+    cache = PredictionCache(db_path=str(tmp_path / "cache.sqlite"))
+    k = key(cache, "a")
+    cache.put(k, {"v": 1})
+
+    weights = tmp_path / "new.h5"
+    weights.write_bytes(b"new weights")
+    registry.register_model(registry.DEFAULT_VERSION, str(weights))
+
+    assert cache.get(k) is None
+    assert cache.stats()["invalidations"] == 1
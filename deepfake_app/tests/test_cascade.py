@@ -0,0 +1,48 @@
+# tests/test_cascade.py - Screening cascade routing and its held-out split
+import numpy as np
+import pytest
+
+from model import cascade
+from model.cascade import CascadePredictor, split_screening_samples
+
+
+class ConstantScreening:
+    def __init__(self, scores):
+        self.scores = np.asarray(scores, dtype=np.float32)
+
+    def predict(self, batch):
+        return self.scores[:len(batch)]
+
+    def warm_up(self):
+        pass
+
+
+def test_only_uncertain_rows_reach_the_full_model():
+    seen = []
+
+    def full(batch):
+        seen.append(len(batch))
+        return np.full(len(batch), 0.99, dtype=np.float32)
+
+    predictor = CascadePredictor(full, screening=ConstantScreening([0.05, 0.5, 0.95, 0.3]), low=0.2, high=0.8)
+    scores, escalated = predictor.predict_detailed(np.zeros((4, 128, 128, 3), dtype=np.float32))
+
+    assert escalated.tolist() == [False, True, False, True]
+    np.testing.assert_allclose(scores, [0.05, 0.99, 0.95, 0.99])
+    assert seen == [2]
+    assert predictor.stats()["escalation_rate"] == pytest.approx(0.5)
+
+
+def test_holdout_is_disjoint_from_training_and_validation():
+    samples = [(f"img{i}.png", i % 2) for i in range(1000)]
+    train, val, holdout = split_screening_samples(samples, validation_fraction=0.1, num_holdout=200)
+
+    assert len(holdout) == 200 and len(val) == 80 and len(train) == 720
+    assert not {p for p, _ in holdout} & {p for p, _ in train + val}
+    assert sorted(train + val + holdout) == sorted(samples)
+
+
+def test_stats_lookup_does_not_build_the_cascade(monkeypatch):
+    monkeypatch.setattr(cascade, "_cascades", {})
+    assert cascade.get_cascade_predictor(create=False) is None
+    assert cascade._cascades == {}
@@ -0,0 +1,96 @@
+# tests/test_checkpoint.py - Checkpoint persistence, cleanup and resume of video analysis
+import os
+import time
+
+import pytest
+
+from model import checkpoint
+from model.checkpoint import CheckpointStore
+from model.predict_video import predict_video
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    monkeypatch.setattr(checkpoint, "_store", store)
+    return store
+
+
+def checkpoint_files(store):
+    return sorted(name for name in os.listdir(store.directory) if name.endswith(".ckpt"))
+
+
+def test_save_load_round_trip(store):
+    store.save("job", {"position": 41, "stats": [1, 2, 3]})
+    assert store.load("job") == {"position": 41, "stats": [1, 2, 3]}
+    assert store.load("other") is None
+
+
+@pytest.mark.parametrize("payload", [
+    b"",                                  # truncated write
+    b"not a pickle",
+    b"cno_such_module_xyz\nState\n(tR.",  # class moved to another module
+    b"cos\nno_such_attribute\n(tR.",      # class removed from its module
+])
+def test_unreadable_checkpoint_is_discarded(store, payload):
+    with open(store._path("job"), "wb") as f:
+        f.write(payload)
+    assert store.load("job") is None
+    assert checkpoint_files(store) == []
+
+
+def test_prune_removes_expired_checkpoints(store):
+    store.save("old", {"position": 1})
+    store.save("new", {"position": 2})
+    stale = time.time() - store.max_age_seconds - 60
+    os.utime(store._path("old"), (stale, stale))
+
+    assert store.prune() == 1
+    assert checkpoint_files(store) == ["new.ckpt"]
+
+
+def test_prune_keeps_directory_under_max_bytes(store):
+    for i, key in enumerate(["a", "b", "c"]):
+        store.save(key, {"payload": b"x" * 1000})
+        os.utime(store._path(key), (1e9 + i, time.time() - 10 + i))
+    store.max_bytes = 2500
+
+    assert store.prune(keep="a") == 1
+    assert checkpoint_files(store) == ["a.ckpt", "c.ckpt"]
+
+
+def test_repeated_run_is_served_from_its_checkpoint(store, gradient_video, fake_model):
+    result = predict_video(gradient_video, frame_skip=5, checkpoint=True, checkpoint_every=2)
+    assert result["frames_evaluated"] == 12
+    assert len(checkpoint_files(store)) == 1
+
+    batches = len(fake_model)
+    repeated = predict_video(gradient_video, frame_skip=5, checkpoint=True, checkpoint_every=2)
+    assert len(fake_model) == batches
+    assert repeated == {**result, "checkpoint": {"resumed": "complete"}}
+
+
+def test_interrupted_run_resumes_after_last_checkpoint(store, gradient_video, fake_model, monkeypatch):
+    full = predict_video(gradient_video, frame_skip=5)
+
+    from model import predict_video as module
+    scored = fake_model.copy()
+    real_predict = module.predict_batch
+
+    def crash_after_two_batches(batch, backend=None):
+        if len(fake_model) - len(scored) >= 2:
+            raise RuntimeError("worker died")
+        return real_predict(batch, backend)
+
+    monkeypatch.setattr(module, "predict_batch", crash_after_two_batches)
+    with pytest.raises(RuntimeError):
+        predict_video(gradient_video, frame_skip=5, batch_size=4, checkpoint=True, checkpoint_every=4)
+    assert len(checkpoint_files(store)) == 1
+
+    monkeypatch.setattr(module, "predict_batch", real_predict)
+    resumed = predict_video(gradient_video, frame_skip=5, batch_size=4, checkpoint=True, checkpoint_every=4)
+
+    assert resumed["checkpoint"]["resumed"] == "partial"
+    assert resumed["frames_evaluated"] == full["frames_evaluated"]
+    assert resumed["confidence"] == pytest.approx(full["confidence"])
+    assert len(checkpoint_files(store)) == 1
@@ -0,0 +1,92 @@
+# tests/test_face_tracking.py - Detect-then-track scheduling and track id stability
+import numpy as np
+import pytest
+
+from utils.face_tracking import FaceTracker
+
+FACE_BOX = (60, 40, 64, 64)
+
+
+class PatchDetector:
+    """Finds a 'face' wherever FACE_BOX holds texture; flat regions have none."""
+
+    max_faces = 8
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        x, y, w, h = FACE_BOX
+        return [(FACE_BOX, None)] if frame[y:y + h, x:x + w].std() > 10 else []
+
+    def crops(self, frame, faces, target_size=(128, 128)):
+        return np.zeros((len(faces), target_size[1], target_size[0], 3), dtype=np.uint8)
+
+
+def scene(face=True):
+    frame = np.full((240, 320, 3), 128, dtype=np.uint8)
+    if face:
+        x, y, w, h = FACE_BOX
+        frame[y:y + h, x:x + w] = np.random.default_rng(7).integers(0, 256, (h, w, 3), dtype=np.uint8)
+    return frame
+
+
+def test_faceless_frames_follow_the_detection_schedule():
+    detector = PatchDetector()
+    tracker = FaceTracker(detector, detect_every=10)
+    for _ in range(100):
+        assert tracker.update(scene(face=False)) == []
+    assert detector.calls == 10
+    assert tracker.stats()["detection_rate"] == pytest.approx(0.1)
+
+
+def test_static_face_is_tracked_without_detection():
+    detector = PatchDetector()
+    tracker = FaceTracker(detector, detect_every=10)
+    ids = [track_id for _ in range(30) for track_id, _ in tracker.update(scene())]
+    assert ids == [0] * 30
+    assert detector.calls == 3
+
+
+def test_track_id_survives_one_frame_occlusion():
+    detector = PatchDetector()
+    tracker = FaceTracker(detector, detect_every=5)
+    frames = [scene()] * 12 + [scene(face=False)] + [scene()] * 12
+
+    ids = set()
+    for frame in frames:
+        ids.update(track_id for track_id, _ in tracker.update(frame))
+
+    assert ids == {0}
+    stats = tracker.stats()
+    assert stats["tracks_started"] == 1
+    assert stats["tracks_recovered"] >= 1
+
+
+def test_track_ends_after_max_misses():
+    tracker = FaceTracker(PatchDetector(), detect_every=1, max_misses=1)
+    tracker.update(scene())
+    for _ in range(3):
+        tracker.update(scene(face=False))
+    assert [track_id for track_id, _ in tracker.update(scene())] == [1]
+    assert tracker.stats()["tracks_ended"] == 1
+
+
+def test_tracked_faces_with_frame_skipping(monkeypatch, gradient_video, fake_model):
+    from model import predict_video as module
+
+    class EveryFrameDetector(PatchDetector):
+        def detect(self, frame):
+            self.calls += 1
+            return [(FACE_BOX, None)]
+
+    monkeypatch.setattr(module, "get_face_detector", lambda: EveryFrameDetector())
+    result = module.predict_video(gradient_video, frame_skip=5, faces=True, track_faces=True, detect_every=3,
+                                  change_threshold=0.1, timeline=True)
+
+    assert result["frame_skipping"]["frames_skipped"] > 0
+    frames = result["frames_evaluated"]
+    covered = sum(track["frames"] for track in result["face_tracks"])
+    # Skipped frames reuse the score of the last scored frame, for every track too
+    assert covered == frames
@@ -0,0 +1,27 @@
+# tests/test_faces.py - Face detector backend selection and cropping
+import numpy as np
+import pytest
+
+from utils import faces
+from utils.faces import FaceDetector
+
+
+def test_haar_fallback_without_yunet_model(tmp_path):
+    detector = FaceDetector(model_path=str(tmp_path / "missing.onnx"))
+    assert detector.method == "haar"
+    assert detector.detect(np.zeros((120, 160, 3), dtype=np.uint8)) == []
+
+
+def test_missing_haar_api_fails_with_clear_error(tmp_path, monkeypatch):
+    monkeypatch.delattr(faces.cv2, "CascadeClassifier")
+    with pytest.raises(RuntimeError, match="opencv-python<5"):
+        FaceDetector(model_path=str(tmp_path / "missing.onnx"))
+
+
+def test_crops_are_model_sized_batches():
+    detector = FaceDetector(model_path="missing.onnx")
+    img = np.random.default_rng(0).integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    found = [((100, 60, 80, 80), None), ((10, 10, 40, 50), ((20.0, 25.0), (40.0, 30.0)))]
+    batch = detector.crops(img, found, (128, 128))
+    assert batch.shape == (2, 128, 128, 3)
+    assert batch.dtype == np.uint8
@@ -0,0 +1,68 @@
+# tests/test_phash.py - Perceptual hashes and the banded Hamming-distance index
+import numpy as np
+import pytest
+
+from utils.phash import HammingIndex, phash, popcount
+
+
+def brute_force(hashes, query, max_distance):
+    distances = [bin(int(h) ^ query).count("1") for h in hashes]
+    best = int(np.argmin(distances))
+    return (best, distances[best]) if distances[best] <= max_distance else None
+
+
+def flip_bits(h, count, rng):
+    for bit in rng.choice(64, size=count, replace=False):
+        h ^= 1 << int(bit)
+    return h
+
+
+@pytest.mark.parametrize("merge_threshold", [1, 64, 10_000])
+def test_lookup_matches_brute_force(merge_threshold):
+    # merge_threshold 10_000 keeps everything in the pending buffer, 1 merges every add
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 2 ** 63, size=2000, dtype=np.int64).astype(np.uint64) * np.uint64(2)
+    index = HammingIndex(max_distance=6, merge_threshold=merge_threshold)
+    index.add_many(hashes, list(range(len(hashes))))
+
+    for _ in range(200):
+        target = int(hashes[rng.integers(len(hashes))])
+        query = flip_bits(target, int(rng.integers(0, 10)), rng)
+        expected = brute_force(hashes, query, 6)
+        found = index.lookup(query)
+        if expected is None:
+            assert found is None
+        else:
+            assert found is not None and found[1] == expected[1]
+            assert bin(int(hashes[found[0]]) ^ query).count("1") == expected[1]
+
+
+def test_every_entry_within_max_distance_is_found():
+    rng = np.random.default_rng(1)
+    index = HammingIndex(max_distance=6, num_bands=4, merge_threshold=8)
+    base = int(rng.integers(0, 2 ** 62))
+    index.add(base, "original")
+    for _ in range(20):
+        index.add(int(rng.integers(0, 2 ** 62)) | (1 << 63), "noise")
+    for distance in range(7):
+        assert index.lookup(flip_bits(base, distance, rng)) == ("original", distance)
+
+
+def test_clear_empties_the_index():
+    index = HammingIndex()
+    index.add(12345, 0.9)
+    assert index.lookup(12345) == (0.9, 0)
+    index.clear()
+    assert len(index) == 0 and index.lookup(12345) is None
+
+
+def test_phash_is_stable_under_resize_and_distinct_across_images():
+    import cv2
+
+    rng = np.random.default_rng(2)
+    img = cv2.GaussianBlur(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8), (15, 15), 0)
+    other = cv2.GaussianBlur(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8), (15, 15), 0)
+
+    h = phash(img)
+    assert int(popcount(np.array([h ^ phash(cv2.resize(img, (200, 200)))], dtype=np.uint64))[0]) <= 4
+    assert int(popcount(np.array([h ^ phash(other)], dtype=np.uint64))[0]) > 10
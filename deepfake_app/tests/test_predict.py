@@ -0,0 +1,98 @@
+# tests/test_predict.py - Image entry points share one preprocessing path and one micro-batcher
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from model import predict
+from model.registry import IMAGE_SIZE
+
+
+class RecordingBatcher:
+    def __init__(self):
+        self.inputs = []
+
+    def submit(self, img_array):
+        self.inputs.append(img_array)
+        return float(img_array.mean())
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    recorder = RecordingBatcher()
+    monkeypatch.setattr(predict, "get_batcher", lambda backend=None, cascade=False: recorder)
+    return recorder
+
+
+@pytest.fixture
+def image_bytes():
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (300, 420, 3), dtype=np.uint8)
+    ok, encoded = cv2.imencode(".png", img)
+    assert ok
+    return encoded.tobytes()
+
+
+def test_path_and_bytes_entry_points_score_identical_inputs(batcher, image_bytes, tmp_path):
+    path = tmp_path / "sample.png"
+    path.write_bytes(image_bytes)
+
+    from_path = predict.predict_image(str(path))
+    from_bytes = predict.predict_image_bytes(image_bytes)
+
+    assert from_path == from_bytes
+    first, second = batcher.inputs
+    assert first.shape == IMAGE_SIZE + (3,)
+    assert first.dtype == np.float32
+    assert 0.0 <= first.min() and first.max() <= 1.0
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(first, predict.load_image_array(str(path)))
+
+
+def test_predict_images_matches_single_image_input(monkeypatch, image_bytes, batcher):
+    batches = []
+
+    def fake_predict_batch(batch, backend=None):
+        batches.append(batch.copy())
+        return batch.reshape(len(batch), -1).mean(axis=1)
+
+    monkeypatch.setattr(predict, "predict_batch", fake_predict_batch)
+    results = predict.predict_images([image_bytes, b"not an image"])
+
+    assert "error" in results[1]
+    single = predict.predict_image_bytes(image_bytes)
+    np.testing.assert_array_equal(batches[0][0], batcher.inputs[0])
+    assert results[0]["confidence"] == pytest.approx(single["confidence"])
+
+
+def test_missing_image_path_raises(batcher, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        predict.predict_image(str(tmp_path / "missing.png"))
+
+
+def test_concurrent_requests_each_get_their_own_score(monkeypatch):
+    batch_sizes = []
+
+    def mean_pixel(batch, backend=None):
+        batch_sizes.append(len(batch))
+        return batch.reshape(len(batch), -1).mean(axis=1)
+
+    monkeypatch.setattr(predict, "predict_batch", mean_pixel)
+    monkeypatch.setattr(predict, "get_worker_pool", lambda: None)
+    monkeypatch.setattr(predict, "_batchers", {})
+    monkeypatch.setattr(predict, "BATCH_MAX_WAIT_MS", 50.0)
+
+    images = []
+    for i in range(48):
+        ok, encoded = cv2.imencode(".png", np.full((90, 120, 3), 5 * i, dtype=np.uint8))
+        assert ok
+        images.append(encoded.tobytes())
+    expected = [float(predict.normalize_image(predict.decode_image(data), IMAGE_SIZE).mean()) for data in images]
+
+    with ThreadPoolExecutor(max_workers=len(images)) as clients:
+        results = list(clients.map(predict.predict_image_bytes, images))
+    predict._batchers[None].close()
+
+    assert [r["confidence"] for r in results] == pytest.approx(expected)
+    assert sum(batch_sizes) == len(images) and max(batch_sizes) > 1
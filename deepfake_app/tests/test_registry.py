@@ -0,0 +1,78 @@
+# tests/test_registry.py - Load-once semantics of the shared model registry
+import sys
+import threading
+import time
+
+import pytest
+
+from model import registry
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    # Test versions must not leak into the process-wide registry
+    monkeypatch.setattr(registry, "MODEL_PATHS", dict(registry.MODEL_PATHS))
+    monkeypatch.setattr(registry, "_models", {})
+    monkeypatch.setattr(registry, "_predictors", {})
+    monkeypatch.setattr(registry, "_swap_listeners", [])
+    monkeypatch.setattr(registry, "load_counts", registry.Counter())
+
+
+def test_concurrent_get_model_loads_each_version_once(tmp_path, monkeypatch):
+    loaded = []
+
+    def slow_load(path):
+        time.sleep(0.05)  # keep the first loader inside the lock while the others arrive
+        loaded.append(path)
+        return object()
+
+    monkeypatch.setattr(registry, "_load", slow_load)
+    paths = {}
+    for version in ("test-a", "test-b"):
+        paths[version] = tmp_path / f"{version}.h5"
+        paths[version].write_bytes(b"weights")
+        registry.register_model(version, str(paths[version]))
+
+    results = {version: [] for version in paths}
+    barrier = threading.Barrier(16)
+
+    def worker(version):
+        barrier.wait()
+        results[version].append(registry.get_model(version))
+
+    threads = [threading.Thread(target=worker, args=(version,)) for version in paths for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(loaded) == sorted(str(p) for p in paths.values())
+    for version in paths:
+        assert registry.load_counts[version] == 1
+        assert len(results[version]) == 8
+        assert all(model is results[version][0] for model in results[version])
+    assert results["test-a"][0] is not results["test-b"][0]
+
+
+def test_register_model_swap_drops_cached_instance(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "_load", lambda path: object())
+    swapped = []
+    registry.on_model_swap(swapped.append)
+    first, second = tmp_path / "first.h5", tmp_path / "second.h5"
+    first.write_bytes(b"1")
+    second.write_bytes(b"2")
+
+    registry.register_model("test-swap", str(first))
+    model = registry.get_model("test-swap")
+    registry.register_model("test-swap", str(second))
+
+    assert "test-swap" in swapped
+    assert registry.get_model("test-swap") is not model
+    assert registry.load_counts["test-swap"] == 2
+
+
+def test_importing_predict_does_not_import_tensorflow():
+    import model.predict  # noqa: F401
+    import utils.preprocess  # noqa: F401
+
+    assert "tensorflow" not in sys.modules
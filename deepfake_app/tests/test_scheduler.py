@@ -0,0 +1,72 @@
+# tests/test_scheduler.py - Correctness and fairness of the shared frame scheduler
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from model.scheduler import FrameScheduler
+
+
+def row_sums(batch):
+    return batch.reshape(len(batch), -1).sum(axis=1)
+
+
+def test_scores_return_to_the_submitting_job_in_order():
+    scheduler = FrameScheduler(row_sums, max_batch_size=16, max_wait_ms=1)
+    results = {}
+
+    def run(job_index):
+        batch = np.arange(40 * 3, dtype=np.float32).reshape(40, 1, 1, 3) + 1000 * job_index
+        with scheduler.open_job() as job:
+            results[job_index] = (job.predict(batch), row_sums(batch))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for scores, expected in results.values():
+        np.testing.assert_allclose(scores, expected)
+    assert scheduler.stats()["items"] == 200
+
+
+def test_predict_errors_reach_the_caller():
+    def failing(batch):
+        raise RuntimeError("model unavailable")
+
+    scheduler = FrameScheduler(failing, max_batch_size=8, max_wait_ms=1)
+    with scheduler.open_job() as job:
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            job.predict(np.zeros((4, 2, 2, 3), dtype=np.float32))
+
+
+def test_every_job_progresses_under_load():
+    # 100 jobs with 8-row submissions and 64-row batches: far more demand than
+    # one batch can hold, so the start of the round-robin must rotate
+    def slow_predict(batch):
+        time.sleep(0.001)
+        return np.zeros(len(batch), dtype=np.float32)
+
+    scheduler = FrameScheduler(slow_predict, max_batch_size=64, max_wait_ms=1)
+    stop = threading.Event()
+    completed = [0] * 100
+
+    def run(job_index):
+        batch = np.zeros((8, 2, 2, 3), dtype=np.float32)
+        with scheduler.open_job() as job:
+            while not stop.is_set():
+                job.predict(batch)
+                completed[job_index] += 1
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(100)]
+    for t in threads:
+        t.start()
+    time.sleep(1.0)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    assert min(completed) >= 5
+    assert min(completed) >= 0.5 * max(completed)
@@ -0,0 +1,59 @@
+# tests/test_streaming_stats.py - Constant-memory score statistics against exact numpy results
+import pickle
+
+import numpy as np
+import pytest
+
+from utils.streaming_stats import P2Quantile, StreamingStats
+
+
+@pytest.fixture
+def scores():
+    return np.random.default_rng(0).beta(2, 5, size=5000)
+
+
+def test_moments_and_counts_are_exact(scores):
+    stats = StreamingStats(threshold=0.5, bins=10)
+    stats.extend(scores)
+
+    assert stats.count == len(scores)
+    assert stats.mean == pytest.approx(scores.mean())
+    assert stats.variance == pytest.approx(scores.var(ddof=1))
+    assert (stats.min, stats.max) == (scores.min(), scores.max())
+    summary = stats.summary()
+    assert summary["fraction_above_threshold"] == pytest.approx((scores >= 0.5).mean())
+    np.testing.assert_array_equal(summary["histogram"], np.histogram(scores, bins=10, range=(0, 1))[0])
+
+
+def test_quantile_estimates_are_close(scores):
+    stats = StreamingStats()
+    stats.extend(scores)
+    for p in (0.05, 0.25, 0.5, 0.75, 0.95):
+        assert stats.quantile(p) == pytest.approx(np.quantile(scores, p), abs=0.01)
+    assert stats.summary()["iqr"] == pytest.approx(np.quantile(scores, 0.75) - np.quantile(scores, 0.25), abs=0.02)
+
+
+def test_small_samples_use_exact_quantiles():
+    estimator = P2Quantile(0.5)
+    for x in (0.9, 0.1, 0.5):
+        estimator.add(x)
+    assert estimator.value() == 0.5
+    assert np.isnan(P2Quantile(0.5).value())
+
+
+def test_top_keeps_highest_scores_with_their_keys(scores):
+    stats = StreamingStats(top_k=3)
+    stats.extend(scores, keys=list(range(len(scores))))
+    expected = np.argsort(scores)[::-1][:3]
+    assert [key for key, _ in stats.top()] == expected.tolist()
+    assert [score for _, score in stats.top()] == pytest.approx(scores[expected].tolist())
+
+
+def test_empty_summary_and_checkpoint_round_trip(scores):
+    assert StreamingStats().summary() == {"count": 0}
+    stats = StreamingStats()
+    stats.extend(scores[:100])
+    restored = pickle.loads(pickle.dumps(stats))
+    restored.extend(scores[100:])
+    stats.extend(scores[100:])
+    assert restored.summary() == stats.summary()
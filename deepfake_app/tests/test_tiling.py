@@ -0,0 +1,52 @@
+# tests/test_tiling.py - Patch grids, strided extraction and the score heatmap
+import numpy as np
+import pytest
+
+from utils.tiling import extract_patches, iter_tiles, plan_tiles, score_heatmap
+
+
+@pytest.mark.parametrize("shape", [(1080, 1920), (3000, 4000), (128, 300), (60, 90)])
+def test_grids_cover_both_edges_within_budget(shape):
+    grids = plan_tiles(shape, patch=128, max_patches=64)
+    assert sum(len(ys) * len(xs) for _, ys, xs in grids) <= 64
+    h, w = shape
+    for scale, ys, xs in grids:
+        sh, sw = max(128, round(h * scale)), max(128, round(w * scale))
+        assert ys[0] == 0 and ys[-1] == sh - 128
+        assert xs[0] == 0 and xs[-1] == sw - 128
+
+
+@pytest.mark.parametrize("max_patches", [1, 2, 3])
+def test_budget_smaller_than_scale_count_is_respected(max_patches):
+    grids = plan_tiles((3000, 4000), patch=128, scales=(1.0, 0.5, 0.25), max_patches=max_patches)
+    assert sum(len(ys) * len(xs) for _, ys, xs in grids) <= max_patches
+    assert grids[-1][0] == 0.25  # the coarsest scale is kept first
+
+
+@pytest.mark.parametrize("max_patches", [0, -5])
+def test_non_positive_budget_is_rejected(max_patches):
+    with pytest.raises(ValueError, match="max_patches"):
+        plan_tiles((720, 1280), max_patches=max_patches)
+
+
+def test_extract_patches_matches_slicing():
+    img = np.random.default_rng(0).integers(0, 256, (300, 400, 3), dtype=np.uint8)
+    ys, xs = np.array([0, 100, 172]), np.array([0, 136, 272])
+    patches = extract_patches(img, ys, xs, patch=128)
+    expected = np.stack([img[y:y + 128, x:x + 128] for y in ys for x in xs])
+    np.testing.assert_array_equal(patches, expected)
+
+
+def test_iter_tiles_boxes_are_normalized():
+    img = np.zeros((720, 1280, 3), dtype=np.uint8)
+    for scale, patches, boxes in iter_tiles(img, 128, max_patches=32):
+        assert patches.shape[1:] == (128, 128, 3) and len(patches) == len(boxes)
+        assert boxes.min() >= 0 and boxes.max() <= 1
+        assert boxes[:, 0].min() == 0 and boxes[:, 2].max() == pytest.approx(1)
+
+
+def test_heatmap_averages_overlapping_patches():
+    boxes = np.array([[0.0, 0.0, 0.5, 1.0], [0.25, 0.0, 1.0, 1.0]])
+    heatmap = score_heatmap(boxes, np.array([1.0, 0.0]), (100, 100), size=4)
+    assert heatmap.shape == (4, 4)
+    np.testing.assert_allclose(heatmap[0], [1.0, 0.5, 0.0, 0.0])
@@ -0,0 +1,20 @@
+# tests/test_train.py - The full model's training split leaves the benchmark holdouts out
+import pytest
+
+pytest.importorskip("tensorflow")
+
+from model.cascade import split_screening_samples  # noqa: E402
+from model.export import split_calibration_holdout  # noqa: E402
+from model.train import split_training_samples  # noqa: E402
+
+
+def test_training_split_excludes_benchmark_holdouts():
+    samples = [(f"img{i}.png", i % 2) for i in range(3000)]
+    train, val = split_training_samples(samples, validation_fraction=0.1)
+
+    _, backend_holdout = split_calibration_holdout(samples)
+    _, _, screening_holdout = split_screening_samples(samples)
+    seen = {path for path, _ in train + val}
+    assert not seen & {path for path, _ in backend_holdout + screening_holdout}
+    assert len(seen) == len(train) + len(val) == 2000
+    assert len(val) == 200
@@ -0,0 +1,48 @@
+# tests/test_video_io.py - Frame sampling strategies agree on which frames they return
+import numpy as np
+import pytest
+
+from utils.video_io import iter_frames, segment_ranges, video_info
+
+
+@pytest.fixture
+def long_video(make_video):
+    return make_video("long.avi", [np.full((48, 64, 3), i, dtype=np.uint8) for i in range(240)])
+
+
+def sample(path, **kwargs):
+    return [(i, t, frame) for i, t, frame in iter_frames(path, **kwargs)]
+
+
+@pytest.mark.parametrize("frame_skip", [1, 10, 60])  # 60 is above SEEK_MIN_GAP, so "seek" really seeks
+def test_strategies_return_identical_frames(long_video, frame_skip):
+    reference = sample(long_video, strategy="read", frame_skip=frame_skip)
+    assert [i for i, _, _ in reference] == list(range(0, 240, frame_skip))
+    for strategy in ("grab", "seek"):
+        frames = sample(long_video, strategy=strategy, frame_skip=frame_skip)
+        assert [i for i, _, _ in frames] == [i for i, _, _ in reference]
+        for (_, _, expected), (_, _, actual) in zip(reference, frames):
+            np.testing.assert_array_equal(actual, expected)
+
+
+@pytest.mark.parametrize("strategy", ["read", "grab", "seek"])
+def test_sample_fps_keeps_timestamps_on_the_grid(long_video, strategy):
+    frames = sample(long_video, strategy=strategy, sample_fps=5)
+    assert [i for i, _, _ in frames] == list(range(0, 240, 5))
+    assert [t for _, t, _ in frames] == pytest.approx([i / 25 for i in range(0, 240, 5)])
+
+
+@pytest.mark.parametrize("strategy", ["read", "grab", "seek"])
+def test_frame_ranges_partition_a_full_run(long_video, strategy):
+    full = [i for i, _, _ in sample(long_video, strategy=strategy, frame_skip=7)]
+    ranges = segment_ranges(video_info(long_video)["frame_count"], 3)
+    pieces = [i for start, end in ranges
+              for i, _, _ in sample(long_video, strategy=strategy, frame_skip=7, start_frame=start, end_frame=end)]
+    assert pieces == full
+
+
+def test_unknown_strategy_and_decoder_are_rejected(long_video):
+    with pytest.raises(ValueError):
+        next(iter_frames(long_video, strategy="bogus"))
+    with pytest.raises(ValueError):
+        next(iter_frames(long_video, decoder="bogus"))
@@ -0,0 +1,95 @@
+# tests/test_workers.py - Lifetime and bounds of the shared worker pools
+import numpy as np
+import pytest
+
+from model import registry, workers
+from model.predict import predict_batch
+from model.predict_video import predict_video
+
+
+class FakePool:
+    def __init__(self, num_workers=2, backend=None, version=None, **_):
+        self.num_workers = num_workers
+        self.config = {"num_workers": num_workers}
+        self.backend = backend or workers.DEFAULT_BACKEND
+        self.version = version or workers.DEFAULT_VERSION
+        self.model_path = workers.MODEL_PATHS[self.version]
+        self.closed = False
+
+    def predict(self, batch):
+        # Score every image with the length of the file name the workers loaded
+        return np.full(len(batch), len(self.model_path), dtype=np.float32)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_pools(monkeypatch):
+    monkeypatch.setattr(workers, "InferenceWorkerPool", FakePool)
+    monkeypatch.setattr(workers, "MAX_SEGMENT_WORKERS", 4)
+    monkeypatch.setattr(workers, "_pool", None)
+    monkeypatch.setattr(workers, "_segment_pool", None)
+    monkeypatch.setattr(workers, "_segment_users", workers.Counter())
+
+
+def test_one_pool_is_reused_and_only_grows():
+    with workers.segment_pool(2) as first:
+        pass
+    with workers.segment_pool(1) as smaller:
+        assert smaller is first
+    with workers.segment_pool(4) as larger:
+        assert larger is not first and larger.num_workers == 4
+    assert first.closed and not larger.closed
+    with workers.segment_pool(3) as again:
+        assert again is larger
+
+
+def test_replaced_pool_closes_when_its_last_lease_ends():
+    with workers.segment_pool(2) as busy:
+        with workers.segment_pool(3) as grown:
+            assert grown is not busy
+            assert not busy.closed  # still scoring segments for the outer lease
+        assert not grown.closed
+    assert busy.closed and not grown.closed
+
+
+def test_backend_change_replaces_pool():
+    with workers.segment_pool(2, "keras") as keras_pool:
+        pass
+    with workers.segment_pool(2, "onnx") as onnx_pool:
+        assert onnx_pool is not keras_pool and onnx_pool.backend == "onnx"
+    assert keras_pool.closed
+
+
+def test_model_swap_recycles_the_shared_pools(monkeypatch):
+    monkeypatch.setenv("DEEPFAKE_WORKERS", "2")
+    monkeypatch.setitem(registry.MODEL_PATHS, registry.DEFAULT_VERSION, "models/old.h5")
+    batch = np.zeros((3, 8, 8, 3), dtype=np.float32)
+    old_pool = workers.get_worker_pool()
+    assert predict_batch(batch).tolist() == [len("models/old.h5")] * 3
+
+    with workers.segment_pool(2) as busy:
+        registry.register_model(registry.DEFAULT_VERSION, "models/retrained.h5")
+        assert old_pool.closed and not busy.closed
+    assert busy.closed
+
+    assert predict_batch(batch).tolist() == [len("models/retrained.h5")] * 3
+    with workers.segment_pool(2) as fresh:
+        assert fresh.model_path == "models/retrained.h5"
+
+
+@pytest.mark.parametrize("num_workers", [0, -1, 5, 1000])
+def test_out_of_range_worker_counts_are_rejected(num_workers):
+    with pytest.raises(ValueError):
+        with workers.segment_pool(num_workers):
+            pass
+    assert workers._segment_pool is None
+
+
+@pytest.mark.parametrize("options", [{"decoder": "ffmpeg"}, {"strategy": "keyframe"}])
+def test_sharded_video_rejects_decoders_without_frame_ranges(tmp_path, options):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError, match="segments"):
+        predict_video(str(path), segments=2, **options)
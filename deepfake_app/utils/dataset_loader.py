@@ -1,6 +1,5 @@
 # utils/dataset_loader.py
 
-import kagglehub # type: ignore
 import zipfile
 import shutil
 import os
@@ -12,6 +11,8 @@ def find_subfolder_containing(target_folder_name, base_folder="unzipped_data"):
     raise FileNotFoundError(f"Folder '{target_folder_name}' not found in {base_folder}")
 
 def download_and_prepare():
+    import kagglehub  # type: ignore
+
     print("[INFO] Downloading dataset from Kaggle...")
 
     # Step 1: Download the dataset
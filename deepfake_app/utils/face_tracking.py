@@ -0,0 +1,176 @@
+# utils/face_tracking.py - Detect-then-track face boxes to amortize detector calls over video frames
+import itertools
+import time
+
+import cv2
+
+from utils.faces import DETECT_WIDTH
+from utils.frame_diff import FrameChangeDetector
+
+SCENE_CHANGE_THRESHOLD = 0.12  # mean absolute thumbnail difference that forces a fresh detection
+
+
+def iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = w * h
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+class FaceTrack:
+    def __init__(self, track_id, face):
+        self.track_id = track_id
+        self.box, self.eyes = face
+        self.template = None
+        self.misses = 0  # detections in a row that did not find this face
+
+    @property
+    def face(self):
+        return self.box, self.eyes
+
+
+class FaceTracker:
+    """
+    Runs the face detector every `detect_every` frames, on a scene change or
+    when a track is lost, and follows the faces in between by template
+    matching in a small search window around each previous box.
+
+    At detection frames, detections are matched by IoU to the current tracks
+    and to recently lost ones, so a face keeps its track id through a brief
+    occlusion or a failed template match; unmatched detections start new
+    tracks. A track that is not re-detected stays a match candidate, at its
+    last box, until `max_misses` detections in a row have missed it.
+
+    Args:
+        detector (FaceDetector): Full-frame detector (utils.faces).
+        detect_every (int): Frames between scheduled detections.
+        scene_threshold (float): Thumbnail difference treated as a scene change.
+        iou_threshold (float): Minimum overlap for a detection to continue a track.
+        min_match (float): Template match score below which a track is lost.
+        search_scale (float): Search window size relative to the box.
+        first_id (int): Id of the first track, e.g. to continue a resumed run.
+        max_misses (int): Detections that may miss a lost track before it ends.
+    """
+
+    def __init__(self, detector, detect_every=10, scene_threshold=SCENE_CHANGE_THRESHOLD, iou_threshold=0.3,
+                 min_match=0.5, search_scale=2.0, first_id=0, max_misses=1):
+        self.detector = detector
+        self.detect_every = detect_every
+        self.iou_threshold = iou_threshold
+        self.min_match = min_match
+        self.search_scale = search_scale
+        self.max_misses = max_misses
+        self._scene = FrameChangeDetector(scene_threshold)
+        self._ids = itertools.count(first_id)
+        self.tracks = []
+        self._lost = []  # tracks out of sight, still matched against new detections
+        self._since_detection = None
+        self._counters = {"frames": 0, "detections": 0, "tracked": 0, "lost": 0, "recovered": 0, "started": 0,
+                          "ended": 0}
+        self._seconds = {"detection": 0.0, "tracking": 0.0}
+
+    def _small_gray(self, frame):
+        scale = min(1.0, DETECT_WIDTH / frame.shape[1])
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if scale < 1:
+            gray = cv2.resize(gray, (round(frame.shape[1] * scale), round(frame.shape[0] * scale)),
+                              interpolation=cv2.INTER_AREA)
+        return gray, scale
+
+    def _detect(self, frame):
+        start = time.perf_counter()
+        found = self.detector.detect(frame)
+        self._seconds["detection"] += time.perf_counter() - start
+        self._counters["detections"] += 1
+
+        tracks, unmatched = [], self.tracks + self._lost
+        for face in found:
+            best = max(unmatched, key=lambda t: iou(t.box, face[0]), default=None)
+            if best is not None and iou(best.box, face[0]) >= self.iou_threshold:
+                unmatched.remove(best)
+                if best.misses or best in self._lost:
+                    self._counters["recovered"] += 1
+                best.box, best.eyes = face
+                best.misses = 0
+                tracks.append(best)
+            else:
+                tracks.append(FaceTrack(next(self._ids), face))
+                self._counters["started"] += 1
+        self._lost = []
+        for track in unmatched:
+            track.misses += 1
+            if track.misses > self.max_misses:
+                self._counters["ended"] += 1
+            else:
+                self._lost.append(track)
+        self.tracks = tracks
+
+    def _track(self, gray, scale):
+        start = time.perf_counter()
+        kept = []
+        for track in self.tracks:
+            x, y, w, h = (int(round(v * scale)) for v in track.box)
+            pad_x, pad_y = int(w * (self.search_scale - 1) / 2), int(h * (self.search_scale - 1) / 2)
+            x0, y0 = max(x - pad_x, 0), max(y - pad_y, 0)
+            window = gray[y0:min(y + h + pad_y, gray.shape[0]), x0:min(x + w + pad_x, gray.shape[1])]
+            template = track.template
+            if template is None or window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+                self._counters["lost"] += 1
+                self._lost.append(track)
+                continue
+            _, score, _, (mx, my) = cv2.minMaxLoc(cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED))
+            if score < self.min_match:
+                self._counters["lost"] += 1
+                self._lost.append(track)
+                continue
+            dx, dy = (x0 + mx - x) / scale, (y0 + my - y) / scale
+            bx, by, bw, bh = track.box
+            track.box = (int(round(bx + dx)), int(round(by + dy)), bw, bh)
+            if track.eyes is not None:
+                track.eyes = tuple((ex + dx, ey + dy) for ex, ey in track.eyes)
+            kept.append(track)
+        self.tracks = kept
+        self._seconds["tracking"] += time.perf_counter() - start
+        return len(kept)
+
+    def update(self, frame):
+        """Return [(track_id, face)] for `frame`, where face is (box, eyes) as from FaceDetector.detect."""
+        self._counters["frames"] += 1
+        gray, scale = self._small_gray(frame)
+        scene_change = self._scene.changed(frame)
+        due = self._since_detection is None or self._since_detection + 1 >= self.detect_every
+        if due or scene_change:
+            self._detect(frame)
+            self._since_detection = 0
+        else:
+            # Frames without faces wait for the next scheduled detection too
+            self._since_detection += 1
+            if self.tracks:
+                lost = len(self.tracks) - self._track(gray, scale)
+                self._counters["tracked"] += 1
+                if lost:
+                    self._detect(frame)
+                    self._since_detection = 0
+
+        for track in self.tracks:
+            x, y, w, h = (int(round(v * scale)) for v in track.box)
+            track.template = gray[max(y, 0):y + h, max(x, 0):x + w].copy() if w > 0 and h > 0 else None
+        return [(track.track_id, track.face) for track in self.tracks]
+
+    def stats(self) -> dict:
+        frames = self._counters["frames"]
+        return {
+            "frames": frames,
+            "detection_calls": self._counters["detections"],
+            "detection_rate": self._counters["detections"] / frames if frames else 0.0,
+            "tracked_frames": self._counters["tracked"],
+            "tracks_lost": self._counters["lost"],
+            "tracks_recovered": self._counters["recovered"],
+            "tracks_started": self._counters["started"],
+            "tracks_ended": self._counters["ended"],
+            "detection_seconds": self._seconds["detection"],
+            "tracking_seconds": self._seconds["tracking"],
+        }
@@ -0,0 +1,136 @@
+# utils/faces.py - Offline face detection, alignment and cropping ahead of the classifier
+import math
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# YuNet ONNX model for cv2.FaceDetectorYN; when the file is missing the Haar
+# cascades bundled with opencv-python are used instead
+FACE_MODEL_PATH = os.environ.get("DEEPFAKE_FACE_MODEL", "saved_model/face_detection_yunet.onnx")
+DETECT_WIDTH = 640  # frames are downscaled to at most this width for detection
+FACE_MARGIN = 0.25  # context kept around each face box, as a fraction of its size
+
+
+class FaceDetector:
+    """
+    Finds faces in BGR images with a detector that runs fully offline and
+    cuts them out as aligned, square crops.
+
+    YuNet (cv2.FaceDetectorYN) is used when its model file is present and
+    provides eye landmarks directly; otherwise OpenCV's frontal-face Haar
+    cascade finds the faces and an eye cascade estimates the roll angle.
+    Detector objects are not thread-safe, so each thread gets its own.
+
+    Args:
+        model_path (str): YuNet ONNX model file.
+        max_faces (int): Largest faces kept per image.
+        min_size (float): Smallest face side, as a fraction of the shorter image side.
+        score_threshold (float): YuNet confidence cut-off.
+        margin (float): Context added around each face box on every side.
+        align (bool): Rotate crops so the eyes are level.
+    """
+
+    def __init__(self, model_path=FACE_MODEL_PATH, max_faces=8, min_size=0.05, score_threshold=0.8,
+                 margin=FACE_MARGIN, align=True):
+        self.model_path = model_path
+        self.max_faces = max_faces
+        self.min_size = min_size
+        self.score_threshold = score_threshold
+        self.margin = margin
+        self.align = align
+        self.method = "yunet" if os.path.exists(model_path) and hasattr(cv2, "FaceDetectorYN") else "haar"
+        # OpenCV 5 dropped the Haar cascade API and its bundled cascade files
+        if self.method == "haar" and not (hasattr(cv2, "CascadeClassifier") and hasattr(cv2, "data")):
+            raise RuntimeError(f"No face detector available: {model_path} is missing and OpenCV {cv2.__version__} "
+                               f"has no Haar cascades; install opencv-python<5 or provide the YuNet model")
+        self._local = threading.local()
+
+    def _yunet(self, size):
+        detector = getattr(self._local, "yunet", None)
+        if detector is None:
+            detector = cv2.FaceDetectorYN.create(self.model_path, "", size, self.score_threshold)
+            self._local.yunet = detector
+        detector.setInputSize(size)
+        return detector
+
+    def _cascades(self):
+        if getattr(self._local, "face_cascade", None) is None:
+            self._local.face_cascade = cv2.CascadeClassifier(
+                os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml"))
+            self._local.eye_cascade = cv2.CascadeClassifier(
+                os.path.join(cv2.data.haarcascades, "haarcascade_eye.xml"))
+        return self._local.face_cascade, self._local.eye_cascade
+
+    def detect(self, img: np.ndarray):
+        """
+        Return up to max_faces (box, eyes) pairs, largest first, in the
+        coordinates of `img`; box is (x, y, w, h) and eyes is
+        ((x1, y1), (x2, y2)) left-to-right in the image, or None.
+        """
+        h, w = img.shape[:2]
+        scale = min(1.0, DETECT_WIDTH / w)
+        small = cv2.resize(img, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA) if scale < 1 else img
+        min_side = max(int(self.min_size * min(small.shape[:2])), 12)
+
+        faces = []
+        if self.method == "yunet":
+            _, found = self._yunet((small.shape[1], small.shape[0])).detect(small)
+            for row in (found if found is not None else []):
+                if min(row[2], row[3]) < min_side:
+                    continue
+                eyes = sorted([(row[4], row[5]), (row[6], row[7])])
+                faces.append((row[:4] / scale, tuple((x / scale, y / scale) for x, y in eyes)))
+        else:
+            face_cascade, eye_cascade = self._cascades()
+            gray = cv2.equalizeHist(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+            for x, y, fw, fh in face_cascade.detectMultiScale(gray, 1.1, 5, minSize=(min_side, min_side)):
+                eyes = None
+                if self.align:
+                    # Eyes sit in the upper half of the face box
+                    found = eye_cascade.detectMultiScale(gray[y:y + fh // 2, x:x + fw], 1.1, 5)
+                    if len(found) >= 2:
+                        found = sorted(found, key=lambda e: e[2] * e[3], reverse=True)[:2]
+                        eyes = tuple(sorted(((x + ex + ew / 2) / scale, (y + ey + eh / 2) / scale)
+                                            for ex, ey, ew, eh in found))
+                faces.append((np.array([x, y, fw, fh], dtype=np.float32) / scale, eyes))
+
+        faces.sort(key=lambda f: f[0][2] * f[0][3], reverse=True)
+        return [(tuple(int(round(v)) for v in box), eyes) for box, eyes in faces[:self.max_faces]]
+
+    def crop(self, img: np.ndarray, face, target_size=(128, 128)) -> np.ndarray:
+        """Cut one detected face out of `img` as a (H, W, 3) uint8 square crop, rotated so the eyes are level."""
+        (x, y, w, h), eyes = face
+        cx, cy = x + w / 2, y + h / 2
+        side = max(w, h) * (1 + 2 * self.margin)
+        angle = 0.0
+        if self.align and eyes is not None:
+            (x1, y1), (x2, y2) = eyes
+            angle = math.degrees(math.atan2(y2 - y1, x2 - x1))
+        # One affine warp rotates around the face centre, scales the square to
+        # target_size and moves the centre to the middle of the output
+        matrix = cv2.getRotationMatrix2D((cx, cy), angle, target_size[0] / side)
+        matrix[0, 2] += target_size[0] / 2 - cx
+        matrix[1, 2] += target_size[1] / 2 - cy
+        return cv2.warpAffine(img, matrix, target_size, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    def crops(self, img: np.ndarray, faces, target_size=(128, 128)) -> np.ndarray:
+        """All faces of one image as a single (N, H, W, 3) uint8 batch."""
+        batch = np.empty((len(faces), target_size[1], target_size[0], 3), dtype=np.uint8)
+        for i, face in enumerate(faces):
+            batch[i] = self.crop(img, face, target_size)
+        return batch
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_face_detector() -> FaceDetector:
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = FaceDetector()
+    return _detector
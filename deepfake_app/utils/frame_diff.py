@@ -0,0 +1,56 @@
+# utils/frame_diff.py - Cheap low-resolution change detection between video frames
+import time
+
+import cv2
+import numpy as np
+
+DIFF_SIZE = (64, 36)
+
+
+class FrameChangeDetector:
+    """
+    Decides whether a frame differs enough from the last accepted one to be
+    worth scoring.
+
+    Frames are reduced to small grayscale thumbnails and compared by mean
+    absolute difference (0..1). The reference is only replaced when a frame
+    is accepted, so slow drift still triggers a re-score once it adds up.
+
+    Args:
+        threshold (float): Mean absolute difference below which a frame counts as unchanged.
+        size (tuple): Thumbnail (width, height) used for the comparison.
+    """
+
+    def __init__(self, threshold=0.02, size=DIFF_SIZE):
+        self.threshold = threshold
+        self.size = size
+        self._reference = None
+        self.checked = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    def _thumbnail(self, frame):
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def changed(self, frame) -> bool:
+        start = time.perf_counter()
+        thumb = self._thumbnail(frame)
+        self.checked += 1
+        if self._reference is not None and np.abs(thumb - self._reference).mean() / 255.0 < self.threshold:
+            self.skipped += 1
+            self.seconds += time.perf_counter() - start
+            return False
+        self._reference = thumb
+        self.seconds += time.perf_counter() - start
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "frames_checked": self.checked,
+            "frames_skipped": self.skipped,
+            "frames_scored": self.checked - self.skipped,
+            "skip_fraction": self.skipped / self.checked if self.checked else 0.0,
+            "detector_seconds": self.seconds,
+        }
@@ -0,0 +1,139 @@
+# utils/phash.py - Perceptual hashing and a banded Hamming-distance index for near-duplicate lookup
+import threading
+from itertools import combinations
+
+import cv2
+import numpy as np
+
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _to_gray(img: np.ndarray) -> np.ndarray:
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if img.dtype != np.uint8:
+        img = np.clip(img * 255.0, 0, 255).astype(np.uint8)
+    return img
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def dhash(img: np.ndarray, hash_size: int = 8) -> int:
+    """Difference hash: sign of horizontal gradients on a (hash_size+1) x hash_size thumbnail."""
+    small = cv2.resize(_to_gray(img), (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    return _bits_to_int(small[:, 1:] > small[:, :-1])
+
+
+def phash(img: np.ndarray, hash_size: int = 8) -> int:
+    """DCT hash: low-frequency DCT coefficients of a 32x32 thumbnail compared to their median."""
+    small = cv2.resize(_to_gray(img), (hash_size * 4, hash_size * 4), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small.astype(np.float32))[:hash_size, :hash_size]
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def popcount(x: np.ndarray) -> np.ndarray:
+    x = np.ascontiguousarray(x, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    return _POPCOUNT_TABLE[x.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+class HammingIndex:
+    """
+    Near-duplicate index over 64-bit hashes (multi-index hashing).
+
+    Hashes are split into `num_bands` bands. By the pigeonhole principle any
+    hash within `max_distance` bits of a query is within
+    `max_distance // num_bands` bits of it on at least one band, so each band
+    is probed with every key in that small radius. Bands keep their keys in
+    sorted arrays, making a lookup a handful of vectorized binary searches plus
+    a popcount over the candidates. New entries go to a small pending buffer
+    that is scanned linearly and merged into the sorted bands once it fills.
+
+    Args:
+        max_distance (int): Largest Hamming distance reported as a match.
+        num_bands (int): Number of bands; wider bands mean fewer candidates per probe.
+        merge_threshold (int): Pending entries kept before merging into the bands.
+    """
+
+    def __init__(self, max_distance=6, num_bands=4, merge_threshold=4096):
+        self.max_distance = max_distance
+        self.merge_threshold = merge_threshold
+
+        widths = [64 // num_bands + (1 if i < 64 % num_bands else 0) for i in range(num_bands)]
+        self._shifts = np.cumsum([0] + widths[:-1]).astype(np.uint64)
+        self._masks = np.array([(1 << w) - 1 for w in widths], dtype=np.uint64)
+
+        radius = max_distance // num_bands
+        self._probes = [
+            np.array([sum(1 << b for b in bits) for r in range(radius + 1) for bits in combinations(range(w), r)],
+                     dtype=np.uint64)
+            for w in widths
+        ]
+
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._hashes = np.empty(1024, dtype=np.uint64)
+            self._values = []
+            self._merged = 0
+            self._band_keys = [np.empty(0, dtype=np.uint64) for _ in self._masks]
+            self._band_ids = [np.empty(0, dtype=np.int64) for _ in self._masks]
+
+    def __len__(self):
+        return len(self._values)
+
+    def _bands(self, hashes: np.ndarray):
+        return [(hashes >> shift) & mask for shift, mask in zip(self._shifts, self._masks)]
+
+    def add(self, h: int, value):
+        self.add_many([h], [value])
+
+    def add_many(self, hashes, values):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        with self._lock:
+            n = len(self._values)
+            needed = n + len(hashes)
+            if needed > len(self._hashes):
+                grown = np.empty(max(needed, 2 * len(self._hashes)), dtype=np.uint64)
+                grown[:n] = self._hashes[:n]
+                self._hashes = grown
+            self._hashes[n:needed] = hashes
+            self._values.extend(values)
+            if needed - self._merged >= self.merge_threshold:
+                self._merge()
+
+    def _merge(self):
+        start, end = self._merged, len(self._values)
+        new_ids = np.arange(start, end, dtype=np.int64)
+        for b, keys in enumerate(self._bands(self._hashes[start:end])):
+            order = np.argsort(keys, kind="stable")
+            keys, ids = keys[order], new_ids[order]
+            pos = np.searchsorted(self._band_keys[b], keys)
+            self._band_keys[b] = np.insert(self._band_keys[b], pos, keys)
+            self._band_ids[b] = np.insert(self._band_ids[b], pos, ids)
+        self._merged = end
+
+    def lookup(self, h: int):
+        """Return (value, distance) of the closest entry within max_distance, or None."""
+        query = np.uint64(h)
+        with self._lock:
+            candidates = [np.arange(self._merged, len(self._values), dtype=np.int64)]
+            for b, key in enumerate(self._bands(query)):
+                probes = self._probes[b] ^ key
+                lo = np.searchsorted(self._band_keys[b], probes, side="left")
+                hi = np.searchsorted(self._band_keys[b], probes, side="right")
+                candidates.extend(self._band_ids[b][start:stop] for start, stop in zip(lo, hi) if stop > start)
+            ids = np.unique(np.concatenate(candidates))
+            if not len(ids):
+                return None
+
+            distances = popcount(self._hashes[ids] ^ query)
+            best = int(np.argmin(distances))
+            if distances[best] > self.max_distance:
+                return None
+            return self._values[ids[best]], int(distances[best])
@@ -1,12 +1,12 @@
 # utils/preprocess.py - Image preprocessing utilities
 import cv2
 import numpy as np
-from tensorflow.keras.preprocessing.image import img_to_array # type: ignore
 
 def preprocess_image(img_path: str, target_size=(224, 224)) -> np.ndarray:
     """
     Load, resize, normalize, and convert image to array for CNN input.
     """
+    from tensorflow.keras.preprocessing.image import img_to_array  # type: ignore
     img = cv2.imread(img_path)
     if img is None:
         raise ValueError(f"Could not read image at {img_path}")
@@ -22,6 +22,7 @@ def preprocess_frame(frame, target_size=(224, 224)) -> np.ndarray:
     """
     Resize, normalize, and format webcam or video frame
     """
+    from tensorflow.keras.preprocessing.image import img_to_array  # type: ignore
     if frame is None:
         raise ValueError("Empty frame received")
 
@@ -31,3 +32,29 @@ def preprocess_frame(frame, target_size=(224, 224)) -> np.ndarray:
     frame = img_to_array(frame)
     frame = np.expand_dims(frame, axis=0)
     return frame
+
+def decode_image(data: bytes) -> np.ndarray:
+    """
+    Decode an encoded image (JPEG/PNG/...) straight from memory into a BGR
+    uint8 array, without touching the filesystem.
+    """
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image bytes")
+    return img
+
+def normalize_image(img: np.ndarray, target_size=(224, 224)) -> np.ndarray:
+    """
+    Convert a decoded BGR image into a normalized (H, W, 3) RGB model input.
+    """
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img = cv2.resize(img, target_size)
+    return img.astype("float32") / 255.0
+
+def decode_image_bytes(data: bytes, target_size=(224, 224)) -> np.ndarray:
+    """
+    Encoded image bytes to a normalized model input. Every image entry point
+    (file paths, uploads, batches) goes through this, so a given image is
+    resized the same way and gets the same score wherever it comes from.
+    """
+    return normalize_image(decode_image(data), target_size)
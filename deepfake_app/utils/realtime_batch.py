@@ -3,27 +3,55 @@ import cv2
 import argparse
 import os
 import time
-from model.predict import predict_image_array
-from utils.preprocess import preprocess_frame
+import numpy as np
+from model.predict import predict_batch, predict_image_array, predict_images
+from model.registry import IMAGE_SIZE
+from utils.faces import get_face_detector
+from utils.face_tracking import FaceTracker
+from utils.preprocess import normalize_image, preprocess_frame
+from utils.streaming_stats import StreamingStats
 
-def scan_webcam(threshold=0.5):
+def scan_webcam(threshold=0.5, faces=False, detect_every=10):
+    """
+    Classify webcam frames live. With `faces`, each face is detected every
+    `detect_every` frames (or on a scene change), tracked in between and
+    scored on its own; the summary then also has per-track statistics.
+    """
     cap = cv2.VideoCapture(0)
     if not cap.isOpened():
         print("Error: Cannot open webcam.")
         return
 
     print("[INFO] Press 'q' to exit webcam detection.")
+    stats = StreamingStats(threshold)
+    tracker = FaceTracker(get_face_detector(), detect_every) if faces else None
+    track_stats = {}
+    frame_index = 0
     while True:
         ret, frame = cap.read()
         if not ret:
             print("Error: Failed to capture frame.")
             break
 
-        preprocessed = preprocess_frame(frame)
-        label, confidence = predict_image_array(preprocessed)
+        tracked = tracker.update(frame) if tracker is not None else []
+        if tracked:
+            crops = tracker.detector.crops(frame, [face for _, face in tracked], IMAGE_SIZE)
+            scores = predict_batch(np.stack([normalize_image(crop, IMAGE_SIZE) for crop in crops])).reshape(-1)
+            for (track_id, ((x, y, w, h), _)), score in zip(tracked, scores):
+                track_stats.setdefault(track_id, StreamingStats(threshold)).add(float(score), frame_index)
+                color = (0, 255, 0) if score < threshold else (0, 0, 255)
+                cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+                cv2.putText(frame, f"#{track_id} {score:.2f}", (x, max(y - 8, 0)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+            confidence = float(scores.max())
+            label = "Fake" if confidence >= threshold else "Real"
+        else:
+            preprocessed = preprocess_frame(frame, target_size=IMAGE_SIZE)
+            label, confidence = predict_image_array(preprocessed)
+        stats.add(confidence, frame_index)
+        frame_index += 1
 
         text = f"{label.upper()} ({confidence:.2f})"
-        color = (0, 255, 0) if label == "real" else (0, 0, 255)
+        color = (0, 255, 0) if label == "Real" else (0, 0, 255)
         if confidence >= threshold:
             cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
         cv2.imshow("DeepFake Webcam Detection", frame)
@@ -33,33 +61,45 @@ def scan_webcam(threshold=0.5):
 
     cap.release()
     cv2.destroyAllWindows()
+    summary = stats.summary()
+    if tracker is not None:
+        summary["face_tracks"] = {track_id: s.summary() for track_id, s in sorted(track_stats.items())}
+        summary["face_tracking"] = tracker.stats()
+    print(f"[INFO] Webcam session summary: {summary}")
+    return summary
 
-def scan_folder(folder_path, threshold=0.5):
+def scan_folder(folder_path, threshold=0.5, batch_size=64):
     if not os.path.isdir(folder_path):
         print(f"Error: Folder {folder_path} not found.")
         return
 
     print(f"[INFO] Scanning folder: {folder_path}")
     image_ext = (".jpg", ".jpeg", ".png")
-    for file in os.listdir(folder_path):
-        if file.lower().endswith(image_ext):
-            full_path = os.path.join(folder_path, file)
-            try:
-                preprocessed = preprocess_frame(cv2.imread(full_path))
-                label, confidence = predict_image_array(preprocessed)
-                print(f"{file}: {label.upper()} ({confidence:.2f})")
-            except Exception as e:
-                print(f"Failed to process {file}: {str(e)}")
+    files = [f for f in os.listdir(folder_path) if f.lower().endswith(image_ext)]
+    results = predict_images([os.path.join(folder_path, f) for f in files], threshold=threshold, batch_size=batch_size)
+    stats = StreamingStats(threshold)
+    for file, result in zip(files, results):
+        if "error" in result:
+            print(f"Failed to process {file}: {result['error']}")
+        else:
+            stats.add(result["confidence"], file)
+            print(f"{file}: {result['label'].upper()} ({result['confidence']:.2f})")
+    summary = stats.summary()
+    summary["top_files"] = [{"file": file, "score": score} for file, score in stats.top()]
+    print(f"[INFO] Folder summary: {summary}")
+    return {"results": dict(zip(files, results)), "summary": summary}
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Real-time webcam or folder batch scanning")
     parser.add_argument("--webcam", action="store_true", help="Enable webcam mode")
     parser.add_argument("--folder", type=str, help="Scan folder with images")
     parser.add_argument("--threshold", type=float, default=0.5, help="Prediction threshold")
+    parser.add_argument("--faces", action="store_true", help="Track and score each face (webcam mode)")
+    parser.add_argument("--detect-every", type=int, default=10, help="Frames between full face detections")
     args = parser.parse_args()
 
     if args.webcam:
-        scan_webcam(threshold=args.threshold)
+        scan_webcam(threshold=args.threshold, faces=args.faces, detect_every=args.detect_every)
     elif args.folder:
         scan_folder(args.folder, threshold=args.threshold)
     else:
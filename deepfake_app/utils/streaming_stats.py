@@ -0,0 +1,152 @@
+# utils/streaming_stats.py - Constant-memory running statistics over score streams
+import heapq
+import math
+
+import numpy as np
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class P2Quantile:
+    """
+    P-square estimate of one quantile (Jain & Chlamtac, 1985): five markers
+    whose heights are adjusted with a piecewise-parabolic fit, so memory stays
+    constant however many values are seen.
+    """
+
+    def __init__(self, p):
+        self.p = p
+        self._initial = []
+        self._heights = None
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self._increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x):
+        if self._heights is None:
+            self._initial.append(x)
+            if len(self._initial) == 5:
+                self._heights = sorted(self._initial)
+            return
+
+        q, n = self._heights, self._positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    def value(self):
+        if self._heights is not None:
+            return self._heights[2]
+        if not self._initial:
+            return math.nan
+        return float(np.quantile(self._initial, self.p))
+
+
+class StreamingStats:
+    """
+    Running summary of a stream of scores in [0, 1] with O(1) memory:
+    mean/variance (Welford), min/max, a fixed-bin histogram, the top-k
+    highest-scoring items and P-square quantile estimates.
+
+    Args:
+        threshold (float): Scores at or above it count towards fraction_above_threshold.
+        bins (int): Histogram bins over [0, 1].
+        top_k (int): Highest-scoring items to keep, with their keys.
+        quantiles (tuple): Quantiles to estimate.
+    """
+
+    def __init__(self, threshold=0.5, bins=20, top_k=5, quantiles=DEFAULT_QUANTILES):
+        self.threshold = threshold
+        self.bins = bins
+        self.top_k = top_k
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.above = 0
+        self.histogram = np.zeros(bins, dtype=np.int64)
+        self._top = []
+        self._seq = 0
+        self._quantiles = {p: P2Quantile(p) for p in quantiles}
+        if 0.5 not in self._quantiles:
+            self._quantiles[0.5] = P2Quantile(0.5)
+
+    def add(self, score, key=None):
+        score = float(score)
+        self.count += 1
+        delta = score - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (score - self.mean)
+        self.min = min(self.min, score)
+        self.max = max(self.max, score)
+        self.above += score >= self.threshold
+        self.histogram[min(max(int(score * self.bins), 0), self.bins - 1)] += 1
+
+        if self.top_k:
+            # The sequence number breaks score ties without comparing keys
+            entry = (score, self._seq, key)
+            self._seq += 1
+            if len(self._top) < self.top_k:
+                heapq.heappush(self._top, entry)
+            elif score > self._top[0][0]:
+                heapq.heapreplace(self._top, entry)
+
+        for estimator in self._quantiles.values():
+            estimator.add(score)
+
+    def extend(self, scores, keys=None):
+        for i, score in enumerate(scores):
+            self.add(score, None if keys is None else keys[i])
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def quantile(self, p):
+        return self._quantiles[p].value()
+
+    def top(self):
+        """(key, score) of the highest-scoring items, best first."""
+        return [(key, score) for score, _, key in sorted(self._top, reverse=True)]
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        quantiles = {p: self.quantile(p) for p in sorted(self._quantiles)}
+        summary = {
+            "count": self.count,
+            "mean": self.mean,
+            "std": math.sqrt(self.variance),
+            "min": self.min,
+            "max": self.max,
+            "median": quantiles[0.5],
+            "quantiles": {f"p{round(p * 100):g}": v for p, v in quantiles.items()},
+            "fraction_above_threshold": self.above / self.count,
+            "histogram": self.histogram.tolist(),
+        }
+        if 0.25 in quantiles and 0.75 in quantiles:
+            summary["iqr"] = quantiles[0.75] - quantiles[0.25]
+        return summary
@@ -0,0 +1,96 @@
+# utils/tiling.py - Overlapping multi-scale patches of high-resolution images and their score heatmap
+import math
+
+import cv2
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+DEFAULT_SCALES = (1.0, 0.5)
+DEFAULT_OVERLAP = 0.5
+MAX_PATCHES = 256
+HEATMAP_SIZE = 32  # cells along the longer side of the heatmap
+
+
+def _starts(length, patch, stride):
+    # Evenly spread window starts from 0 to length - patch, so both edges are covered
+    n = math.ceil((length - patch) / stride) + 1
+    return np.linspace(0, length - patch, n).round().astype(np.int64)
+
+
+def plan_tiles(shape, patch=128, scales=DEFAULT_SCALES, overlap=DEFAULT_OVERLAP, max_patches=MAX_PATCHES):
+    """
+    Choose the patch grid of each scale for an image of `shape` (H, W).
+
+    Returns [(scale, ys, xs)] with the patch top-left corners in the scaled
+    image. Scales at which the image is smaller than a patch are dropped
+    (the image is always scaled to fit at least one patch). If the grids
+    hold more than `max_patches` patches, the stride grows until they fit;
+    with fewer patches allowed than scales, only the coarsest scales are kept.
+    """
+    if max_patches < 1:
+        raise ValueError(f"max_patches must be at least 1, got {max_patches}")
+    h, w = shape[:2]
+    fit = patch / min(h, w)
+    scales = sorted({s for s in scales if s >= fit} or {fit}, reverse=True)[-max_patches:]
+    stride = max(1.0, patch * (1 - overlap))
+    while True:
+        grids = []
+        for scale in scales:
+            sh, sw = max(patch, round(h * scale)), max(patch, round(w * scale))
+            grids.append((scale, _starts(sh, patch, stride), _starts(sw, patch, stride)))
+        total = sum(len(ys) * len(xs) for _, ys, xs in grids)
+        if total <= max_patches or total == len(grids):
+            return grids
+        stride *= max(1.1, math.sqrt(total / max_patches))
+
+
+def extract_patches(img: np.ndarray, ys, xs, patch=128) -> np.ndarray:
+    """
+    Copy the patches at the grid of top-left corners ys x xs out of one
+    (H, W, C) image as an (len(ys) * len(xs), patch, patch, C) array,
+    through a strided window view instead of per-patch slicing.
+    """
+    windows = sliding_window_view(img, (patch, patch), axis=(0, 1))  # (H-p+1, W-p+1, C, p, p), no copy
+    picked = windows[ys[:, None], xs[None, :]]  # (rows, cols, C, p, p)
+    return np.ascontiguousarray(picked.transpose(0, 1, 3, 4, 2)).reshape(-1, patch, patch, img.shape[2])
+
+
+def iter_tiles(img: np.ndarray, patch=128, scales=DEFAULT_SCALES, overlap=DEFAULT_OVERLAP, max_patches=MAX_PATCHES):
+    """
+    Yield (scale, patches, boxes) per scale: the uint8 patches of the scaled
+    image and their (x0, y0, x1, y1) boxes as fractions of the image size.
+    """
+    h, w = img.shape[:2]
+    for scale, ys, xs in plan_tiles(img.shape, patch, scales, overlap, max_patches):
+        sh, sw = max(patch, round(h * scale)), max(patch, round(w * scale))
+        scaled = img if (sh, sw) == (h, w) else cv2.resize(img, (sw, sh), interpolation=cv2.INTER_AREA)
+        yy, xx = np.meshgrid(ys, xs, indexing="ij")
+        boxes = np.stack([xx.ravel() / sw, yy.ravel() / sh, (xx.ravel() + patch) / sw, (yy.ravel() + patch) / sh], 1)
+        yield scale, extract_patches(scaled, ys, xs, patch), boxes
+
+
+def score_heatmap(boxes: np.ndarray, scores: np.ndarray, shape, size=HEATMAP_SIZE) -> np.ndarray:
+    """
+    Average the scores of all patches covering each cell of a coarse grid
+    with `size` cells along the longer side of an image of `shape` (H, W).
+
+    Patch rectangles are accumulated in a 2D difference array and summed
+    up with cumulative sums, so the cost does not depend on patch size.
+    """
+    h, w = shape[:2]
+    gh, gw = (size, max(1, round(size * w / h))) if h >= w else (max(1, round(size * h / w)), size)
+    x0 = np.floor(boxes[:, 0] * gw).astype(np.int64)
+    y0 = np.floor(boxes[:, 1] * gh).astype(np.int64)
+    x1 = np.maximum(np.ceil(boxes[:, 2] * gw).astype(np.int64), x0 + 1).clip(max=gw)
+    y1 = np.maximum(np.ceil(boxes[:, 3] * gh).astype(np.int64), y0 + 1).clip(max=gh)
+
+    sums = np.zeros((gh + 1, gw + 1), dtype=np.float64)
+    counts = np.zeros_like(sums)
+    for grid, values in ((sums, scores), (counts, np.ones_like(scores))):
+        np.add.at(grid, (y0, x0), values)
+        np.add.at(grid, (y0, x1), -values)
+        np.add.at(grid, (y1, x0), -values)
+        np.add.at(grid, (y1, x1), values)
+    sums = sums.cumsum(0).cumsum(1)[:gh, :gw]
+    counts = counts.cumsum(0).cumsum(1)[:gh, :gw]
+    return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0).astype(np.float32)
@@ -0,0 +1,99 @@
+# utils/timeline.py - Compact per-frame score timelines and suspect-segment localization
+import numpy as np
+
+TIMELINE_DTYPE = np.dtype([("frame_index", np.int64), ("timestamp", np.float32), ("score", np.float32)])
+
+
+class TimelineRecorder:
+    """
+    Append-only per-frame timeline kept in a growing structured array
+    (16 bytes per frame) instead of a list of Python tuples.
+    """
+
+    def __init__(self, capacity=1024):
+        self._data = np.empty(capacity, dtype=TIMELINE_DTYPE)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, frame_index, timestamp, score):
+        if self._size == len(self._data):
+            grown = np.empty(2 * len(self._data), dtype=TIMELINE_DTYPE)
+            grown[:self._size] = self._data
+            self._data = grown
+        self._data[self._size] = (frame_index, timestamp, score)
+        self._size += 1
+
+    def array(self) -> np.ndarray:
+        return self._data[:self._size]
+
+
+def smooth_scores(scores: np.ndarray, window: int = 5) -> np.ndarray:
+    """Centered moving average; the window shrinks at both ends instead of padding."""
+    scores = np.asarray(scores, dtype=np.float64)
+    if window <= 1 or len(scores) < 2:
+        return scores
+    cumsum = np.concatenate(([0.0], np.cumsum(scores)))
+    idx = np.arange(len(scores))
+    lo = np.maximum(idx - window // 2, 0)
+    hi = np.minimum(idx + window // 2 + 1, len(scores))
+    return (cumsum[hi] - cumsum[lo]) / (hi - lo)
+
+
+def suspect_segments(timeline: np.ndarray, threshold: float = 0.5, window: int = 5, min_gap_seconds: float = 1.0):
+    """
+    Time ranges whose smoothed score stays at or above `threshold`.
+
+    Runs separated by less than `min_gap_seconds` are merged, so isolated
+    dips below the threshold do not split one manipulated stretch in two.
+    """
+    if not len(timeline):
+        return []
+    smoothed = smooth_scores(timeline["score"], window)
+    above = np.concatenate(([False], smoothed >= threshold, [False]))
+    edges = np.flatnonzero(np.diff(above.astype(np.int8)))
+    runs = list(zip(edges[::2], edges[1::2]))  # half-open [start, stop) sample ranges
+
+    merged = []
+    for start, stop in runs:
+        if merged and timeline["timestamp"][start] - timeline["timestamp"][merged[-1][1] - 1] < min_gap_seconds:
+            merged[-1][1] = stop
+        else:
+            merged.append([start, stop])
+
+    segments = []
+    for start, stop in merged:
+        scores = timeline["score"][start:stop]
+        segments.append({
+            "start_frame": int(timeline["frame_index"][start]),
+            "end_frame": int(timeline["frame_index"][stop - 1]),
+            "start_time": round(float(timeline["timestamp"][start]), 3),
+            "end_time": round(float(timeline["timestamp"][stop - 1]), 3),
+            "frames": int(stop - start),
+            "mean_score": float(scores.mean()),
+            "peak_score": float(scores.max()),
+        })
+    return segments
+
+
+def encode_timeline(timeline: np.ndarray, resolution: float = 0.05) -> dict:
+    """
+    Run-length encode a timeline for JSON output.
+
+    Scores are quantized to `resolution` and consecutive samples with the
+    same quantized score form one run [start_frame, end_frame, start_time,
+    end_time, score], so long stable stretches cost one entry.
+    """
+    if not len(timeline):
+        return {"resolution": resolution, "samples": 0, "runs": []}
+    levels = np.round(timeline["score"] / resolution).astype(np.int64)
+    starts = np.flatnonzero(np.concatenate(([True], levels[1:] != levels[:-1])))
+    stops = np.concatenate((starts[1:], [len(levels)])) - 1
+    runs = [
+        [int(timeline["frame_index"][a]), int(timeline["frame_index"][b]),
+         round(float(timeline["timestamp"][a]), 3), round(float(timeline["timestamp"][b]), 3),
+         round(float(levels[a] * resolution), 6)]
+        for a, b in zip(starts, stops)
+    ]
+    return {"resolution": resolution, "samples": int(len(timeline)), "runs": runs}
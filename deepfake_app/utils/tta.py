@@ -0,0 +1,54 @@
+# utils/tta.py - Test-time augmentation: batched augmented views and score aggregation
+import cv2
+import numpy as np
+
+DEFAULT_VIEWS = ("original", "hflip", "crop_center", "crop_tl", "crop_tr", "crop_bl", "crop_br")
+AGGREGATIONS = ("mean", "max", "trimmed_mean")
+CROP_FRACTION = 0.9
+
+
+def _crop(img, fraction, anchor):
+    h, w = img.shape[:2]
+    ch, cw = int(h * fraction), int(w * fraction)
+    y = {"t": 0, "c": (h - ch) // 2, "b": h - ch}[anchor[0]]
+    x = {"l": 0, "c": (w - cw) // 2, "r": w - cw}[anchor[1]]
+    return img[y:y + ch, x:x + cw]
+
+
+def build_views(img: np.ndarray, target_size=(128, 128), views=DEFAULT_VIEWS) -> np.ndarray:
+    """
+    Build all augmented views of one uint8 image as a single (V, H, W, 3)
+    float32 batch, so they can be scored in one forward pass.
+
+    Crops are cut from the full-resolution image before resizing.
+    """
+    anchors = {"crop_center": "cc", "crop_tl": "tl", "crop_tr": "tr", "crop_bl": "bl", "crop_br": "br"}
+    batch = np.empty((len(views), target_size[1], target_size[0], 3), dtype=np.float32)
+    resized = None
+    for i, view in enumerate(views):
+        if view in ("original", "hflip"):
+            if resized is None:
+                resized = cv2.resize(img, target_size)
+            out = resized if view == "original" else resized[:, ::-1]
+        elif view in anchors:
+            out = cv2.resize(_crop(img, CROP_FRACTION, anchors[view]), target_size)
+        else:
+            raise ValueError(f"Unknown TTA view: {view}")
+        batch[i] = out
+    batch /= 255.0
+    return batch
+
+
+def aggregate(scores, method="mean", trim=0.2, axis=-1):
+    """Combine per-view scores along `axis` with mean, max or a trimmed mean."""
+    scores = np.asarray(scores, dtype=np.float32)
+    if method == "mean":
+        return scores.mean(axis=axis)
+    if method == "max":
+        return scores.max(axis=axis)
+    if method == "trimmed_mean":
+        ordered = np.sort(scores, axis=axis)
+        n = ordered.shape[axis]
+        k = min(int(n * trim), (n - 1) // 2)
+        return np.take(ordered, np.arange(k, n - k), axis=axis).mean(axis=axis)
+    raise ValueError(f"Unknown TTA aggregation: {method} (expected one of {AGGREGATIONS})")
@@ -0,0 +1,258 @@
+# utils/video_io.py - Video frame sampling strategies that avoid decoding discarded frames
+import math
+import queue
+import re
+import subprocess
+import threading
+from itertools import count
+
+import cv2
+import numpy as np
+
+SAMPLING_STRATEGIES = ("read", "grab", "seek", "keyframe")
+DECODERS = ("opencv", "ffmpeg")
+# Size of each preallocated frame block of the ffmpeg decoder
+FFMPEG_BLOCK_BYTES = 8 << 20
+DEFAULT_FPS = 25.0
+# Below this gap (in frames) grabbing forward is cheaper than a seek, which
+# has to decode from the previous keyframe anyway
+SEEK_MIN_GAP = 48
+
+
+def video_info(video_path: str) -> dict:
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+    info = {
+        "fps": cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS,
+        "frame_count": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    }
+    cap.release()
+    return info
+
+
+def segment_ranges(frame_count: int, num_segments: int):
+    """Split [0, frame_count) into contiguous ranges; the last one is open-ended."""
+    bounds = [frame_count * i // num_segments for i in range(num_segments)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:] + [None]) if end is None or end > start]
+
+
+def _keep(frame_index, fps, frame_skip, sample_fps):
+    if sample_fps:
+        # Keep the first frame at or after each 1/sample_fps boundary
+        step = fps / sample_fps
+        # floor(a / b) rather than a // b, to match ffmpeg's select expression
+        return math.floor(frame_index / step) != math.floor((frame_index - 1) / step)
+    return frame_index % frame_skip == 0
+
+
+def _seek_to(cap, frame_index):
+    if frame_index > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+    return frame_index
+
+
+def _iter_read(cap, fps, frame_skip, sample_fps, start_frame, end_frame):
+    """Decode every frame and keep the sampled ones (the original behaviour)."""
+    frame_index = _seek_to(cap, start_frame)
+    while end_frame is None or frame_index < end_frame:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if _keep(frame_index, fps, frame_skip, sample_fps):
+            yield frame_index, frame_index / fps, frame
+        frame_index += 1
+
+
+def _iter_grab(cap, fps, frame_skip, sample_fps, start_frame, end_frame):
+    """Demux every frame with grab() but only convert the kept ones with retrieve()."""
+    frame_index = _seek_to(cap, start_frame)
+    while (end_frame is None or frame_index < end_frame) and cap.grab():
+        if _keep(frame_index, fps, frame_skip, sample_fps):
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield frame_index, frame_index / fps, frame
+        frame_index += 1
+
+
+def _iter_seek(cap, fps, frame_skip, sample_fps, frame_count, start_frame, end_frame):
+    """Jump to each target timestamp, seeking across large gaps and grabbing across small ones."""
+    step = fps / sample_fps if sample_fps else frame_skip
+    # First sample at or after start_frame, on the same grid as an unranged run
+    k = math.ceil(start_frame / step)
+    while k > 0 and int(round((k - 1) * step)) >= start_frame:
+        k -= 1
+    target, position = k * step, 0
+    end = end_frame
+    if frame_count > 0:
+        end = frame_count if end is None else min(end, frame_count)
+    while end is None or int(round(target)) < end:
+        frame_index = int(round(target))
+        if frame_index - position > SEEK_MIN_GAP:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            position = frame_index
+        while position < frame_index:
+            if not cap.grab():
+                return
+            position += 1
+        ret, frame = cap.read()
+        if not ret:
+            return
+        position += 1
+        yield frame_index, frame_index / fps, frame
+        target += step
+
+
+def _iter_keyframes(video_path, fps, width, height, sample_fps):
+    """Decode keyframes only, by asking ffmpeg to skip every non-key frame."""
+    import imageio_ffmpeg  # type: ignore
+
+    cmd = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-nostats",
+        "-skip_frame", "nokey", "-i", video_path, "-an",
+        "-vf", "showinfo", "-fps_mode", "passthrough",
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    timestamps = queue.Queue()
+
+    def read_timestamps():
+        # showinfo logs one line per output frame, including its pts_time
+        for line in proc.stderr:
+            match = re.search(rb"pts_time:\s*([-\d.]+)", line)
+            if match:
+                timestamps.put(float(match.group(1)))
+
+    reader = threading.Thread(target=read_timestamps, daemon=True)
+    reader.start()
+
+    frame_bytes = width * height * 3
+    last_kept = None
+    try:
+        while True:
+            data = proc.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            timestamp = timestamps.get(timeout=30)
+            if sample_fps and last_kept is not None and timestamp - last_kept < 1.0 / sample_fps:
+                continue
+            last_kept = timestamp
+            frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+            yield int(round(timestamp * fps)), timestamp, frame
+    finally:
+        proc.kill()
+        proc.wait()
+        reader.join(timeout=1)
+
+
+def _iter_ffmpeg(video_path, fps, width, height, frame_skip, sample_fps, output_size):
+    """
+    Let ffmpeg select and downscale the sampled frames and stream them as raw
+    BGR through a pipe, straight into preallocated blocks of frames.
+    """
+    import imageio_ffmpeg  # type: ignore
+
+    if sample_fps:
+        # Same rule as _keep: first frame at or after each 1/sample_fps boundary
+        step = repr(fps / sample_fps)
+        select = f"select=gt(floor(n/{step})\\,floor((n-1)/{step}))"
+    else:
+        select = f"select=not(mod(n\\,{int(frame_skip)}))"
+    filters = [select]
+    out_w, out_h = width, height
+    if output_size:
+        out_w, out_h = output_size
+        filters.append(f"scale={out_w}:{out_h}:flags=area")
+
+    cmd = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-nostats",
+        "-i", video_path, "-an", "-vf", ",".join(filters), "-fps_mode", "passthrough",
+        "-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    kept = (i for i in count() if _keep(i, fps, frame_skip, sample_fps))
+
+    # Frames are views into a block; a new block is allocated once it is used
+    # up, so frames handed out earlier stay valid
+    block_frames = max(1, FFMPEG_BLOCK_BYTES // (out_w * out_h * 3))
+    block, slot = None, block_frames
+    try:
+        while True:
+            if slot == block_frames:
+                block, slot = np.empty((block_frames, out_h, out_w, 3), dtype=np.uint8), 0
+            frame = block[slot]
+            view = memoryview(frame.reshape(-1))
+            filled = 0
+            while filled < len(view):
+                n = proc.stdout.readinto(view[filled:])
+                if not n:
+                    # With -loglevel error stderr only holds the failure message
+                    if proc.wait() != 0:
+                        raise RuntimeError(f"ffmpeg failed: {proc.stderr.read().decode(errors='replace').strip()}")
+                    return
+                filled += n
+            slot += 1
+            frame_index = next(kept)
+            yield frame_index, frame_index / fps, frame
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def iter_frames(video_path: str, strategy: str = "grab", frame_skip: int = 10, sample_fps: float = None,
+                start_frame: int = 0, end_frame: int = None, decoder: str = "opencv", output_size=None):
+    """
+    Yield (frame_index, timestamp_seconds, BGR frame) for the sampled frames of a video.
+
+    `start_frame` / `end_frame` restrict sampling to a half-open frame range
+    while keeping the sample grid of a full run, so consecutive ranges
+    together yield exactly the frames of the whole video.
+
+    Args:
+        video_path (str): Path to the video file.
+        strategy (str): "read" decodes every frame; "grab" skips the colour
+            conversion of discarded frames; "seek" jumps between samples;
+            "keyframe" decodes keyframes only (via ffmpeg).
+        frame_skip (int): Keep every frame_skip-th frame when sample_fps is not given.
+        sample_fps (float): Target samples per second of video; overrides frame_skip.
+            For "keyframe" it caps the rate of keyframes kept.
+        start_frame (int): First frame of the range (not supported by "keyframe" or ffmpeg).
+        end_frame (int): End of the range, exclusive; None runs to the end of the video.
+        decoder (str): "opencv" decodes in-process with cv2.VideoCapture; "ffmpeg"
+            has an ffmpeg subprocess select (and optionally scale) the sampled
+            frames and ignores `strategy`.
+        output_size (tuple): (width, height) the ffmpeg decoder scales frames to;
+            None keeps the source resolution. Ignored by the OpenCV decoder.
+    """
+    if strategy not in SAMPLING_STRATEGIES:
+        raise ValueError(f"Unknown sampling strategy: {strategy} (expected one of {SAMPLING_STRATEGIES})")
+    if decoder not in DECODERS:
+        raise ValueError(f"Unknown decoder: {decoder} (expected one of {DECODERS})")
+    info = video_info(video_path)
+
+    if decoder == "ffmpeg":
+        if start_frame or end_frame is not None:
+            raise ValueError("Frame ranges are not supported by the ffmpeg decoder")
+        yield from _iter_ffmpeg(video_path, info["fps"], info["width"], info["height"], frame_skip, sample_fps,
+                                output_size)
+        return
+
+    if strategy == "keyframe":
+        if start_frame or end_frame is not None:
+            raise ValueError("Frame ranges are not supported by the keyframe strategy")
+        yield from _iter_keyframes(video_path, info["fps"], info["width"], info["height"], sample_fps)
+        return
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if strategy == "read":
+            yield from _iter_read(cap, info["fps"], frame_skip, sample_fps, start_frame, end_frame)
+        elif strategy == "grab":
+            yield from _iter_grab(cap, info["fps"], frame_skip, sample_fps, start_frame, end_frame)
+        else:
+            yield from _iter_seek(cap, info["fps"], frame_skip, sample_fps, info["frame_count"], start_frame, end_frame)
+    finally:
+        cap.release()